@@ -0,0 +1,258 @@
+"""
+Practice Dataset Cache
+======================
+Converts each source file in practice_datasets/ to a typed Arrow IPC file once,
+then serves later loads from a memory map.
+
+Why:
+    Every notebook re-parses the CSVs / events.json as text and re-infers
+    timestamps (`check_time`, `funded_date`, `timestamp`) on each load.
+
+How:
+    - Cache key = resolved path + size + mtime_ns. Editing or replacing a
+      source changes the key, so a stale cache is never served.
+    - Cache files are uncompressed Arrow IPC: loads are `mmap` + zero-copy, and
+      `columns=[...]` only touches the pages of the columns asked for.
+    - Spark gets a Parquet copy (built on first request) so column pruning is
+      pushed into the scan.
+
+Usage:
+    from dataset_cache import load_pandas, load_table
+    loans = load_pandas("csv/loan_applications/loans.csv", columns=["application_id", "amount"])
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+
+DATASETS_DIR = Path(__file__).resolve().parent
+DEFAULT_CACHE_DIR = DATASETS_DIR / ".cache"
+
+
+# =============================================================================
+# SCHEMAS (keyed by file stem, "synthetic_" prefix ignored)
+# =============================================================================
+
+SCHEMAS = {
+    "loan_applications": pa.schema([
+        ("application_id", pa.string()),
+        ("application_date", pa.date32()),
+        ("applicant_name", pa.string()),
+        ("channel", pa.dictionary(pa.int8(), pa.string())),
+        ("state", pa.dictionary(pa.int8(), pa.string())),
+    ]),
+    "credit_checks": pa.schema([
+        ("credit_check_id", pa.string()),
+        ("application_id", pa.string()),
+        ("check_time", pa.timestamp("us")),
+        ("result", pa.dictionary(pa.int8(), pa.string())),
+        ("score", pa.int32()),
+    ]),
+    "loans": pa.schema([
+        ("loan_id", pa.string()),
+        ("application_id", pa.string()),
+        ("amount", pa.int64()),
+        ("funded_date", pa.timestamp("us")),
+        ("term_months", pa.int32()),
+    ]),
+    "events": pa.schema([
+        ("customer_id", pa.int32()),
+        ("event", pa.dictionary(pa.int8(), pa.string())),
+        ("timestamp", pa.timestamp("us")),
+    ]),
+}
+
+
+def schema_for(path: Path):
+    """Returns the known schema for a source file, or None to let Arrow infer."""
+    return SCHEMAS.get(path.stem.removeprefix("synthetic_"))
+
+
+# =============================================================================
+# SOURCE READERS (cold path)
+# =============================================================================
+
+def _read_csv(path: Path, schema) -> pa.Table:
+    convert = pv.ConvertOptions()
+    if schema is not None:
+        # Parse dictionary columns as plain strings, encode after
+        convert = pv.ConvertOptions(column_types={
+            field.name: field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+            for field in schema
+        })
+    table = pv.read_csv(path, convert_options=convert)
+    return table.cast(schema) if schema is not None else table
+
+
+def _read_json(path: Path, schema) -> pa.Table:
+    """
+    Reads a JSON array of objects (events.json is pretty-printed, so
+    pyarrow.json's newline-delimited reader can't be used directly).
+    """
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    if schema is None:
+        return pa.Table.from_pylist(records)
+    columns = {}
+    for field in schema:
+        values = [r.get(field.name) for r in records]
+        if pa.types.is_timestamp(field.type):
+            columns[field.name] = pa.array(values, pa.string()).cast(field.type)
+        elif pa.types.is_dictionary(field.type):
+            columns[field.name] = pa.array(values, field.type.value_type).dictionary_encode().cast(field.type)
+        else:
+            columns[field.name] = pa.array(values, field.type)
+    return pa.table(columns, schema=schema)
+
+
+def read_source(path: Path) -> pa.Table:
+    """Parses a source file into a typed Arrow table."""
+    schema = schema_for(path)
+    if path.suffix == ".csv":
+        return _read_csv(path, schema)
+    if path.suffix == ".json":
+        return _read_json(path, schema)
+    raise ValueError(f"unsupported source type: {path.suffix}")
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class DatasetCache:
+    """
+    Arrow IPC cache for source files, invalidated by path, size and mtime.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def _resolve(self, source) -> Path:
+        path = Path(source)
+        return path if path.is_absolute() else (DATASETS_DIR / path).resolve()
+
+    def _prefix(self, path: Path) -> str:
+        """File-name prefix shared by every cached version of one source."""
+        return f"{path.stem}-{hashlib.sha1(str(path).encode()).hexdigest()[:8]}"
+
+    def cache_key(self, path: Path) -> str:
+        stat = path.stat()
+        return hashlib.sha1(f"{path}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+
+    def cache_path(self, path: Path, suffix: str = ".arrow") -> Path:
+        return self.cache_dir / f"{self._prefix(path)}-{self.cache_key(path)}{suffix}"
+
+    def _evict_stale(self, path: Path, current: Path):
+        """Removes cache files left over from older versions of the source."""
+        for old in self.cache_dir.glob(f"{self._prefix(path)}-*"):
+            if old.stem != current.stem:
+                old.unlink(missing_ok=True)
+
+    def ensure(self, source) -> Path:
+        """
+        Returns the IPC cache file for `source`, building it if missing/stale.
+        Writes go to a temp file and are renamed into place atomically.
+        """
+        path = self._resolve(source)
+        target = self.cache_path(path)
+        if target.exists():
+            return target
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        table = read_source(path)
+        tmp = target.with_suffix(f".tmp{os.getpid()}")
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, target)
+        self._evict_stale(path, target)
+        return target
+
+    def ensure_parquet(self, source) -> Path:
+        """Returns a Parquet copy of the cached table (for Spark)."""
+        path = self._resolve(source)
+        target = self.cache_path(path, ".parquet")
+        if not target.exists():
+            tmp = target.with_suffix(f".tmp{os.getpid()}")
+            pq.write_table(self.load_table(source), tmp)
+            os.replace(tmp, target)
+            self._evict_stale(path, target.with_suffix(".arrow"))
+        return target
+
+    def load_table(self, source, columns=None) -> pa.Table:
+        """
+        Memory-maps the cached IPC file. Buffers point into the map, so only
+        the pages of the selected columns are ever read from disk.
+        """
+        source_file = pa.memory_map(str(self.ensure(source)), "r")
+        table = pa.ipc.open_file(source_file).read_all()
+        return table.select(columns) if columns else table
+
+    def load_pandas(self, source, columns=None):
+        """
+        Loads into pandas. Numeric columns without nulls are zero-copy views of
+        the memory map; strings/dictionaries are converted once.
+        """
+        return self.load_table(source, columns).to_pandas(split_blocks=True)
+
+    def load_spark(self, spark, source, columns=None):
+        """Reads the Parquet copy with Spark; `columns` is pushed into the scan."""
+        df = spark.read.parquet(str(self.ensure_parquet(source)))
+        return df.select(*columns) if columns else df
+
+    def clear(self):
+        """Deletes every cache file."""
+        if self.cache_dir.exists():
+            for f in self.cache_dir.iterdir():
+                f.unlink()
+
+
+_default_cache = DatasetCache()
+
+
+def load_table(source, columns=None) -> pa.Table:
+    """load_table() on the default cache (src/practice_datasets/.cache)."""
+    return _default_cache.load_table(source, columns)
+
+
+def load_pandas(source, columns=None):
+    """load_pandas() on the default cache."""
+    return _default_cache.load_pandas(source, columns)
+
+
+def load_spark(spark, source, columns=None):
+    """load_spark() on the default cache."""
+    return _default_cache.load_spark(spark, source, columns)
+
+
+def list_sources() -> list:
+    """All CSV / JSON files under practice_datasets/, relative to it."""
+    files = sorted(DATASETS_DIR.glob("csv/**/*.csv")) + sorted(DATASETS_DIR.glob("json/**/*.json"))
+    return [f.relative_to(DATASETS_DIR) for f in files]
+
+
+# =============================================================================
+# MAIN - COLD VS WARM LOAD TIMES
+# =============================================================================
+
+if __name__ == "__main__":
+    import tempfile
+
+    cache = DatasetCache(tempfile.mkdtemp())
+    print(f"{'source':<52}{'cold ms':>10}{'warm ms':>10}{'speedup':>9}")
+    print("-" * 81)
+    for source in list_sources():
+        start = time.perf_counter()
+        cache.load_pandas(source)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cache.load_pandas(source)
+        warm = time.perf_counter() - start
+        print(f"{str(source):<52}{cold * 1000:>10.1f}{warm * 1000:>10.1f}{cold / warm:>8.1f}x")
@@ -0,0 +1,278 @@
+"""
+Streaming Events Reader
+=======================
+Reads a top-level JSON array (like json/events.json) incrementally instead of
+`json.load`-ing the whole document into Python objects.
+
+How it works:
+    - The file is read in chunks (or sliced from an mmap) and decoded with an
+      incremental UTF-8 decoder, so multi-byte characters can straddle chunks.
+    - `json.JSONDecoder.raw_decode` pulls one array element at a time out of a
+      small rolling text buffer; memory is bounded by chunk size + batch size.
+    - Elements are collected into typed Arrow RecordBatches:
+          customer_id  int32
+          event        dictionary<int32, string>
+          timestamp    timestamp[us]   (-> datetime64[us] in pandas)
+
+One-shot converters write newline-delimited JSON or Parquet, both of which
+Spark can split across cores (a single JSON array cannot be split).
+
+Usage:
+    for batch in iter_batches("json/events.json", batch_size=100_000):
+        ...
+    convert_to_parquet("json/events.json", "/tmp/events.parquet")
+    convert_to_ndjson("json/events.json", "/tmp/events.ndjson")
+"""
+
+import codecs
+import json
+import mmap
+import re
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+EVENTS_SCHEMA = pa.schema([
+    ("customer_id", pa.int32()),
+    ("event", pa.dictionary(pa.int32(), pa.string())),
+    ("timestamp", pa.timestamp("us")),
+])
+
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 65_536
+# Longest single array element the parser will buffer before giving up
+DEFAULT_MAX_ELEMENT_CHARS = 64 * 1024 * 1024
+
+_SKIP_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*")
+
+
+# =============================================================================
+# INCREMENTAL ARRAY PARSER
+# =============================================================================
+
+def _read_chunks(path, chunk_bytes: int, use_mmap: bool):
+    """Yields raw byte chunks from a regular read loop or an mmap."""
+    with open(path, "rb") as f:
+        if use_mmap:
+            size = Path(path).stat().st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for start in range(0, size, chunk_bytes):
+                    yield mm[start:start + chunk_bytes]
+        else:
+            while chunk := f.read(chunk_bytes):
+                yield chunk
+
+
+def iter_objects(path, chunk_bytes: int = DEFAULT_CHUNK_BYTES, use_mmap: bool = False,
+                 max_element_chars: int = DEFAULT_MAX_ELEMENT_CHARS):
+    """
+    Yields each element of a top-level JSON array without loading the array.
+
+    Raises:
+        ValueError: If the document is not a JSON array, is truncated, or has
+            an element longer than `max_element_chars` (usually malformed)
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = _read_chunks(path, chunk_bytes, use_mmap)
+    buf = ""
+    pos = 0
+    state = "start"  # start -> value -> separator -> ... -> done
+    exhausted = False
+
+    def extend(pending: str, at_least: int) -> str:
+        """Appends at least `at_least` more bytes of input (or all that is left) to `pending`."""
+        nonlocal exhausted
+        if len(pending) > max_element_chars:
+            raise ValueError(f"array element longer than {max_element_chars} characters (malformed JSON?)")
+        parts, added = [pending], 0
+        while added < at_least:
+            chunk = next(chunks, None)
+            if chunk is None:
+                parts.append(utf8.decode(b"", final=True))
+                exhausted = True
+                break
+            parts.append(utf8.decode(chunk))
+            added += len(chunk)
+        return "".join(parts)
+
+    while True:
+        # Skip whitespace; refill when the buffer runs dry
+        pos = _SKIP_WHITESPACE.match(buf, pos).end()
+        if pos >= len(buf):
+            if exhausted:
+                break
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+                buf = buf[pos:] + utf8.decode(b"", final=True)
+            else:
+                buf = buf[pos:] + utf8.decode(chunk)
+            pos = 0
+            continue
+
+        char = buf[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError(f"expected a top-level JSON array, found {char!r}")
+            pos += 1
+            state = "first"
+        elif state in ("first", "value"):
+            if char == "]" and state == "first":
+                state = "done"
+                pos += 1
+                continue
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Most likely the element continues in the next chunk(s). Read
+                # at least as much again as is pending, so re-parsing a long
+                # element stays linear overall.
+                if exhausted:
+                    raise
+                buf = extend(buf[pos:], max(len(buf) - pos, 1))
+                pos = 0
+                continue
+            if isinstance(obj, (int, float)) and not exhausted and _NUMBER_TAIL.match(buf, end).end() == len(buf):
+                # The number's token runs to the buffer edge ("2" of "2.5e3"):
+                # it may continue in the next chunk, so re-read with more data
+                buf = extend(buf[pos:], 1)
+                pos = 0
+                continue
+            yield obj
+            pos = end
+            state = "separator"
+        elif state == "separator":
+            if char == ",":
+                state = "value"
+            elif char == "]":
+                state = "done"
+            else:
+                raise ValueError(f"expected ',' or ']' in array, found {char!r}")
+            pos += 1
+        else:
+            raise ValueError(f"unexpected data after the top-level array: {char!r}")
+
+    if state != "done":
+        raise ValueError("truncated JSON array")
+
+
+# =============================================================================
+# TYPED BATCHES
+# =============================================================================
+
+class _EventVocabulary:
+    """
+    Keeps one growing dictionary for the `event` column, so every batch's
+    dictionary is a prefix-compatible superset of the previous one.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def encode(self, events: list) -> pa.DictionaryArray:
+        codes = []
+        for value in events:
+            code = self.index.get(value)
+            if code is None and value is not None:
+                code = self.index[value] = len(self.values)
+                self.values.append(value)
+            codes.append(code)
+        return pa.DictionaryArray.from_arrays(pa.array(codes, pa.int32()), pa.array(self.values, pa.string()))
+
+
+def _to_batch(rows: list, vocab: _EventVocabulary) -> pa.RecordBatch:
+    customer_ids = pa.array([r.get("customer_id") for r in rows], pa.int32())
+    events = vocab.encode([r.get("event") for r in rows])
+    timestamps = pa.array([r.get("timestamp") for r in rows], pa.string()).cast(pa.timestamp("us"))
+    return pa.RecordBatch.from_arrays([customer_ids, events, timestamps], schema=EVENTS_SCHEMA)
+
+
+def iter_batches(path, batch_size: int = DEFAULT_BATCH_SIZE, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                 use_mmap: bool = False):
+    """
+    Yields typed RecordBatches of at most `batch_size` events.
+
+    Args:
+        path: JSON file containing one top-level array of event objects
+        batch_size: Rows per batch
+        chunk_bytes: Bytes read (or sliced from the mmap) per refill
+        use_mmap: Slice chunks from an mmap instead of read() calls
+    """
+    vocab = _EventVocabulary()
+    rows = []
+    for obj in iter_objects(path, chunk_bytes, use_mmap):
+        rows.append(obj)
+        if len(rows) >= batch_size:
+            yield _to_batch(rows, vocab)
+            rows = []
+    if rows:
+        yield _to_batch(rows, vocab)
+
+
+def read_table(path, **kwargs) -> pa.Table:
+    """Convenience: all batches as one table (only for files that fit in memory)."""
+    return pa.Table.from_batches(list(iter_batches(path, **kwargs)), schema=EVENTS_SCHEMA)
+
+
+# =============================================================================
+# ONE-SHOT CONVERTERS
+# =============================================================================
+
+def convert_to_ndjson(src, dst, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """Rewrites the array as newline-delimited JSON. Returns the row count."""
+    rows = 0
+    with open(dst, "w", encoding="utf-8") as out:
+        for obj in iter_objects(src, chunk_bytes):
+            out.write(json.dumps(obj, separators=(",", ":")))
+            out.write("\n")
+            rows += 1
+    return rows
+
+
+def convert_to_parquet(src, dst, batch_size: int = DEFAULT_BATCH_SIZE,
+                       chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """Writes typed Parquet, one row group per batch. Returns the row count."""
+    rows = 0
+    with pq.ParquetWriter(dst, EVENTS_SCHEMA) as writer:
+        for batch in iter_batches(src, batch_size, chunk_bytes):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Stream a JSON array of events")
+    parser.add_argument("path", nargs="?", default=str(Path(__file__).resolve().parent / "json" / "events.json"))
+    parser.add_argument("--to-parquet", help="write typed Parquet here")
+    parser.add_argument("--to-ndjson", help="write newline-delimited JSON here")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--mmap", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.to_parquet:
+        rows = convert_to_parquet(args.path, args.to_parquet, args.batch_size)
+        print(f"Wrote {rows:,} rows to {args.to_parquet}")
+    if args.to_ndjson:
+        rows = convert_to_ndjson(args.path, args.to_ndjson)
+        print(f"Wrote {rows:,} rows to {args.to_ndjson}")
+    if not (args.to_parquet or args.to_ndjson):
+        rows = 0
+        for batch in iter_batches(args.path, args.batch_size, use_mmap=args.mmap):
+            rows += batch.num_rows
+        print(f"Read {rows:,} rows ({batch.schema})" if rows else "No rows")
+    print(f"Elapsed: {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,397 @@
+"""
+Incremental Append-Only Ingestion
+=================================
+Ingests `loans.csv` / `credit_checks.csv` (and their synthetic_ variants)
+into Parquet, reading on each run only the bytes appended since the last one.
+
+How it works:
+    1. Checkpoint per source (in <output>/_checkpoints.json):
+           offset            bytes consumed, always just past a newline
+           head_hash         sha1 of the first 64 KiB consumed (header included)
+           last_line_hash    sha1 of the last consumed line
+           watermark         max funded_date / check_time seen so far
+           generation, parts Parquet files that make up the ingested table
+    2. On each run the source is checked against its checkpoint:
+           size < offset                  -> truncated, full reload
+           head or last line changed      -> rewritten, full reload
+           size == offset                 -> unchanged, nothing read
+           otherwise                      -> parse bytes [offset, last newline)
+       A trailing line without its newline is still being written: it is left
+       for the next run. New rows are parsed with the header prepended and the
+       dataset_cache schema, so types match a full read.
+    3. Commit: the new part is written to a temp file and renamed into place,
+       then the checkpoint file is replaced the same way. The checkpoint rename
+       is the commit point: readers only see parts it lists, so a crash in
+       between leaves an orphan part that the next run deletes and redoes.
+       A full reload writes a new generation; the old one is removed only
+       after the checkpoint pointing at the new one is in place.
+
+Rows older than the watermark are kept (the file is the source of truth) and
+counted as `late_rows`. A rewrite in the middle of the file that keeps the
+head, the last line and the size is not detected; `full_reload=True` forces
+a rebuild.
+
+Usage:
+    ingest = IncrementalIngest("/tmp/loan_ingest")
+    result = ingest.run("csv/loan_applications/loans.csv")
+    result.mode, result.new_rows                  # "incremental", 42
+    loans = ingest.load_table("csv/loan_applications/loans.csv")
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+from dataset_cache import DATASETS_DIR, schema_for
+
+
+HEAD_BYTES = 64 * 1024
+CHECKPOINT_FILE = "_checkpoints.json"
+
+# High-watermark column per source (file stem, "synthetic_" prefix ignored)
+TIME_COLUMNS = {"loans": "funded_date", "credit_checks": "check_time"}
+
+
+# =============================================================================
+# CHECKPOINTS
+# =============================================================================
+
+@dataclass
+class Checkpoint:
+    offset: int = 0
+    head_hash: str = ""
+    last_line_hash: str = ""
+    last_line_length: int = 0
+    watermark: str = None      # ISO timestamp, None until a timestamp is seen
+    rows: int = 0
+    generation: int = 0
+    parts: list = field(default_factory=list)  # relative to the output dir
+
+
+@dataclass
+class IngestResult:
+    source: str
+    mode: str          # "full", "incremental" or "unchanged"
+    reason: str        # why a full reload happened ("" otherwise)
+    new_rows: int
+    late_rows: int     # new rows older than the previous watermark
+    bytes_read: int
+    seconds: float
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def _write_atomic(path: Path, write):
+    """Calls write(tmp_path), fsyncs, then renames over `path`."""
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    write(tmp)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def _convert_options(schema) -> pv.ConvertOptions:
+    if schema is None:
+        return pv.ConvertOptions()
+    # Dictionary columns are parsed as strings and encoded by the cast after
+    return pv.ConvertOptions(column_types={
+        f.name: f.type.value_type if pa.types.is_dictionary(f.type) else f.type for f in schema
+    })
+
+
+def _parse(header: bytes, body: bytes, schema) -> pa.Table:
+    if not header:  # empty file, or not even the header line is complete yet
+        return schema.empty_table() if schema is not None else pa.table({})
+    table = pv.read_csv(pa.BufferReader(header + body), convert_options=_convert_options(schema))
+    return table.cast(schema) if schema is not None else table
+
+
+def _split_complete(data: bytes) -> bytes:
+    """The prefix of `data` that ends with a newline (drops a half-written line)."""
+    return data[:data.rfind(b"\n") + 1]
+
+
+def _last_line(data: bytes) -> bytes:
+    return data[data.rfind(b"\n", 0, len(data) - 1) + 1:]
+
+
+# =============================================================================
+# INGESTION
+# =============================================================================
+
+class IncrementalIngest:
+    """
+    Append-only CSV ingestion into `output_dir`, one checkpoint per source.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.checkpoint_path = self.output_dir / CHECKPOINT_FILE
+
+    def _resolve(self, source) -> Path:
+        path = Path(source)
+        return path if path.is_absolute() else (DATASETS_DIR / path).resolve()
+
+    def _key(self, path: Path) -> str:
+        """Checkpoint / directory name of a source: stem + short path hash."""
+        return f"{path.stem}-{_sha1(str(path).encode())[:8]}"
+
+    def load_checkpoints(self) -> dict:
+        if not self.checkpoint_path.exists():
+            return {}
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            return {key: Checkpoint(**value) for key, value in json.load(f).items()}
+
+    def _commit(self, checkpoints: dict):
+        payload = json.dumps({key: asdict(cp) for key, cp in checkpoints.items()}, indent=2)
+        _write_atomic(self.checkpoint_path, lambda tmp: tmp.write_text(payload, encoding="utf-8"))
+
+    def _check(self, f, size: int, cp: Checkpoint) -> str:
+        """Returns why the checkpoint no longer describes the file ("" if it does)."""
+        if size < cp.offset:
+            return f"truncated ({size:,} < {cp.offset:,} bytes)"
+        if cp.offset == 0 and size:  # the header has not been ingested yet
+            return "was empty"
+        f.seek(0)
+        if _sha1(f.read(min(HEAD_BYTES, cp.offset))) != cp.head_hash:
+            return "rewritten (head changed)"
+        f.seek(cp.offset - cp.last_line_length)
+        if _sha1(f.read(cp.last_line_length)) != cp.last_line_hash:
+            return "rewritten (last line changed)"
+        return ""
+
+    def _remove_unlisted(self, key: str, keep: list):
+        """Deletes parts of `key` not in the checkpoint (orphans, old generations)."""
+        source_dir = self.output_dir / key
+        if not source_dir.exists():
+            return
+        keep = {self.output_dir / part for part in keep}
+        for part in sorted(source_dir.rglob("*"), reverse=True):  # files before their dirs
+            if part.is_file() and part not in keep:
+                part.unlink()
+            elif part.is_dir() and not any(part.iterdir()):
+                part.rmdir()
+
+    def run(self, source, full_reload: bool = False) -> IngestResult:
+        """
+        Ingests what was appended to `source` since the last run.
+
+        Args:
+            source: CSV path (absolute, or relative to practice_datasets/)
+            full_reload: Ignore the checkpoint and rebuild from the whole file
+
+        Returns:
+            IngestResult(source, mode, reason, new_rows, late_rows, bytes_read, seconds)
+        """
+        start = time.perf_counter()
+        path = self._resolve(source)
+        key = self._key(path)
+        schema = schema_for(path)
+        time_column = TIME_COLUMNS.get(path.stem.removeprefix("synthetic_"))
+
+        checkpoints = self.load_checkpoints()
+        previous = checkpoints.get(key)
+        reason = "forced" if full_reload else ("no checkpoint" if previous is None else "")
+
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if not reason:
+                reason = self._check(f, size, previous)
+            if not reason and size == previous.offset:
+                self._remove_unlisted(key, previous.parts)
+                return IngestResult(str(source), "unchanged", "", 0, 0, 0, time.perf_counter() - start)
+
+            if reason:  # full reload
+                f.seek(0)
+                data = _split_complete(f.read())
+                header = data[:data.find(b"\n") + 1]
+                body, offset = data[len(header):], len(data)
+                cp = Checkpoint(generation=(previous.generation + 1) if previous else 0)
+            else:
+                f.seek(0)
+                header = f.readline()
+                f.seek(previous.offset)
+                body = _split_complete(f.read(size - previous.offset))
+                offset = previous.offset + len(body)
+                cp = Checkpoint(**asdict(previous))
+            bytes_read = len(header) + len(body)
+
+        if not body and not reason:  # only a half-written line was appended
+            return IngestResult(str(source), "unchanged", "", 0, 0, bytes_read, time.perf_counter() - start)
+
+        table = _parse(header, body, schema)
+        late_rows = 0
+        if time_column and table.num_rows:
+            times = table[time_column]
+            if cp.watermark is not None:
+                late_rows = pc.sum(pc.less(times, pa.scalar(cp.watermark).cast(times.type))).as_py() or 0
+            batch_max = pc.max(times).as_py()
+            if batch_max is not None:
+                batch_max = batch_max.isoformat(sep=" ")
+                cp.watermark = max(cp.watermark, batch_max) if cp.watermark else batch_max
+
+        # 1. Part file (invisible until the checkpoint lists it)
+        with open(path, "rb") as f:
+            head = f.read(min(HEAD_BYTES, offset))
+            tail_start = max(offset - HEAD_BYTES, 0)
+            f.seek(tail_start)
+            last_line = _last_line(f.read(offset - tail_start))
+        part = Path(key) / f"gen-{cp.generation:04d}" / f"part-{len(cp.parts) if not reason else 0:06d}.parquet"
+        (self.output_dir / part).parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.output_dir / part, lambda tmp: pq.write_table(table, tmp))
+
+        # 2. Checkpoint (commit point), then clean up what it no longer lists
+        cp.parts = ([] if reason else cp.parts) + [str(part)]
+        cp.offset, cp.rows = offset, (0 if reason else cp.rows) + table.num_rows
+        cp.head_hash, cp.last_line_hash, cp.last_line_length = _sha1(head), _sha1(last_line), len(last_line)
+        checkpoints[key] = cp
+        self._commit(checkpoints)
+        self._remove_unlisted(key, cp.parts)
+
+        mode = "full" if reason else "incremental"
+        return IngestResult(str(source), mode, reason, table.num_rows, late_rows, bytes_read,
+                            time.perf_counter() - start)
+
+    def load_table(self, source) -> pa.Table:
+        """The ingested table: the parts listed in the committed checkpoint."""
+        path = self._resolve(source)
+        cp = self.load_checkpoints().get(self._key(path))
+        if cp is None:
+            raise KeyError(f"{source} has not been ingested into {self.output_dir}")
+        return pa.concat_tables(pq.read_table(self.output_dir / part) for part in cp.parts)
+
+    def load_spark(self, spark, source):
+        """Reads the committed parts with Spark (never a half-written part)."""
+        path = self._resolve(source)
+        cp = self.load_checkpoints()[self._key(path)]
+        return spark.read.parquet(*[str(self.output_dir / part) for part in cp.parts])
+
+
+# =============================================================================
+# MAIN - SCENARIOS + RUN TIME VS HISTORY SIZE
+# =============================================================================
+
+def _scaled_copy(source: Path, target: Path, n_rows: int) -> bytes:
+    """Writes the header plus source rows repeated to n_rows; returns one row block."""
+    lines = source.read_bytes().splitlines(keepends=True)
+    header, rows = lines[0], lines[1:]
+    block = b"".join(rows)
+    with open(target, "wb") as f:
+        f.write(header)
+        for _ in range(n_rows // len(rows)):
+            f.write(block)
+    return block
+
+
+def _same_as_full_read(ingest: IncrementalIngest, path: Path) -> bool:
+    with open(path, "rb") as f:
+        data = _split_complete(f.read())
+    header = data[:data.find(b"\n") + 1]
+    expected = _parse(header, data[len(header):], schema_for(path))
+
+    def decoded(table):  # chunks may carry differently ordered dictionaries
+        return table.cast(pa.schema([
+            f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type) else f for f in table.schema
+        ]))
+    return decoded(ingest.load_table(path)).equals(decoded(expected))
+
+
+def scenarios(work_dir: Path):
+    """Appends, half-written lines, a crash before commit, truncation and rewrites."""
+    source = DATASETS_DIR / "csv" / "loan_applications" / "loans.csv"
+    lines = source.read_bytes().splitlines(keepends=True)
+    path = work_dir / "loans.csv"
+    ingest = IncrementalIngest(work_dir / "out")
+
+    def step(label, expect_mode, action=None):
+        if action:
+            action()
+        result = ingest.run(path)
+        ok = result.mode == expect_mode and _same_as_full_read(ingest, path)
+        print(f"{label:<40}{result.mode:<13}{result.reason:<32}{result.new_rows:>6}{result.late_rows:>6}"
+              f"{result.bytes_read:>10,}  {'✓ PASS' if ok else '✗ FAIL'}")
+
+    def append(data):
+        with open(path, "ab") as f:
+            f.write(data)
+
+    print(f"{'scenario':<40}{'mode':<13}{'reason':<32}{'rows':>6}{'late':>6}{'bytes':>10}")
+    print("-" * 115)
+    step("first run", "full", lambda: path.write_bytes(b"".join(lines[:300])))
+    step("no change", "unchanged")
+    step("append 100 rows", "incremental", lambda: append(b"".join(lines[300:400])))
+    step("append half a line", "unchanged", lambda: append(lines[400][:10]))
+    step("finish the line + 50 rows", "incremental", lambda: append(lines[400][10:] + b"".join(lines[401:451])))
+
+    def crash_before_commit():
+        # A part written by a run that died before replacing the checkpoint
+        cp = next(iter(ingest.load_checkpoints().values()))
+        orphan = ingest.output_dir / Path(cp.parts[-1]).with_name("part-999999.parquet")
+        pq.write_table(pq.read_table(ingest.output_dir / cp.parts[-1]), orphan)
+        append(b"".join(lines[451:500]))
+    step("orphan part from a crashed run", "incremental", crash_before_commit)
+    step("truncate to 200 rows", "full", lambda: path.write_bytes(b"".join(lines[:200])))
+    step("append 300 rows", "incremental", lambda: append(b"".join(lines[200:500])))
+
+    # Past HEAD_BYTES the head hash no longer covers the last line: only its own hash does
+    grown = lines[:1] + lines[1:] * 5
+    assert len(b"".join(grown[:-1])) > HEAD_BYTES
+    step("grow past HEAD_BYTES", "incremental", lambda: path.write_bytes(b"".join(grown)))
+    step("rewrite last line", "full", lambda: path.write_bytes(b"".join(grown[:-1]) + lines[250]))
+    step("truncate to 0 bytes", "full", lambda: path.write_bytes(b""))
+    step("half-written header", "full", lambda: append(lines[0][:10]))
+    step("header + 100 rows", "full", lambda: append(lines[0][10:] + b"".join(lines[1:101])))
+
+
+def benchmark(work_dir: Path, n_rows: int, appends: int = 3, append_rows: int = 1_000):
+    """Incremental run time stays flat while a full reload grows with history."""
+    source = DATASETS_DIR / "csv" / "loan_applications" / "credit_checks.csv"
+    path = work_dir / "credit_checks.csv"
+    block = _scaled_copy(source, path, n_rows)
+    rows = block.splitlines(keepends=True)
+    batch = b"".join(rows[i % len(rows)] for i in range(append_rows))
+    ingest = IncrementalIngest(work_dir / "bench_out")
+
+    first = ingest.run(path)
+    print(f"\n{'run':<28}{'history rows':>14}{'new rows':>10}{'MB read':>9}{'seconds':>9}")
+    print("-" * 70)
+    print(f"{'initial load':<28}{first.new_rows:>14,}{first.new_rows:>10,}{first.bytes_read / 1e6:>9.1f}"
+          f"{first.seconds:>9.3f}")
+    for i in range(appends):
+        with open(path, "ab") as f:
+            f.write(batch)
+        result = ingest.run(path)
+        history = ingest.load_checkpoints()[ingest._key(path)].rows
+        print(f"{f'append #{i + 1}':<28}{history:>14,}{result.new_rows:>10,}{result.bytes_read / 1e6:>9.1f}"
+              f"{result.seconds:>9.3f}")
+    full = ingest.run(path, full_reload=True)
+    print(f"{'full reload (for contrast)':<28}{full.new_rows:>14,}{full.new_rows:>10,}{full.bytes_read / 1e6:>9.1f}"
+          f"{full.seconds:>9.3f}")
+    print(f"ingested table matches a full read: {'✓ PASS' if _same_as_full_read(ingest, path) else '✗ FAIL'}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Incremental append-only CSV ingestion")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="History size for the benchmark")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scenarios(Path(tmp))
+        benchmark(Path(tmp), args.rows)
@@ -0,0 +1,306 @@
+"""
+Synthetic Loan Data Generator
+=============================
+Generates `loan_applications`, `credit_checks` and `loans` with the same
+columns as the synthetic_*.csv files, at any scale (1M, 100M, 1B rows).
+
+Properties:
+    - Reproducible: each (table, partition) has its own RNG seeded from
+      (seed, table, partition), so output is identical for any worker count.
+    - Parallel: partitions are generated and written by a process pool.
+    - Streaming: a worker holds one partition at a time and writes it straight
+      to `<out>/<table>/part-NNNNN.{csv,parquet}`; nothing is collected in the
+      parent, so memory is bounded by `rows_per_partition`.
+    - Consistent: check_time / funded_date fall within 14 / 30 days after
+      the referenced application's application_date.
+    - Stress knobs:
+        hot_keys / hot_fraction   a few application_ids receive a large share
+                                  of the credit checks (join / groupBy skew)
+        duplicate_rate            fraction of rows re-emitted verbatim (dedup)
+        null_rate                 fraction of non-key values set to null
+
+Usage:
+    python synthetic_generator.py --applications 1000000 --out /tmp/loans_1m
+    python synthetic_generator.py --applications 100000000 --format parquet \\
+        --hot-keys 10 --hot-fraction 0.05 --duplicate-rate 0.01 --out /data/loans_100m
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+
+FIRST_NAMES = ["Michael", "Heather", "Bryan", "Matthew", "Allison", "Noah", "Angie", "Daniel",
+               "Jennifer", "David", "Sarah", "James", "Maria", "Robert", "Linda", "Kevin"]
+LAST_NAMES = ["Stephens", "Sanders", "Charles", "May", "Hill", "Rhodes", "Henderson", "Wagner",
+              "Smith", "Johnson", "Garcia", "Brown", "Davis", "Lopez", "Wilson", "Clark"]
+CHANNELS = ["branch", "web", "mobile"]
+STATES = ["CA", "TX", "NY", "FL", "IL", "PA", "OH", "MI", "GA", "NC"]
+CHECK_RESULTS = ["approved", "denied"]
+TERMS = [12, 24, 36, 48, 60]
+
+APPLICATION_START = np.datetime64("2025-07-01")
+APPLICATION_DAYS = 215  # through 2026-01-31
+US_PER_DAY = 86_400_000_000
+
+TABLES = {"loan_applications": 0, "credit_checks": 1, "loans": 2}
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    """All knobs that influence the generated data."""
+    applications: int = 1_000_000
+    rows_per_partition: int = 1_000_000
+    checks_per_application: float = 1.2
+    loan_rate: float = 0.6
+    hot_keys: int = 0
+    hot_fraction: float = 0.0
+    duplicate_rate: float = 0.0
+    null_rate: float = 0.0
+    seed: int = 42
+    file_format: str = "csv"
+
+    @property
+    def partitions(self) -> int:
+        return -(-self.applications // self.rows_per_partition)
+
+
+# =============================================================================
+# COLUMN HELPERS
+# =============================================================================
+
+def _ids(prefix: str, numbers: np.ndarray) -> pa.Array:
+    """Vectorized f"{prefix}{n}" without a Python loop."""
+    return pc.binary_join_element_wise(prefix, pa.array(numbers).cast(pa.string()), "")
+
+
+def _choice(rng, values: list, size: int) -> pa.Array:
+    """Dictionary-style pick: random indices into a small list of strings."""
+    return pa.DictionaryArray.from_arrays(
+        pa.array(rng.integers(0, len(values), size), pa.int32()), pa.array(values)
+    ).cast(pa.string())
+
+
+def _names(rng, size: int) -> pa.Array:
+    first = _choice(rng, FIRST_NAMES, size)
+    last = _choice(rng, LAST_NAMES, size)
+    return pc.binary_join_element_wise(first, last, " ")
+
+
+def _partition_range(config: GeneratorConfig, partition: int) -> tuple:
+    start = partition * config.rows_per_partition
+    return start, min(start + config.rows_per_partition, config.applications)
+
+
+def _rng(config: GeneratorConfig, table: str, partition: int):
+    return np.random.default_rng([config.seed, TABLES[table], partition])
+
+
+# =============================================================================
+# TABLE GENERATORS (one partition each)
+# =============================================================================
+
+def generate_applications(config: GeneratorConfig, partition: int) -> pa.Table:
+    rng = _rng(config, "loan_applications", partition)
+    start, stop = _partition_range(config, partition)
+    n = stop - start
+    days = rng.integers(0, APPLICATION_DAYS, n)  # first draw: _application_dates() replays it
+    return pa.table({
+        "application_id": _ids("APP", np.arange(100000 + start, 100000 + stop)),
+        "application_date": pa.array(APPLICATION_START + days.astype("timedelta64[D]")),
+        "applicant_name": _names(rng, n),
+        "channel": _choice(rng, CHANNELS, n),
+        "state": _choice(rng, STATES, n),
+    })
+
+
+def _application_keys(config: GeneratorConfig, rng, start: int, stop: int, size: int) -> np.ndarray:
+    """
+    Application numbers (0-based) for child rows. Uniform within the
+    partition, except that `hot_fraction` of rows are redirected to the first
+    `hot_keys` applications of the whole dataset.
+    """
+    keys = rng.integers(start, stop, size)
+    if config.hot_keys and config.hot_fraction:
+        hot = rng.random(size) < config.hot_fraction
+        keys[hot] = rng.integers(0, min(config.hot_keys, config.applications), int(hot.sum()))
+    return keys
+
+
+def _application_dates(config: GeneratorConfig, numbers: np.ndarray) -> np.ndarray:
+    """
+    application_date of application `numbers`, by replaying the first draw of
+    each owning partition's RNG (only the days, not the whole table).
+    """
+    owners = numbers // config.rows_per_partition
+    days = np.empty(len(numbers), np.int64)
+    for partition in np.unique(owners):
+        start, stop = _partition_range(config, int(partition))
+        partition_days = _rng(config, "loan_applications", int(partition)).integers(0, APPLICATION_DAYS, stop - start)
+        rows = owners == partition
+        days[rows] = partition_days[numbers[rows] - start]
+    return APPLICATION_START + days.astype("timedelta64[D]")
+
+
+def _timestamps_after_application(rng, application_dates: np.ndarray, max_days: int) -> pa.Array:
+    """Microsecond timestamps within max_days after each row's application date."""
+    offset = rng.integers(0, max_days * US_PER_DAY, len(application_dates))
+    return pa.array(application_dates.astype("datetime64[us]") + offset.astype("timedelta64[us]"))
+
+
+def generate_credit_checks(config: GeneratorConfig, partition: int) -> pa.Table:
+    rng = _rng(config, "credit_checks", partition)
+    start, stop = _partition_range(config, partition)
+    per_partition = round(config.rows_per_partition * config.checks_per_application)
+    n = round((stop - start) * config.checks_per_application)
+    first_id = 200000 + partition * per_partition
+    keys = _application_keys(config, rng, start, stop, n)
+    return pa.table({
+        "credit_check_id": _ids("CC", np.arange(first_id, first_id + n)),
+        "application_id": _ids("APP", keys + 100000),
+        "check_time": _timestamps_after_application(rng, _application_dates(config, keys), max_days=14),
+        "result": _choice(rng, CHECK_RESULTS, n),
+        "score": pa.array(rng.integers(300, 851, n), pa.int32()),
+    })
+
+
+def generate_loans(config: GeneratorConfig, partition: int) -> pa.Table:
+    rng = _rng(config, "loans", partition)
+    start, stop = _partition_range(config, partition)
+    per_partition = round(config.rows_per_partition * config.loan_rate)
+    n = round((stop - start) * config.loan_rate)
+    first_id = 300000 + partition * per_partition
+    funded = np.sort(rng.choice(stop - start, size=n, replace=False)) + start
+    return pa.table({
+        "loan_id": _ids("LN", np.arange(first_id, first_id + n)),
+        "application_id": _ids("APP", funded + 100000),
+        "amount": pa.array(rng.integers(1000, 25001, n), pa.int64()),
+        "funded_date": _timestamps_after_application(rng, _application_dates(config, funded), max_days=30),
+        "term_months": pa.array(np.array(TERMS)[rng.integers(0, len(TERMS), n)], pa.int32()),
+    })
+
+
+GENERATORS = {
+    "loan_applications": generate_applications,
+    "credit_checks": generate_credit_checks,
+    "loans": generate_loans,
+}
+
+KEY_COLUMNS = {"application_id", "credit_check_id", "loan_id"}
+
+
+# =============================================================================
+# NOISE: DUPLICATES + NULLS
+# =============================================================================
+
+def add_noise(table: pa.Table, config: GeneratorConfig, rng) -> pa.Table:
+    """Nulls out non-key values and appends exact duplicate rows."""
+    if config.null_rate:
+        columns = []
+        for name, column in zip(table.column_names, table.columns):
+            if name not in KEY_COLUMNS:
+                mask = pa.array(rng.random(len(table)) < config.null_rate)
+                column = pc.if_else(mask, pa.scalar(None, column.type), column)
+            columns.append(column)
+        table = pa.table(columns, names=table.column_names)
+    if config.duplicate_rate:
+        n_dupes = int(len(table) * config.duplicate_rate)
+        if n_dupes:
+            dupes = table.take(pa.array(rng.integers(0, len(table), n_dupes)))
+            table = pa.concat_tables([table, dupes])
+    return table
+
+
+# =============================================================================
+# WRITING
+# =============================================================================
+
+def write_table(table: pa.Table, path: Path, file_format: str):
+    """
+    Writes one partition file atomically (temp file + rename). Generated values
+    never contain commas or quotes, so CSV is written unquoted like the samples.
+    """
+    tmp = path.with_name(f".{path.name}.tmp")
+    if file_format == "parquet":
+        pq.write_table(table, tmp)
+    else:
+        with open(tmp, "wb") as f:
+            f.write((",".join(table.column_names) + "\n").encode())
+            pv.write_csv(table, f, pv.WriteOptions(include_header=False, quoting_style="none"))
+    os.replace(tmp, path)
+
+
+def generate_partition(config: GeneratorConfig, table_name: str, partition: int, out_dir: str) -> int:
+    """Builds and writes one partition of one table; returns its row count."""
+    table = GENERATORS[table_name](config, partition)
+    noise_rng = np.random.default_rng([config.seed, TABLES[table_name], partition, 1])
+    table = add_noise(table, config, noise_rng)
+    target = Path(out_dir) / table_name / f"part-{partition:05d}.{config.file_format}"
+    write_table(table, target, config.file_format)
+    return len(table)
+
+
+def generate(config: GeneratorConfig, out_dir: str, max_workers: int = None) -> dict:
+    """
+    Generates every partition of every table in parallel.
+
+    Returns:
+        Row counts per table
+    """
+    for table_name in GENERATORS:
+        (Path(out_dir) / table_name).mkdir(parents=True, exist_ok=True)
+
+    counts = dict.fromkeys(GENERATORS, 0)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(generate_partition, config, table_name, p, out_dir): table_name
+            for table_name in GENERATORS
+            for p in range(config.partitions)
+        }
+        for future, table_name in futures.items():
+            counts[table_name] += future.result()
+    return counts
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Generate synthetic loan data at scale")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--applications", type=int, default=1_000_000)
+    parser.add_argument("--rows-per-partition", type=int, default=1_000_000)
+    parser.add_argument("--checks-per-application", type=float, default=1.2)
+    parser.add_argument("--loan-rate", type=float, default=0.6)
+    parser.add_argument("--hot-keys", type=int, default=0)
+    parser.add_argument("--hot-fraction", type=float, default=0.0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--null-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", dest="file_format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    config = GeneratorConfig(**{k: v for k, v in vars(args).items() if k not in ("out", "workers")})
+    start = time.perf_counter()
+    counts = generate(config, args.out, args.workers)
+    elapsed = time.perf_counter() - start
+
+    with open(Path(args.out) / "_config.json", "w") as f:
+        json.dump(asdict(config), f, indent=2)
+    total = sum(counts.values())
+    for table_name, count in counts.items():
+        print(f"{table_name:<20}{count:>15,} rows")
+    print(f"{'total':<20}{total:>15,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
@@ -0,0 +1,426 @@
+"""
+Cached Timestamp Parser
+=======================
+Parses the practice datasets' timestamp columns to `datetime64[us]` without
+per-row format inference:
+
+    credit_checks.csv              2025-10-05 16:57:00
+    synthetic_credit_checks.csv    2025-11-08 02:29:18.777888
+    events.json                    2024-01-09T14:22:00
+
+How it works:
+    1. Detect once per column: a sample of the values is matched against the
+       ISO-style layouts (space or "T" separator, optional fraction, optional
+       "Z" / "+HH:MM" suffix). A `TimestampParser` remembers the format per
+       column name, so later chunks of the same column skip detection.
+    2. Fixed-format vectorized parse: values are grouped by string length
+       (length fixes the layout: date only, seconds, or N fraction digits).
+       Each group's bytes are viewed as an (n, length) uint8 matrix straight
+       from the Arrow buffers, and every field is digit arithmetic on whole
+       columns; separators and ranges (month, day-in-month, ...) are
+       validated the same way. Days since the epoch use the days-from-civil
+       formula, so no per-row datetime object is created.
+    3. Memoization: when the sample shows many repeats (dates, minute-level
+       event times), the column is dictionary-encoded and only the distinct
+       strings are parsed, then gathered back by code.
+    4. Rows the fast path rejects (other layouts, stray whitespace, invalid
+       dates) optionally go through pandas' general parser; rows that still
+       fail become NaT and are counted in `failed`.
+
+Offsets ("+02:00", "Z") are converted to UTC; the result is naive UTC.
+Fractions beyond microseconds are truncated.
+
+Usage:
+    result = parse_timestamps(pa_column_or_series_or_list)
+    result.values      # numpy datetime64[us], NaT for nulls / failures
+    result.failed      # non-null rows that could not be parsed
+
+    parser = TimestampParser()
+    for batch in batches:
+        parser.parse(batch.column("check_time"), column="check_time")
+"""
+
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+SAMPLE_SIZE = 1_000
+DICTIONARY_RATIO = 0.5  # distinct / sampled below this -> parse distinct values only
+MAX_FRACTION_DIGITS = 9
+
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+# =============================================================================
+# FORMAT DETECTION
+# =============================================================================
+
+@dataclass(frozen=True)
+class TimestampFormat:
+    """An ISO-style layout family; the length of a value picks the exact layout."""
+    separator: str = " "   # between date and time
+    zone: str = ""         # "", "Z" or "offset" (+HH:MM / -HH:MM)
+
+    @property
+    def pattern(self) -> str:
+        zone = {"": "", "Z": "Z", "offset": "[+-]HH:MM"}[self.zone]
+        return f"YYYY-MM-DD{self.separator}HH:MM:SS[.f]{zone}"
+
+    @property
+    def zone_length(self) -> int:
+        return {"": 0, "Z": 1, "offset": 6}[self.zone]
+
+    def regex(self) -> str:
+        """Anchored RE2 pattern (run by Arrow, not per value in Python)."""
+        zone = {"": "", "Z": "Z", "offset": r"[+-]\d{2}:\d{2}"}[self.zone]
+        sep = re.escape(self.separator)
+        return rf"^\d{{4}}-\d{{2}}-\d{{2}}(?:{sep}\d{{2}}:\d{{2}}:\d{{2}}(?:\.\d{{1,9}})?{zone})?$"
+
+
+CANDIDATES = [TimestampFormat(sep, zone) for zone in ("", "Z", "offset") for sep in (" ", "T")]
+
+
+def _to_arrow(values) -> pa.Array:
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if not isinstance(values, pa.Array):
+        values = pa.array(values, type=pa.string(), from_pandas=True)
+    if pa.types.is_dictionary(values.type):
+        values = values.dictionary_decode()
+    if pa.types.is_large_string(values.type):
+        values = values.cast(pa.string())
+    if not pa.types.is_string(values.type):
+        raise TypeError(f"expected a string column, got {values.type}")
+    return values
+
+
+def _sample(values: pa.Array, size: int = SAMPLE_SIZE) -> pa.Array:
+    """Evenly spaced non-null values (not just the head, which may be sorted)."""
+    valid = values.drop_null()
+    if len(valid) > size:
+        valid = valid.take(np.linspace(0, len(valid) - 1, size).astype(np.int64))
+    return valid
+
+
+def detect_format(values) -> TimestampFormat:
+    """The candidate layout that fully matches the most sampled values."""
+    sample = _sample(_to_arrow(values))
+    scores = [pc.sum(pc.match_substring_regex(sample, fmt.regex())).as_py() or 0 for fmt in CANDIDATES]
+    # Date-only values match every candidate; ties keep the first (plain " ", no zone)
+    return CANDIDATES[int(np.argmax(scores))]
+
+
+# =============================================================================
+# VECTORIZED FIXED-LAYOUT PARSE
+# =============================================================================
+
+def _days_from_civil(year, month, day):
+    """Days since 1970-01-01 for proleptic Gregorian dates (vectorized)."""
+    y = year - (month <= 2)
+    era = np.floor_divide(y, 400)
+    yoe = y - era * 400
+    doy = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _field(matrix: np.ndarray, start: int, width: int) -> tuple:
+    """
+    Integer value of the digit run matrix[:, start:start + width], built one
+    byte column at a time in int32; ok is False where a byte is not 0-9.
+    """
+    value = np.zeros(len(matrix), dtype=np.int32)
+    ok = np.ones(len(matrix), dtype=bool)
+    for column in range(start, start + width):
+        digit = matrix[:, column] - np.uint8(48)  # bytes below "0" wrap around to >= 10
+        ok &= digit < 10
+        value = value * 10 + digit
+    return value, ok
+
+
+def _parse_layout(matrix: np.ndarray, fmt: TimestampFormat) -> tuple:
+    """
+    Parses an (n, length) byte matrix whose rows all have the same length.
+
+    Returns:
+        (int64 microseconds since the epoch, bool ok) per row
+    """
+    n, length = matrix.shape
+    year, ok = _field(matrix, 0, 4)
+    month, month_digits = _field(matrix, 5, 2)
+    day, day_digits = _field(matrix, 8, 2)
+    ok &= month_digits & day_digits & (matrix[:, 4] == ord("-")) & (matrix[:, 7] == ord("-"))
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_ok = (month >= 1) & (month <= 12)
+    dim = _DAYS_IN_MONTH[np.where(month_ok, month, 0)] + (leap & (month == 2))
+    ok &= month_ok & (day >= 1) & (day <= dim)
+    micros = _days_from_civil(year, month, day).astype(np.int64) * 86_400_000_000
+
+    if length == 10:  # date only
+        return micros, ok
+
+    zone = fmt.zone_length
+    hour, hour_ok = _field(matrix, 11, 2)
+    minute, minute_ok = _field(matrix, 14, 2)
+    second, second_ok = _field(matrix, 17, 2)
+    ok &= hour_ok & minute_ok & second_ok & (hour < 24) & (minute < 60) & (second < 60)
+    ok &= (matrix[:, 10] == ord(fmt.separator)) & (matrix[:, 13] == ord(":")) & (matrix[:, 16] == ord(":"))
+    micros += ((hour * 60 + minute) * 60 + second).astype(np.int64) * 1_000_000
+
+    fraction = length - 20 - zone  # digits after the "."
+    if fraction > 0:
+        kept = min(fraction, 6)  # beyond microseconds is truncated but still validated
+        value, fraction_ok = _field(matrix, 20, kept)
+        ok &= fraction_ok & (matrix[:, 19] == ord("."))
+        if fraction > kept:
+            ok &= _field(matrix, 20 + kept, fraction - kept)[1]
+        micros += value * 10 ** (6 - kept)
+
+    if fmt.zone == "Z":
+        ok &= matrix[:, length - 1] == ord("Z")
+    elif fmt.zone == "offset":
+        start = length - 6
+        offset_hours, hours_ok = _field(matrix, start + 1, 2)
+        offset_minutes, minutes_ok = _field(matrix, start + 4, 2)
+        sign = np.where(matrix[:, start] == ord("-"), -1, 1)
+        ok &= hours_ok & minutes_ok & (matrix[:, start + 3] == ord(":"))
+        ok &= (matrix[:, start] == ord("+")) | (matrix[:, start] == ord("-"))
+        micros -= (sign * (offset_hours * 60 + offset_minutes)).astype(np.int64) * 60_000_000  # local -> UTC
+    return micros, ok
+
+
+def _valid_lengths(fmt: TimestampFormat) -> set:
+    base = 19 + fmt.zone_length
+    return {10, base} | {base + 1 + digits for digits in range(1, MAX_FRACTION_DIGITS + 1)}
+
+
+def _parse_fixed(values: pa.Array, fmt: TimestampFormat) -> tuple:
+    """
+    Fast path over a string array. Rows are grouped by length and each group
+    is parsed as one byte matrix gathered from the Arrow data buffer.
+
+    Returns:
+        (int64 microseconds, bool ok) per row; nulls are not ok
+    """
+    n = len(values)
+    micros = np.zeros(n, dtype=np.int64)
+    ok = np.zeros(n, dtype=bool)
+    if not n:
+        return micros, ok
+
+    offsets = np.frombuffer(values.buffers()[1], dtype=np.int32)[values.offset:values.offset + n + 1]
+    data_buffer = values.buffers()[2]
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.empty(0, np.uint8)
+    lengths = np.diff(offsets)
+    valid = values.is_valid().to_numpy(zero_copy_only=False)
+
+    padded = np.concatenate([data, np.zeros(max(_valid_lengths(fmt)), np.uint8)])
+    present = np.flatnonzero(np.bincount(lengths[valid], minlength=1)).tolist()
+    for length in sorted(_valid_lengths(fmt) & set(present)):
+        rows = np.flatnonzero(valid & (lengths == length))
+        matrix = np.lib.stride_tricks.sliding_window_view(padded, length)[offsets[rows]]
+        micros[rows], ok[rows] = _parse_layout(matrix, fmt)
+    return micros, ok
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+@dataclass
+class ParseResult:
+    values: np.ndarray      # datetime64[us], NaT for nulls and failures
+    failed: int             # non-null rows that could not be parsed
+    format: TimestampFormat
+    fallback_rows: int = 0  # rows parsed by the general (slow) parser
+    distinct_only: bool = False
+
+    def to_arrow(self) -> pa.Array:
+        return pa.array(self.values, type=pa.timestamp("us"), from_pandas=True)
+
+
+def _fallback(strings: list) -> np.ndarray:
+    """pandas' general parser for the rows the fast path rejected."""
+    parsed = pd.to_datetime(pd.Series(strings, dtype=object), format="mixed", errors="coerce", utc=True)
+    return parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+
+
+def _parse_strings(values: pa.Array, fmt: TimestampFormat, fallback: bool) -> tuple:
+    micros, ok = _parse_fixed(values, fmt)
+    result = micros.view("datetime64[us]").copy()
+    result[~ok] = np.datetime64("NaT")
+    rejected = np.flatnonzero(~ok & values.is_valid().to_numpy(zero_copy_only=False))
+    fallback_rows = 0
+    if fallback and len(rejected):
+        parsed = _fallback(values.take(rejected).to_pylist())
+        result[rejected] = parsed
+        fallback_rows = int(np.count_nonzero(~np.isnat(parsed)))
+    failed = len(rejected) - fallback_rows
+    return result, failed, fallback_rows
+
+
+def _repeats_often(values: pa.Array) -> bool:
+    sample = _sample(values)
+    return len(sample) > 0 and len(pc.unique(sample)) < DICTIONARY_RATIO * len(sample)
+
+
+def parse_timestamps(values, fmt: TimestampFormat = None, fallback: bool = True,
+                     distinct_only: bool = None) -> ParseResult:
+    """
+    Parses a column of timestamp strings to datetime64[us].
+
+    Args:
+        values: pyarrow (Chunked)Array, pandas Series, NumPy array or list of str
+        fmt: Skip detection and use this format
+        fallback: Send rows the fast path rejects through pandas' general parser
+        distinct_only: Parse distinct strings once and gather back (default:
+            decided from the repeat rate of a sample)
+
+    Returns:
+        ParseResult(values, failed, format, fallback_rows, distinct_only)
+    """
+    arr = _to_arrow(values)
+    fmt = fmt or detect_format(arr)
+    distinct_only = _repeats_often(arr) if distinct_only is None else distinct_only
+
+    if not distinct_only:
+        parsed, failed, fallback_rows = _parse_strings(arr, fmt, fallback)
+        return ParseResult(parsed, failed, fmt, fallback_rows, False)
+
+    encoded = pc.dictionary_encode(arr)
+    uniques, _, fallback_rows = _parse_strings(encoded.dictionary, fmt, fallback)
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    parsed = np.full(len(arr), np.datetime64("NaT"), dtype="datetime64[us]")
+    has_code = encoded.indices.is_valid().to_numpy(zero_copy_only=False)
+    parsed[has_code] = uniques[codes[has_code].astype(np.int64)]
+    failed = int(np.count_nonzero(np.isnat(parsed) & has_code))
+    return ParseResult(parsed, failed, fmt, fallback_rows, True)
+
+
+class TimestampParser:
+    """Detects the format of each named column once and reuses it for later chunks."""
+
+    def __init__(self, fallback: bool = True):
+        self.fallback = fallback
+        self.formats = {}
+        self.failed = {}
+
+    def parse(self, values, column: str = None) -> ParseResult:
+        fmt = self.formats.get(column)
+        result = parse_timestamps(values, fmt=fmt, fallback=self.fallback)
+        if column is not None:
+            self.formats.setdefault(column, result.format)
+            self.failed[column] = self.failed.get(column, 0) + result.failed
+        return result
+
+
+# =============================================================================
+# BENCHMARK - against pandas inference on the practice timestamp columns
+# =============================================================================
+
+DATASETS_DIR = Path(__file__).resolve().parent
+
+
+def _practice_columns() -> dict:
+    """The raw timestamp strings of the practice files, read as text."""
+    import json
+
+    import pyarrow.csv as pv
+
+    def csv_column(name, column):
+        options = pv.ConvertOptions(column_types={column: pa.string()}, include_columns=[column])
+        return pv.read_csv(DATASETS_DIR / "csv" / "loan_applications" / name, convert_options=options)[column]
+
+    with open(DATASETS_DIR / "json" / "events.json", encoding="utf-8") as f:
+        events = [record["timestamp"] for record in json.load(f)]
+    return {
+        "credit_checks.check_time": csv_column("credit_checks.csv", "check_time"),
+        "synthetic_credit_checks.check_time": csv_column("synthetic_credit_checks.csv", "check_time"),
+        "synthetic_loans.funded_date": csv_column("synthetic_loans.csv", "funded_date"),
+        "loan_applications.application_date": csv_column("loan_applications.csv", "application_date"),
+        "events.timestamp": pa.array(events, pa.string()),
+    }
+
+
+def _synthetic_columns(n_rows: int, seed: int = 0) -> dict:
+    """
+    Non-repeating columns in the practice layouts: random instants over two
+    years, so every row is a distinct string (the worst case for memoization).
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01T00:00:00", "us").astype(np.int64)
+    instants = (start + rng.integers(0, 2 * 365 * 86_400_000_000, n_rows)).astype("datetime64[us]")
+
+    seconds = np.char.replace(np.datetime_as_string(instants, unit="s"), "T", " ")
+    micros = np.char.replace(np.datetime_as_string(instants, unit="us"), "T", " ")
+    micros = np.where(rng.random(n_rows) < 0.1, seconds, micros)  # some writers drop a zero fraction
+    return {
+        "synthetic seconds (credit_checks)": pa.array(seconds, pa.string()),
+        "synthetic micros, mixed (synthetic_*)": pa.array(micros, pa.string()),
+        "synthetic ISO T (events)": pa.array(np.datetime_as_string(instants, unit="s"), pa.string()),
+        "synthetic dates (loans)": pa.array(np.datetime_as_string(instants, unit="D"), pa.string()),
+    }
+
+
+def _best_of(func, repeat: int = 3) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(n_rows: int = 1_000_000):
+    """
+    Synthetic n_rows columns in each practice layout, handed over as a pandas
+    str Series (what read_csv gives a notebook); then the practice columns as
+    they are. Parity is checked against pd.to_datetime's inference.
+    """
+    columns = {**_synthetic_columns(n_rows), **_practice_columns()}
+
+    print(f"{'column':<40}{'rows':>10}  {'format':<30}{'to_datetime':>12}{'ISO8601':>10}{'parser':>9}"
+          f"{'vs ISO':>8}  parity")
+    print("-" * 131)
+    for name, column in columns.items():
+        series = pd.Series(_to_arrow(column).to_pylist(), dtype="str")
+        repeat = 1 if len(series) > 100_000 else 5
+
+        try:
+            inferred, _ = _best_of(lambda: pd.to_datetime(series), repeat)
+            inferred = f"{inferred:>11.3f}s"
+        except ValueError:  # format inferred from the first row rejects the rest
+            inferred = f"{'raises':>12}"
+        iso, expected = _best_of(lambda: pd.to_datetime(series, format="ISO8601"), repeat)
+        ours, result = _best_of(lambda: parse_timestamps(series), repeat)
+
+        expected = expected.to_numpy(dtype="datetime64[us]")
+        same = np.array_equal(result.values, expected, equal_nan=True) and result.failed == 0
+        label = result.format.pattern + (" (distinct)" if result.distinct_only else "")
+        print(f"{name:<40}{len(series):>10,}  {label:<30}{inferred}{iso:>9.3f}s{ours:>8.3f}s"
+              f"{iso / ours:>7.1f}x  {'✓ PASS' if same else '✗ FAIL'}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cached fixed-format timestamp parser")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    samples = ["2025-10-05 16:57:00", "2025-11-08 02:29:18.777888", "2024-01-09T14:22:00",
+               "2024-02-29", "2023-02-29 10:00:00", "not a date", None]
+    result = parse_timestamps(samples)
+    print(f"format: {result.format.pattern}  failed: {result.failed}  fallback rows: {result.fallback_rows}")
+    for text, value in zip(samples, result.values):
+        print(f"  {text!s:<30} -> {value}")
+    print()
+    benchmark(args.rows)
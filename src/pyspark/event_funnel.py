@@ -0,0 +1,363 @@
+"""
+Event Funnel & Sessionization Engine
+====================================
+Analyses the loan funnel in events.json:
+
+    application_submitted -> credit_check -> loan_approved
+
+Per customer (computed once from events sorted/grouped by customer):
+    - the time each stage was first reached, in order: stage k counts only if
+      it happens at or after the time stage k-1 was reached
+    - sessions: a new session starts after `session_gap` of inactivity
+
+Aggregated into a report:
+    - customers reaching each stage + conversion rates
+    - time-between-stage distributions (count, mean, p50, p90, max seconds)
+    - session counts, events per session, session duration
+
+Two backends produce the same report:
+    - pandas / NumPy (vectorized, no per-row Python)
+    - Spark (`*_spark` functions; pyspark is imported lazily)
+
+Incremental:
+    `FunnelState.append(new_events)` recomputes per-customer state only for
+    the customers present in the new events; everyone else's cached state is
+    reused and the report is re-aggregated from the per-customer tables.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+FUNNEL_STAGES = ["application_submitted", "credit_check", "loan_approved"]
+DEFAULT_SESSION_GAP = pd.Timedelta(minutes=30)
+HISTORY_BUCKETS = 16  # customer buckets of stored event history (Spark incremental path)
+QUANTILES = [0.5, 0.9]
+
+EVENTS_PATH = Path(__file__).resolve().parents[1] / "practice_datasets" / "json" / "events.json"
+
+
+# =============================================================================
+# PANDAS BACKEND - PER-CUSTOMER STATE
+# =============================================================================
+
+def prepare_events(events: pd.DataFrame) -> pd.DataFrame:
+    """Normalizes dtypes and sorts once by (customer_id, timestamp)."""
+    df = events[["customer_id", "event", "timestamp"]].copy()
+    df["event"] = df["event"].astype(str)
+    df["timestamp"] = pd.to_datetime(df["timestamp"]).astype("datetime64[us]")
+    return df.sort_values(["customer_id", "timestamp"], kind="stable", ignore_index=True)
+
+
+def customer_funnel(events: pd.DataFrame, stages=FUNNEL_STAGES) -> pd.DataFrame:
+    """
+    First in-order reach time of every stage, one row per customer.
+
+    Returns:
+        DataFrame indexed by customer_id with one datetime column per stage
+        (NaT when the stage was never reached in order)
+    """
+    customers = pd.Index(events["customer_id"].unique(), name="customer_id")
+    result = pd.DataFrame(index=customers)
+    previous = None
+    for stage in stages:
+        hits = events.loc[events["event"] == stage, ["customer_id", "timestamp"]]
+        if previous is not None:
+            hits = hits.merge(previous.dropna().rename("previous").reset_index(), on="customer_id")
+            hits = hits[hits["timestamp"] >= hits["previous"]]
+        reached = hits.groupby("customer_id")["timestamp"].min()
+        result[stage] = reached.reindex(customers)
+        previous = result[stage]
+    return result
+
+
+def customer_sessions(events: pd.DataFrame, session_gap=DEFAULT_SESSION_GAP) -> pd.DataFrame:
+    """
+    Sessionizes sorted events with a vectorized gap test.
+
+    Returns:
+        DataFrame indexed by customer_id: sessions, events, active_seconds
+    """
+    if events.empty:
+        empty = pd.Index([], name="customer_id", dtype=events["customer_id"].dtype)
+        return pd.DataFrame({"sessions": [], "events": [], "active_seconds": []}, index=empty)
+    customer = events["customer_id"].to_numpy()
+    ts = events["timestamp"].to_numpy()
+    new_customer = np.r_[True, customer[1:] != customer[:-1]]
+    new_session = new_customer | np.r_[True, (ts[1:] - ts[:-1]) > np.timedelta64(session_gap)]
+    session_id = np.cumsum(new_session)
+
+    sessions = pd.DataFrame({"customer_id": customer, "session_id": session_id, "timestamp": ts})
+    per_session = sessions.groupby("session_id").agg(
+        customer_id=("customer_id", "first"),
+        start=("timestamp", "min"),
+        end=("timestamp", "max"),
+        events=("timestamp", "size"),
+    )
+    per_session["seconds"] = (per_session["end"] - per_session["start"]).dt.total_seconds()
+    return per_session.groupby("customer_id").agg(
+        sessions=("events", "size"),
+        events=("events", "sum"),
+        active_seconds=("seconds", "sum"),
+    )
+
+
+# =============================================================================
+# REPORT (shared by both backends - input is per-customer state)
+# =============================================================================
+
+def _distribution(seconds: pd.Series) -> dict:
+    seconds = seconds.dropna()
+    if seconds.empty:
+        return {"count": 0, "mean_s": None, "p50_s": None, "p90_s": None, "max_s": None}
+    quantiles = seconds.quantile(QUANTILES)
+    return {
+        "count": int(seconds.size),
+        "mean_s": float(seconds.mean()),
+        "p50_s": float(quantiles.iloc[0]),
+        "p90_s": float(quantiles.iloc[1]),
+        "max_s": float(seconds.max()),
+    }
+
+
+def build_report(funnel: pd.DataFrame, sessions: pd.DataFrame, stages=FUNNEL_STAGES) -> dict:
+    """Aggregates per-customer funnel/session tables into the report dict."""
+    stage_rows = []
+    top = None
+    previous = None
+    for stage in stages:
+        reached = int(funnel[stage].notna().sum())
+        top = reached if top is None else top
+        stage_rows.append({
+            "stage": stage,
+            "customers": reached,
+            "conversion_from_previous": None if previous is None else (reached / previous if previous else 0.0),
+            "conversion_from_start": reached / top if top else 0.0,
+        })
+        previous = reached
+
+    between = []
+    for earlier, later in zip(stages, stages[1:]):
+        seconds = (funnel[later] - funnel[earlier]).dt.total_seconds()
+        between.append({"from": earlier, "to": later, **_distribution(seconds)})
+
+    total_sessions = int(sessions["sessions"].sum())
+    session_summary = {
+        "customers": int(len(sessions)),
+        "sessions": total_sessions,
+        "events_per_session": float(sessions["events"].sum() / total_sessions) if total_sessions else 0.0,
+        "mean_session_seconds": float(sessions["active_seconds"].sum() / total_sessions) if total_sessions else 0.0,
+    }
+    return {"stages": stage_rows, "time_between": between, "sessions": session_summary}
+
+
+def funnel_report(events: pd.DataFrame, stages=FUNNEL_STAGES, session_gap=DEFAULT_SESSION_GAP) -> dict:
+    """Full pandas report in one call."""
+    prepared = prepare_events(events)
+    return build_report(customer_funnel(prepared, stages), customer_sessions(prepared, session_gap), stages)
+
+
+# =============================================================================
+# INCREMENTAL STATE (pandas)
+# =============================================================================
+
+class FunnelState:
+    """
+    Per-customer funnel/session state that can be extended day by day.
+
+    Events, funnel rows and session rows are all kept per customer_id, so an
+    append touches only the customers in the new events: it costs
+    O(new events + those customers' history), not O(total history).
+    """
+
+    def __init__(self, stages=FUNNEL_STAGES, session_gap=DEFAULT_SESSION_GAP):
+        self.stages = list(stages)
+        self.session_gap = session_gap
+        self._events = {}    # customer_id -> that customer's events, sorted by timestamp
+        self._funnel = {}    # customer_id -> (reach time per stage)
+        self._sessions = {}  # customer_id -> (sessions, events, active_seconds)
+
+    def append(self, new_events: pd.DataFrame) -> pd.Index:
+        """
+        Adds new events and recomputes state for the customers they touch.
+
+        Returns:
+            Index of the customer_ids that were recomputed
+        """
+        touched = []
+        for customer, events in prepare_events(new_events).groupby("customer_id", sort=False):
+            previous = self._events.get(customer)
+            if previous is not None:
+                events = pd.concat([previous, events]).sort_values("timestamp", kind="stable")
+            self._events[customer] = events
+            touched.append(events)
+        if not touched:
+            return pd.Index([], name="customer_id")
+
+        touched_events = pd.concat(touched, ignore_index=True)
+        funnel = customer_funnel(touched_events, self.stages)
+        sessions = customer_sessions(touched_events, self.session_gap)
+        self._funnel.update(zip(funnel.index, funnel.itertuples(index=False, name=None)))
+        self._sessions.update(zip(sessions.index, sessions.itertuples(index=False, name=None)))
+        return funnel.index
+
+    @property
+    def funnel(self) -> pd.DataFrame:
+        """Same table as customer_funnel() over everything appended so far."""
+        index = pd.Index(list(self._funnel), name="customer_id")
+        table = pd.DataFrame(list(self._funnel.values()), index=index, columns=self.stages)
+        return table.astype("datetime64[us]").sort_index()
+
+    @property
+    def sessions(self) -> pd.DataFrame:
+        """Same table as customer_sessions() over everything appended so far."""
+        index = pd.Index(list(self._sessions), name="customer_id")
+        table = pd.DataFrame(list(self._sessions.values()), index=index,
+                             columns=["sessions", "events", "active_seconds"])
+        return table.astype({"sessions": "int64", "events": "int64", "active_seconds": "float64"}).sort_index()
+
+    def report(self) -> dict:
+        return build_report(self.funnel, self.sessions, self.stages)
+
+
+# =============================================================================
+# SPARK BACKEND
+# =============================================================================
+
+def customer_funnel_spark(events, stages=FUNNEL_STAGES):
+    """
+    Spark equivalent of customer_funnel(): one row per customer_id with a
+    timestamp column per stage.
+    """
+    from pyspark.sql import functions as F
+
+    result = events.select("customer_id").distinct()
+    previous = None
+    for stage in stages:
+        hits = events.where(F.col("event") == stage).select("customer_id", "timestamp")
+        if previous is not None:
+            hits = (
+                hits.join(result.select("customer_id", F.col(previous).alias("previous"))
+                      .where(F.col("previous").isNotNull()), "customer_id")
+                .where(F.col("timestamp") >= F.col("previous"))
+            )
+        reached = hits.groupBy("customer_id").agg(F.min("timestamp").alias(stage))
+        result = result.join(reached, "customer_id", "left")
+        previous = stage
+    return result
+
+
+def customer_sessions_spark(events, session_gap=DEFAULT_SESSION_GAP):
+    """Spark equivalent of customer_sessions() using a lag() window."""
+    from pyspark.sql import Window
+    from pyspark.sql import functions as F
+
+    gap_us = int(session_gap / pd.Timedelta(microseconds=1))
+    by_customer = Window.partitionBy("customer_id").orderBy("timestamp")
+    micros = F.unix_micros("timestamp")
+    flagged = events.select("customer_id", "timestamp").withColumn(
+        "new_session",
+        F.when(F.lag(micros).over(by_customer).isNull(), 1)
+        .when(micros - F.lag(micros).over(by_customer) > gap_us, 1)
+        .otherwise(0),
+    )
+    numbered = flagged.withColumn(
+        "session_id", F.sum("new_session").over(by_customer.rowsBetween(Window.unboundedPreceding, 0))
+    )
+    per_session = numbered.groupBy("customer_id", "session_id").agg(
+        F.count(F.lit(1)).alias("events"),
+        ((F.max(micros) - F.min(micros)) / 1e6).alias("seconds"),
+    )
+    return per_session.groupBy("customer_id").agg(
+        F.count(F.lit(1)).alias("sessions"),
+        F.sum("events").alias("events"),
+        F.sum("seconds").alias("active_seconds"),
+    )
+
+
+def funnel_report_spark(events, stages=FUNNEL_STAGES, session_gap=DEFAULT_SESSION_GAP) -> dict:
+    """
+    Spark report. Heavy lifting stays in Spark; only the per-customer tables
+    (one row per customer) are brought back to build the same report dict.
+    """
+    funnel = customer_funnel_spark(events, stages).toPandas().set_index("customer_id")
+    sessions = customer_sessions_spark(events, session_gap).toPandas().set_index("customer_id")
+    for stage in stages:
+        funnel[stage] = pd.to_datetime(funnel[stage]).astype("datetime64[us]")
+    return build_report(funnel, sessions, stages)
+
+
+def customer_bucket_spark(column: str = "customer_id", buckets: int = HISTORY_BUCKETS):
+    """Hash bucket of a customer, for partitioning event history by customer."""
+    from pyspark.sql import functions as F
+
+    return F.pmod(F.xxhash64(column), F.lit(buckets)).cast("int")
+
+
+def update_customer_state_spark(state, history, new_events, stages=FUNNEL_STAGES):
+    """
+    Incremental Spark update: recompute the funnel only for customers that
+    appear in `new_events` and keep everyone else's row from `state`.
+
+    Only the touched customers' rows of `history` are used, and history is
+    not extended here - storing new_events is the caller's job. Store it
+    partitioned by customer_bucket_spark() and pass just the touched buckets,
+    so each update reads O(touched customers' history) instead of all of it
+    (events_streaming.FunnelBatchWriter does this).
+
+    Returns:
+        The new state DataFrame
+    """
+    touched = new_events.select("customer_id").distinct()
+    events = history.join(touched, "customer_id", "left_semi").unionByName(new_events)
+    recomputed = customer_funnel_spark(events, stages)
+    kept = state.join(touched, "customer_id", "left_anti")
+    return kept.unionByName(recomputed)
+
+
+# =============================================================================
+# MAIN - PARITY + INCREMENTAL DEMO
+# =============================================================================
+
+def _load_events_pandas(path=EVENTS_PATH) -> pd.DataFrame:
+    return pd.read_json(path, orient="records", convert_dates=["timestamp"])
+
+
+def _print_report(report: dict):
+    print(f"{'stage':<24}{'customers':>10}{'from prev':>11}{'from start':>11}")
+    for row in report["stages"]:
+        prev = "" if row["conversion_from_previous"] is None else f"{row['conversion_from_previous']:.1%}"
+        print(f"{row['stage']:<24}{row['customers']:>10}{prev:>11}{row['conversion_from_start']:>11.1%}")
+    print()
+    for row in report["time_between"]:
+        if row["count"]:
+            print(f"{row['from']} -> {row['to']}: n={row['count']}, "
+                  f"p50={row['p50_s'] / 3600:.1f}h, p90={row['p90_s'] / 3600:.1f}h")
+    print(f"\nSessions: {report['sessions']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Loan funnel + sessionization over events.json")
+    parser.add_argument("--spark", action="store_true", help="also run the Spark backend and compare")
+    args = parser.parse_args()
+
+    events = _load_events_pandas()
+    report = funnel_report(events)
+    _print_report(report)
+
+    # Incremental: feed the events one day at a time
+    state = FunnelState()
+    for _, day in events.groupby(events["timestamp"].dt.date):
+        state.append(day)
+    print(f"\nIncremental == batch: {state.report() == report}")
+
+    if args.spark:
+        from spark_session import get_spark
+
+        spark = get_spark("event-funnel")
+        spark_report = funnel_report_spark(spark.createDataFrame(prepare_events(events)))
+        print(f"Spark == pandas: {spark_report == report}")
@@ -0,0 +1,388 @@
+"""
+Events Structured Streaming Job
+===============================
+Streaming counterpart of event_funnel.py: event files dropped into a landing
+directory are picked up by Spark's file source and processed in micro-batches.
+
+    landing/*.json  ->  [events stream]  ->  window_counts/    (Parquet)
+                                         ->  funnel_state/     (Parquet, versioned)
+
+Queries (one checkpoint directory each, so a restart resumes where it stopped):
+    - Windowed counts: events per (window, event type), with a watermark on
+      `timestamp`. A window is written once, after the watermark passes its
+      end, so the file sink stays append-only.
+    - Customer funnel: a foreachBatch sink (FunnelBatchWriter) that keeps the
+      running per-customer funnel as versioned Parquet and, per micro-batch,
+      recomputes only the customers the batch touched with
+      event_funnel.update_customer_state_spark, so the stage semantics match
+      the batch report. `latest_funnel()` reads the last committed version.
+
+Files are JSON arrays of {customer_id, event, timestamp} like events.json,
+read with a fixed schema (no inference pass, and a file with a new field
+cannot change the stream's schema). Writers must drop files atomically: write
+under a name starting with "." and rename - the file source skips hidden files.
+
+Metrics: every query's micro-batch progress (rows, latency, rows/s) is
+collected from `recentProgress` and printed as a table.
+
+Offline replay:
+    python events_streaming.py --replay --files 8
+        splits events.json into 8 time-ordered files and drops them into a
+        temp landing dir in two halves, stopping and restarting the queries
+        in between (state and windows resume from the checkpoints); the
+        output is then checked against the batch computation.
+
+Usage:
+    python events_streaming.py --landing /data/events/landing --output /data/events/stream
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import (
+    IntegerType,
+    StringType,
+    StructField,
+    StructType,
+    TimestampType,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from event_funnel import (  # noqa: E402
+    EVENTS_PATH,
+    FUNNEL_STAGES,
+    customer_bucket_spark,
+    customer_funnel,
+    update_customer_state_spark,
+)
+from spark_session import get_spark  # noqa: E402
+
+
+WINDOW = "1 hour"
+WATERMARK_DELAY = "2 hours"
+MAX_FILES_PER_TRIGGER = 1
+
+# Streaming output is compared with pandas: keep every timestamp in UTC
+STREAMING_CONF = {"spark.sql.session.timeZone": "UTC"}
+
+
+# =============================================================================
+# SCHEMAS
+# =============================================================================
+
+EVENTS_SCHEMA = StructType([
+    StructField("customer_id", IntegerType()),
+    StructField("event", StringType()),
+    StructField("timestamp", TimestampType()),
+])
+
+# Running funnel: first in-order time of each stage per customer
+FUNNEL_STATE_SCHEMA = StructType(
+    [StructField("customer_id", IntegerType())]
+    + [StructField(stage, TimestampType()) for stage in FUNNEL_STAGES]
+)
+
+
+# =============================================================================
+# SOURCE
+# =============================================================================
+
+def read_event_stream(spark: SparkSession, landing_dir: Path,
+                      max_files_per_trigger: int = MAX_FILES_PER_TRIGGER) -> DataFrame:
+    """Streams JSON-array event files from `landing_dir` with the fixed schema."""
+    return (
+        spark.readStream
+        .schema(EVENTS_SCHEMA)
+        .option("multiLine", "true")                     # files are JSON arrays, not JSON lines
+        .option("timestampFormat", "yyyy-MM-dd'T'HH:mm:ss[.SSSSSS]")
+        .option("maxFilesPerTrigger", max_files_per_trigger)
+        .json(str(landing_dir))
+        .where(F.col("customer_id").isNotNull() & F.col("timestamp").isNotNull())
+    )
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+def windowed_counts(events: DataFrame, window: str = WINDOW, delay: str = WATERMARK_DELAY) -> DataFrame:
+    """Events per (window, event type); windows are final once the watermark passes."""
+    return (
+        events
+        .withWatermark("timestamp", delay)
+        .groupBy(F.window("timestamp", window), "event")
+        .count()
+        .select(
+            F.col("window.start").alias("window_start"),
+            F.col("window.end").alias("window_end"),
+            "event",
+            "count",
+        )
+    )
+
+
+class FunnelBatchWriter:
+    """
+    foreachBatch sink that keeps the running per-customer funnel.
+
+    Layout under `output_dir`:
+        funnel_history/batch_id=N/customer_bucket=B/   events of micro-batch N
+        funnel_state/version=N/                        full funnel table after micro-batch N
+
+    Batch N reads state version < N and, of history batch_id < N, only the
+    customer buckets (event_funnel.customer_bucket_spark) the batch touches -
+    partition pruning keeps that read proportional to the touched customers,
+    not to all history. It recomputes only the customers in the batch
+    (event_funnel.update_customer_state_spark) and overwrites version N /
+    batch_id=N. A batch replayed after a crash
+    therefore rewrites the same files: the sink is idempotent, and the query
+    checkpoint decides which batches run.
+    """
+
+    def __init__(self, output_dir: Path, keep_versions: int = 2):
+        self.history_dir = Path(output_dir) / "funnel_history"
+        self.state_dir = Path(output_dir) / "funnel_state"
+        self.keep_versions = keep_versions
+
+    def versions(self) -> list:
+        """Committed state versions (Spark writes _SUCCESS last)."""
+        if not self.state_dir.exists():
+            return []
+        return sorted(int(d.name.removeprefix("version=")) for d in self.state_dir.glob("version=*")
+                      if (d / "_SUCCESS").exists())
+
+    def load_state(self, spark: SparkSession, before: int = None) -> DataFrame:
+        """The newest committed funnel table (older than version `before`, if given)."""
+        versions = [v for v in self.versions() if before is None or v < before]
+        if not versions:
+            return spark.createDataFrame([], FUNNEL_STATE_SCHEMA)
+        return spark.read.schema(FUNNEL_STATE_SCHEMA).parquet(str(self.state_dir / f"version={versions[-1]}"))
+
+    def _load_history(self, spark: SparkSession, before: int, buckets: list) -> DataFrame:
+        """History of micro-batches < `before`, restricted to customer `buckets`."""
+        if not self.history_dir.exists():
+            return spark.createDataFrame([], EVENTS_SCHEMA)
+        history = spark.read.parquet(str(self.history_dir))
+        return (
+            history.where((F.col("batch_id") < before) & F.col("customer_bucket").isin(buckets))
+            .select(*EVENTS_SCHEMA.fieldNames())
+        )
+
+    def __call__(self, batch: DataFrame, batch_id: int):
+        spark = batch.sparkSession
+        new_events = (
+            batch.select(*EVENTS_SCHEMA.fieldNames())
+            .withColumn("customer_bucket", customer_bucket_spark())
+            .persist()
+        )
+        buckets = [row.customer_bucket for row in new_events.select("customer_bucket").distinct().collect()]
+        if not buckets:
+            new_events.unpersist()
+            return
+        state = update_customer_state_spark(
+            self.load_state(spark, before=batch_id),
+            self._load_history(spark, batch_id, buckets),
+            new_events.select(*EVENTS_SCHEMA.fieldNames()),
+            FUNNEL_STAGES,
+        )
+        (
+            new_events.write.mode("overwrite")
+            .partitionBy("customer_bucket")
+            .parquet(str(self.history_dir / f"batch_id={batch_id}"))
+        )
+        state.write.mode("overwrite").parquet(str(self.state_dir / f"version={batch_id}"))
+        new_events.unpersist()
+
+        for old in self.versions()[:-self.keep_versions]:
+            shutil.rmtree(self.state_dir / f"version={old}", ignore_errors=True)
+
+
+def start_queries(spark: SparkSession, landing_dir: Path, output_dir: Path,
+                  available_now: bool = False, processing_time: str = "5 seconds",
+                  max_files_per_trigger: int = MAX_FILES_PER_TRIGGER) -> dict:
+    """
+    Starts both queries under `output_dir`, checkpoints in
+    `output_dir/_checkpoints/<query>`.
+
+    Args:
+        available_now: Process what is in the landing dir, then stop (replays
+            and scheduled runs); otherwise trigger every `processing_time`
+    """
+    events = read_event_stream(spark, landing_dir, max_files_per_trigger)
+    writers = {
+        "window_counts": (
+            windowed_counts(events).writeStream
+            .format("parquet")
+            .outputMode("append")
+            .option("path", str(output_dir / "window_counts"))
+        ),
+        "funnel": events.writeStream.foreachBatch(FunnelBatchWriter(output_dir)),
+    }
+    queries = {}
+    for name, writer in writers.items():
+        writer = writer.queryName(name).option("checkpointLocation", str(output_dir / "_checkpoints" / name))
+        writer = writer.trigger(availableNow=True) if available_now else writer.trigger(processingTime=processing_time)
+        queries[name] = writer.start()
+    return queries
+
+
+def latest_funnel(spark: SparkSession, output_dir: Path) -> DataFrame:
+    """The running funnel as of the last committed micro-batch."""
+    return FunnelBatchWriter(output_dir).load_state(spark)
+
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def batch_metrics(queries: dict) -> pd.DataFrame:
+    """Micro-batch progress of every query: rows, latency and throughput."""
+    rows = []
+    for name, query in queries.items():
+        for progress in query.recentProgress:
+            if progress.numInputRows == 0 and progress.batchId > 0:
+                continue  # idle trigger
+            rows.append({
+                "query": name,
+                "batch": progress.batchId,
+                "rows": progress.numInputRows,
+                "latency_ms": progress.durationMs.get("triggerExecution", 0),
+                "rows_per_s": progress.processedRowsPerSecond,
+                "watermark": progress.eventTime.get("watermark", ""),
+            })
+    return pd.DataFrame(rows)
+
+
+def print_metrics(metrics: pd.DataFrame):
+    print(f"{'query':<16}{'batch':>6}{'rows':>7}{'latency ms':>12}{'rows/s':>10}  watermark")
+    print("-" * 75)
+    for row in metrics.itertuples():
+        print(f"{row.query:<16}{row.batch:>6}{row.rows:>7}{row.latency_ms:>12,}{row.rows_per_s:>10.0f}  {row.watermark}")
+    for name, group in metrics.groupby("query", sort=False):
+        total_s = group["latency_ms"].sum() / 1000
+        print(f"{name}: {len(group)} batches, {group['rows'].sum():,} rows, "
+              f"median latency {group['latency_ms'].median():,.0f} ms, "
+              f"{group['rows'].sum() / total_s if total_s else 0:,.0f} rows/s overall")
+
+
+# =============================================================================
+# OFFLINE REPLAY
+# =============================================================================
+
+def split_events(events_path: Path = EVENTS_PATH, n_files: int = 16) -> list:
+    """events.json sorted by timestamp and cut into n_files consecutive slices."""
+    with open(events_path, encoding="utf-8") as f:
+        records = sorted(json.load(f), key=lambda r: r["timestamp"])
+    size = -(-len(records) // n_files)
+    return [records[i:i + size] for i in range(0, len(records), size)]
+
+
+def drop_file(landing_dir: Path, name: str, records: list):
+    """Writes a hidden temp file and renames it, so the stream never sees half a file."""
+    landing_dir.mkdir(parents=True, exist_ok=True)
+    tmp = landing_dir / f".{name}.tmp"
+    tmp.write_text(json.dumps(records), encoding="utf-8")
+    os.replace(tmp, landing_dir / name)
+
+
+def _expected(events: pd.DataFrame, watermark: pd.Timestamp) -> tuple:
+    """Batch answers: closed hourly window counts and the customer funnel."""
+    window_start = events["timestamp"].dt.floor(pd.Timedelta(WINDOW))
+    counts = events.groupby([window_start.rename("window_start"), "event"]).size().rename("count").reset_index()
+    counts = counts[counts["window_start"] + pd.Timedelta(WINDOW) <= watermark]
+    funnel = customer_funnel(events.sort_values(["customer_id", "timestamp"], kind="stable"), FUNNEL_STAGES)
+    return counts, funnel
+
+
+def check_replay(spark: SparkSession, output_dir: Path, events: pd.DataFrame, watermark: pd.Timestamp) -> dict:
+    """Compares the streamed Parquet output with the batch computation."""
+    expected_counts, expected_funnel = _expected(events, watermark)
+    streamed_counts = spark.read.parquet(str(output_dir / "window_counts")).toPandas()
+
+    def by_window(counts):
+        counts = counts.assign(window_start=counts["window_start"].astype("datetime64[us]"))
+        return counts.set_index(["window_start", "event"])["count"].sort_index()
+    streamed_counts, expected_counts = by_window(streamed_counts), by_window(expected_counts)
+    counts_ok = streamed_counts.index.equals(expected_counts.index) and (
+        streamed_counts.to_numpy() == expected_counts.to_numpy()).all()
+
+    streamed_funnel = latest_funnel(spark, output_dir).toPandas().set_index("customer_id").sort_index()
+    expected_funnel = expected_funnel.sort_index()
+    funnel_ok = streamed_funnel.index.equals(expected_funnel.index) and all(
+        streamed_funnel[stage].astype("datetime64[us]").equals(expected_funnel[stage].astype("datetime64[us]"))
+        for stage in FUNNEL_STAGES
+    )
+    return {
+        f"closed windows ({len(expected_counts)} rows)": counts_ok,
+        f"customer funnel ({len(expected_funnel)} customers)": funnel_ok,
+    }
+
+
+def replay(spark: SparkSession, work_dir: Path, n_files: int = 8) -> pd.DataFrame:
+    """
+    Drops the split events.json in two halves, running the queries to
+    completion (availableNow) after each; the second run restarts from the
+    checkpoints of the first.
+    """
+    landing, output = work_dir / "landing", work_dir / "output"
+    slices = split_events(n_files=n_files)
+    halves = [range(0, len(slices) // 2), range(len(slices) // 2, len(slices))]
+    metrics = []
+    watermark = None
+    for run, half in enumerate(halves, start=1):
+        for i in half:
+            drop_file(landing, f"events-{i:04d}.json", slices[i])
+        queries = start_queries(spark, landing, output, available_now=True)
+        for query in queries.values():
+            query.awaitTermination()
+        run_metrics = batch_metrics(queries)
+        run_metrics.insert(0, "run", run)
+        metrics.append(run_metrics)
+        watermark = queries["window_counts"].lastProgress["eventTime"].get("watermark", watermark)
+
+    events = pd.DataFrame([record for part in slices for record in part])
+    events["timestamp"] = pd.to_datetime(events["timestamp"]).astype("datetime64[us]")
+    metrics = pd.concat(metrics, ignore_index=True)
+    print_metrics(metrics)
+    print()
+    watermark = pd.Timestamp(watermark).tz_localize(None)
+    for check, ok in check_replay(spark, output, events, watermark).items():
+        print(f"{check:<40}{'✓ PASS' if ok else '✗ FAIL'}")
+    return metrics
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Structured Streaming over the events landing directory")
+    parser.add_argument("--landing", type=Path, help="directory event files are dropped into")
+    parser.add_argument("--output", type=Path, help="Parquet output + checkpoints")
+    parser.add_argument("--replay", action="store_true", help="replay events.json offline and check the output")
+    parser.add_argument("--files", type=int, default=8, help="files to split events.json into (--replay)")
+    parser.add_argument("--trigger", default="5 seconds", help="processing-time trigger interval")
+    args = parser.parse_args()
+
+    spark = get_spark("events-streaming", STREAMING_CONF)
+    if args.replay:
+        with tempfile.TemporaryDirectory() as tmp:
+            replay(spark, Path(tmp), args.files)
+    else:
+        if not (args.landing and args.output):
+            parser.error("--landing and --output are required unless --replay is given")
+        running = start_queries(spark, args.landing, args.output, processing_time=args.trigger)
+        try:
+            while all(query.isActive for query in running.values()):
+                time.sleep(30)
+                print_metrics(batch_metrics(running))
+        except KeyboardInterrupt:
+            for query in running.values():
+                query.stop()
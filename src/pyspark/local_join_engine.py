@@ -0,0 +1,603 @@
+"""
+Local Join Engine
+=================
+Joins the loan tables (`application_id` keys) in-process with Arrow + NumPy,
+for the small and medium jobs where starting a JVM costs more than the join:
+
+    applications ⋈ loans            inner / left
+    applications ▷ credit_checks    anti (applications never checked)
+
+How it works:
+    - Inputs (CSV / Parquet files or directories) are scanned in Arrow
+      batches; the loan CSVs get their dataset_cache schema, so no inference.
+    - Hash join: the build side (right, or the smaller side for inner joins)
+      is loaded once and dictionary-encoded; probe batches are looked up in
+      its distinct keys with `pc.index_in` (Arrow's C++ hash table). Matches
+      are expanded with np.repeat over per-key row ranges (many-to-many
+      works, e.g. several credit checks per application).
+    - Sort-merge join: one Arrow sort over both sides' keys gives each key a
+      dense integer rank; each probe key's match range is found with
+      np.searchsorted on the sorted build ranks. The output is key-ordered.
+    - Spill (grace hash join): when the build side does not fit the memory
+      budget, both sides are hash-partitioned by key into Arrow IPC files and
+      each partition pair is joined on its own.
+    - Join types: inner, left (unmatched left rows with nulls), anti (left
+      rows without a match). Clashing right columns get a "_right" suffix.
+
+Planner: `plan_join()` estimates the local run time (bytes / measured local
+throughput) and the Spark run time (session start-up, unless one is already
+running, + bytes / per-core throughput) and picks the cheaper engine.
+`join()` runs the plan; pyspark is only imported on the Spark path.
+
+Usage:
+    table = join_tables("csv/loan_applications/loan_applications.csv",
+                        "csv/loan_applications/loans.csv", on="application_id", how="left")
+    plan = plan_join(left, right)      # JoinPlan(engine="local", algorithm="hash", ...)
+"""
+
+import math
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "practice_datasets"))
+
+from dataset_cache import DATASETS_DIR, schema_for  # noqa: E402
+
+
+MB = 1024 * 1024
+GB = 1024 * MB
+DEFAULT_MEMORY_BUDGET = 512 * MB
+DEFAULT_BATCH_ROWS = 256 * 1024
+JOIN_TYPES = ("inner", "left", "anti")
+ALGORITHMS = ("hash", "sort_merge")
+
+# In-memory size of a side relative to its Arrow size while joining: the
+# table, the key index and the gathered output batch.
+MEMORY_OVERHEAD = 3
+
+# Planner cost model (seconds, bytes/second of Parquet input), from the
+# benchmark below on a 1-CPU container; override via plan_join(..., costs=...)
+DEFAULT_COSTS = {
+    "local_bytes_per_s": 20 * MB,        # scan + join, one core
+    "spark_startup_s": 20.0,             # JVM + session, cold
+    "spark_job_s": 1.5,                  # scheduling a job on a running session
+    "spark_bytes_per_s_per_core": 10 * MB,
+}
+
+
+# =============================================================================
+# INPUT
+# =============================================================================
+
+def _resolve(source) -> Path:
+    path = Path(source)
+    return path if path.is_absolute() or path.exists() else (DATASETS_DIR / path).resolve()
+
+
+def _files(source) -> list:
+    path = _resolve(source)
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*") if p.is_file() and not p.name.startswith((".", "_")))
+    return [path]
+
+
+def input_bytes(source) -> int:
+    return sum(p.stat().st_size for p in _files(source))
+
+
+def _dataset(source) -> ds.Dataset:
+    files = _files(source)
+    if not files:
+        raise ValueError(f"no input files under {source}")
+    if files[0].suffix == ".parquet":
+        return ds.dataset([str(p) for p in files], format="parquet")
+    if files[0].suffix != ".csv":
+        raise ValueError(f"unsupported input type: {files[0].suffix}")
+    schema = schema_for(files[0])
+    convert = pv.ConvertOptions()
+    if schema is not None:
+        # Dictionary columns are read as strings (same as dataset_cache)
+        convert = pv.ConvertOptions(column_types={
+            f.name: f.type.value_type if pa.types.is_dictionary(f.type) else f.type for f in schema
+        })
+    return ds.dataset([str(p) for p in files], format=ds.CsvFileFormat(convert_options=convert))
+
+
+def scan(source, columns=None, batch_rows: int = DEFAULT_BATCH_ROWS):
+    """Yields the source as Arrow record batches (`source` may also be a Table)."""
+    if isinstance(source, pa.Table):
+        yield from (source.select(columns) if columns else source).to_batches(max_chunksize=batch_rows)
+        return
+    yield from _dataset(source).to_batches(columns=columns, batch_size=batch_rows)
+
+
+def _read_all(source, columns=None) -> pa.Table:
+    if isinstance(source, pa.Table):
+        return source.select(columns) if columns else source
+    return _dataset(source).to_table(columns=columns)
+
+
+def _schema(source, columns=None) -> pa.Schema:
+    schema = source.schema if isinstance(source, pa.Table) else _dataset(source).schema
+    return pa.schema([schema.field(c) for c in columns]) if columns else schema
+
+
+def _estimated_bytes(source) -> int:
+    """In-memory Arrow size: exact for a Table; file size is close for CSV, low for Parquet."""
+    if isinstance(source, pa.Table):
+        return source.nbytes
+    size = input_bytes(source)
+    return size * 3 if _files(source)[0].suffix == ".parquet" else size
+
+
+# =============================================================================
+# IN-MEMORY JOIN KERNELS
+# =============================================================================
+
+def _combined(column) -> pa.Array:
+    return column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+
+
+class _HashBuild:
+    """
+    Build side: rows grouped by key code. The distinct keys (the dictionary)
+    are the value set every probe batch is looked up in with pc.index_in.
+    """
+
+    def __init__(self, table: pa.Table, key: str):
+        self.table = table
+        encoded = pc.dictionary_encode(_combined(table[key]))
+        self.dictionary = encoded.dictionary
+        codes = pc.fill_null(encoded.indices, -1).to_numpy().astype(np.int64)
+        valid = codes >= 0
+        self.order = np.flatnonzero(valid)[np.argsort(codes[valid], kind="stable")]
+        self.counts = np.bincount(codes[valid], minlength=len(self.dictionary))
+        self.starts = np.cumsum(self.counts) - self.counts
+
+    def match(self, probe_keys: pa.Array) -> tuple:
+        """(count, start) of the build rows (in self.order) matching each probe key."""
+        codes = pc.fill_null(pc.index_in(probe_keys, value_set=self.dictionary), -1).to_numpy()
+        found = codes >= 0
+        if not len(self.dictionary):  # empty build side (e.g. a spilled partition without build rows)
+            return np.zeros(len(codes), np.int64), np.zeros(len(codes), np.int64)
+        safe = np.where(found, codes, 0)
+        counts = np.where(found, self.counts[safe], 0)
+        starts = np.where(found, self.starts[safe], 0)
+        return counts, starts
+
+
+def _rebatch(batches, min_rows: int):
+    """Groups batches into tables of at least min_rows (the last may be smaller)."""
+    pending, rows = [], 0
+    for batch in batches:
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= min_rows:
+            yield pa.Table.from_batches(pending)
+            pending, rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending)
+
+
+def _expand(counts: np.ndarray, starts: np.ndarray, order: np.ndarray, how: str) -> tuple:
+    """
+    Probe row index and build row index (-1 = no match) of every output row.
+    Left joins emit one null-extended row for probe rows without matches.
+    """
+    out_counts = np.maximum(counts, 1) if how == "left" else counts
+    probe_rows = np.repeat(np.arange(len(counts)), out_counts)
+    offsets = np.arange(len(probe_rows)) - np.repeat(np.cumsum(out_counts) - out_counts, out_counts)
+    positions = np.repeat(starts, out_counts) + offsets
+    matched = np.repeat(counts > 0, out_counts)
+    build_rows = np.where(matched, order[np.where(matched, positions, 0)] if len(order) else 0, -1)
+    return probe_rows, build_rows
+
+
+def _assemble(probe: pa.Table, build: pa.Table, probe_rows, build_rows, key: str,
+              probe_is_left: bool) -> pa.Table:
+    """Gathers output columns: left columns, then right columns without the key."""
+    probe_part = probe.take(pa.array(probe_rows, pa.int64()))
+    build_indices = pa.array(build_rows, pa.int64(), mask=build_rows < 0)
+    build_part = build.drop_columns([key]).take(build_indices)
+    left, right = (probe_part, build_part) if probe_is_left else (build.take(build_indices), probe_part.drop_columns([key]))
+    names = list(left.column_names)
+    columns = list(left.columns)
+    for name, column in zip(right.column_names, right.columns):
+        names.append(f"{name}_right" if name in names else name)
+        columns.append(column)
+    return pa.table(columns, names=names)
+
+
+def hash_join_batches(probe_batches, build: pa.Table, key: str, how: str, probe_is_left: bool = True,
+                      batch_rows: int = DEFAULT_BATCH_ROWS):
+    """
+    Streams the probe side through a hash table on `build`. index_in hashes
+    the value set on every call, so probe batches are grown to a few times
+    the number of distinct build keys to amortize it.
+    """
+    table = _HashBuild(build, key)
+    for probe in _rebatch(probe_batches, max(batch_rows, 4 * len(table.dictionary))):
+        counts, starts = table.match(_combined(probe[key]))
+        if how == "anti":
+            yield probe.filter(pa.array(counts == 0))
+            continue
+        probe_rows, build_rows = _expand(counts, starts, table.order, how)
+        yield _assemble(probe, build, probe_rows, build_rows, key, probe_is_left)
+
+
+def sort_merge_join(probe: pa.Table, build: pa.Table, key: str, how: str, probe_is_left: bool = True) -> pa.Table:
+    """
+    Sort-merge on dense ranks: one Arrow sort over both sides' keys turns
+    every key into an integer with the same order, then each probe key's
+    run in the sorted build side is found with searchsorted. Output is
+    key-ordered; null keys never match.
+    """
+    probe_keys, build_keys = _combined(probe[key]), _combined(build[key])
+    ranks = pc.rank(pa.concat_arrays([build_keys, probe_keys]), sort_keys="ascending", tiebreaker="dense").to_numpy().astype(np.int64)
+    build_rank, probe_rank = ranks[:len(build_keys)], ranks[len(build_keys):]
+    build_rank = np.where(pc.is_valid(build_keys).to_numpy(zero_copy_only=False), build_rank, -1)
+
+    build_order = np.argsort(build_rank, kind="stable")
+    probe_order = np.argsort(probe_rank, kind="stable")
+    sorted_build = build_rank[build_order]
+    sorted_probe = probe_rank[probe_order]
+    lo = np.searchsorted(sorted_build, sorted_probe, "left")
+    counts = np.searchsorted(sorted_build, sorted_probe, "right") - lo
+    counts[~pc.is_valid(probe_keys).to_numpy(zero_copy_only=False)[probe_order]] = 0
+
+    probe = probe.take(pa.array(probe_order))
+    if how == "anti":
+        return probe.filter(pa.array(counts == 0))
+    probe_rows, build_rows = _expand(counts, lo, build_order, how)
+    return _assemble(probe, build, probe_rows, build_rows, key, probe_is_left)
+
+
+def _join_in_memory(probe_batches, build: pa.Table, key: str, how: str, algorithm: str, probe_is_left: bool,
+                    batch_rows: int = DEFAULT_BATCH_ROWS):
+    if algorithm == "hash":
+        yield from hash_join_batches(probe_batches, build, key, how, probe_is_left, batch_rows)
+    else:
+        batches = list(probe_batches)
+        if batches:
+            yield sort_merge_join(pa.Table.from_batches(batches) if isinstance(batches[0], pa.RecordBatch)
+                                  else pa.concat_tables(batches), build, key, how, probe_is_left)
+
+
+def _empty_join(probe, build, build_columns, key: str, how: str, probe_is_left: bool) -> pa.Table:
+    """A zero-row result with the join's output schema."""
+    return sort_merge_join(_schema(probe).empty_table(), _schema(build, build_columns).empty_table(),
+                           key, how, probe_is_left)
+
+
+# =============================================================================
+# SPILLING (GRACE HASH JOIN)
+# =============================================================================
+
+def _partition_of(batch, key: str, partitions: int) -> np.ndarray:
+    # Hashed as strings: to_numpy() turns an int column into float64 only in
+    # batches holding a null, and 9.0 / 9 hash to different partitions
+    keys = pc.cast(_combined(batch.column(key)), pa.string()).to_numpy(zero_copy_only=False)
+    hashes = pd.util.hash_array(keys, hash_key="localjoin0000000")
+    return (hashes % np.uint64(partitions)).astype(np.int64)
+
+
+def _spill(batches, key: str, partitions: int, directory: Path, prefix: str) -> list:
+    """Hash-partitions batches into one Arrow IPC stream per partition."""
+    writers = {}
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        part = _partition_of(batch, key, partitions)
+        order = np.argsort(part, kind="stable")
+        bounds = np.searchsorted(part[order], np.arange(partitions + 1))
+        ordered = batch.take(pa.array(order))
+        for p in np.flatnonzero(np.diff(bounds)):
+            writer = writers.get(p)
+            if writer is None:
+                writer = writers[p] = pa.ipc.new_stream(str(directory / f"{prefix}-{p:05d}.arrow"), batch.schema)
+            writer.write_batch(ordered.slice(bounds[p], bounds[p + 1] - bounds[p]))
+    for writer in writers.values():
+        writer.close()
+    return [directory / f"{prefix}-{p:05d}.arrow" if p in writers else None for p in range(partitions)]
+
+
+def _read_spill(path, schema: pa.Schema) -> pa.Table:
+    if path is None:
+        return schema.empty_table()
+    with pa.ipc.open_stream(str(path)) as reader:
+        return reader.read_all()
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+@dataclass
+class JoinStats:
+    algorithm: str = ""
+    spilled: bool = False
+    partitions: int = 1
+    output_rows: int = 0
+    seconds: float = 0.0
+
+
+class LocalJoinEngine:
+    """
+    Hash / sort-merge joins over chunked inputs within a memory budget.
+    """
+
+    def __init__(self, memory_budget: int = DEFAULT_MEMORY_BUDGET, spill_dir: str = None,
+                 batch_rows: int = DEFAULT_BATCH_ROWS):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.batch_rows = batch_rows
+
+    def join(self, left, right, on: str = "application_id", how: str = "inner",
+             algorithm: str = "hash", stats: JoinStats = None):
+        """
+        Yields the joined rows as Arrow tables.
+
+        Args:
+            left, right: CSV / Parquet file or directory, or a pyarrow Table
+            on: Join key present on both sides
+            how: "inner", "left" or "anti" (left rows without a match)
+            algorithm: "hash" or "sort_merge"
+            stats: Optional JoinStats filled in as the iterator is consumed
+        """
+        if how not in JOIN_TYPES:
+            raise ValueError(f"how must be one of {JOIN_TYPES}, got {how!r}")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {ALGORITHMS}, got {algorithm!r}")
+        stats = stats if stats is not None else JoinStats()
+        stats.algorithm = algorithm
+        start = time.perf_counter()
+
+        # Left/anti joins must probe with the left side; inner builds on the smaller side
+        probe, build, probe_is_left = left, right, True
+        if how == "inner" and _estimated_bytes(left) < _estimated_bytes(right):
+            probe, build, probe_is_left = right, left, False
+        build_columns = [on] if how == "anti" else None
+
+        needed = MEMORY_OVERHEAD * _estimated_bytes(build)
+        if algorithm == "sort_merge":
+            needed += MEMORY_OVERHEAD * _estimated_bytes(probe)
+        if needed <= self.memory_budget:
+            results = _join_in_memory(scan(probe, batch_rows=self.batch_rows), _read_all(build, build_columns),
+                                      on, how, algorithm, probe_is_left, self.batch_rows)
+            for table in results:
+                stats.output_rows += table.num_rows
+                yield table
+            if not stats.output_rows:
+                yield _empty_join(probe, build, build_columns, on, how, probe_is_left)
+            stats.seconds = time.perf_counter() - start
+            return
+
+        partitions = max(2, math.ceil(needed / self.memory_budget))
+        stats.spilled, stats.partitions = True, partitions
+        with tempfile.TemporaryDirectory(prefix="localjoin-", dir=self.spill_dir) as tmp:
+            tmp = Path(tmp)
+            build_schema, probe_schema = _schema(build, build_columns), _schema(probe)
+            build_parts = _spill(scan(build, build_columns, self.batch_rows), on, partitions, tmp, "build")
+            probe_parts = _spill(scan(probe, None, self.batch_rows), on, partitions, tmp, "probe")
+            for probe_path, build_path in zip(probe_parts, build_parts):
+                if probe_path is None or (build_path is None and how == "inner"):
+                    continue
+                probe_table = _read_spill(probe_path, probe_schema)
+                results = _join_in_memory(probe_table.to_batches(max_chunksize=self.batch_rows),
+                                          _read_spill(build_path, build_schema), on, how, algorithm, probe_is_left,
+                                          self.batch_rows)
+                for table in results:
+                    stats.output_rows += table.num_rows
+                    yield table
+        if not stats.output_rows:  # every partition skipped or empty: still yield the output schema
+            yield _empty_join(probe, build, build_columns, on, how, probe_is_left)
+        stats.seconds = time.perf_counter() - start
+
+
+def join_tables(left, right, on: str = "application_id", how: str = "inner", algorithm: str = "hash",
+                memory_budget: int = DEFAULT_MEMORY_BUDGET) -> pa.Table:
+    """The whole local join result as one Arrow table."""
+    tables = list(LocalJoinEngine(memory_budget).join(left, right, on, how, algorithm))
+    return pa.concat_tables(tables) if tables else pa.table({})
+
+
+# =============================================================================
+# PLANNER
+# =============================================================================
+
+@dataclass
+class JoinPlan:
+    engine: str               # "local" or "spark"
+    algorithm: str            # local algorithm ("hash" / "sort_merge")
+    spill: bool
+    input_bytes: int
+    local_seconds: float      # estimates from the cost model
+    spark_seconds: float
+    reason: str
+
+
+def _spark_running() -> bool:
+    if "pyspark" not in sys.modules:
+        return False
+    from pyspark.sql import SparkSession
+
+    return SparkSession.getActiveSession() is not None
+
+
+def plan_join(left, right, how: str = "inner", memory_budget: int = DEFAULT_MEMORY_BUDGET,
+              cpus: int = None, costs: dict = None) -> JoinPlan:
+    """
+    Picks the engine with the lower estimated run time:
+
+        local = bytes / local_bytes_per_s           (spill adds one write + read)
+        spark = startup (0 if a session is running) + job + bytes / (cores * per-core rate)
+    """
+    costs = {**DEFAULT_COSTS, **(costs or {})}
+    if cpus is None:
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    total = (left.nbytes if isinstance(left, pa.Table) else input_bytes(left)) + \
+            (right.nbytes if isinstance(right, pa.Table) else input_bytes(right))
+    build = _estimated_bytes(right if how != "inner" else min(left, right, key=_estimated_bytes))
+    spill = MEMORY_OVERHEAD * build > memory_budget
+
+    local = total / costs["local_bytes_per_s"] * (2 if spill else 1)
+    startup = 0.0 if _spark_running() else costs["spark_startup_s"]
+    spark = startup + costs["spark_job_s"] + total / (costs["spark_bytes_per_s_per_core"] * cpus)
+    engine = "local" if local <= spark else "spark"
+    reason = (f"{total / MB:,.1f} MB input: local ~{local:.1f}s vs Spark ~{spark:.1f}s "
+              f"({'session running' if not startup else f'{startup:.0f}s start-up'}, {cpus} cores)")
+    return JoinPlan(engine, "hash", spill, total, local, spark, reason)
+
+
+def _spark_frame(spark, source):
+    if isinstance(source, pa.Table):
+        return spark.createDataFrame(source.to_pandas())
+    files = [str(p) for p in _files(source)]
+    if files[0].endswith(".parquet"):
+        return spark.read.parquet(*files)
+    return spark.read.option("header", "true").option("inferSchema", "false").csv(files)
+
+
+def join_spark(spark, left, right, on: str = "application_id", how: str = "inner"):
+    """Same join as a Spark DataFrame (anti -> left_anti)."""
+    return _spark_frame(spark, left).join(_spark_frame(spark, right), on, {"anti": "left_anti"}.get(how, how))
+
+
+def join(left, right, on: str = "application_id", how: str = "inner", engine: str = "auto",
+         memory_budget: int = DEFAULT_MEMORY_BUDGET):
+    """
+    Runs the join on the engine `plan_join()` picks (or the one given).
+
+    Returns:
+        (result, plan): a pyarrow Table for the local engine, a Spark
+        DataFrame for Spark
+    """
+    plan = plan_join(left, right, how, memory_budget)
+    if engine != "auto":
+        plan.engine = engine
+    if plan.engine == "local":
+        return join_tables(left, right, on, how, plan.algorithm, memory_budget), plan
+    from spark_session import get_spark
+
+    return join_spark(get_spark("local-join-planner"), left, right, on, how), plan
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def make_loan_tables(directory: Path, rows: int, seed: int = 0, chunk_rows: int = 2_000_000) -> tuple:
+    """
+    Writes `rows` applications and ~0.6 * rows loans (a few application_ids
+    that do not exist, like an upstream lag) as Parquet, in chunks.
+    """
+    rng = np.random.default_rng(seed)
+    apps_dir, loans_dir = directory / f"applications_{rows}", directory / f"loans_{rows}"
+    apps_dir.mkdir(parents=True, exist_ok=True)
+    loans_dir.mkdir(parents=True, exist_ok=True)
+    states = np.array(["CA", "NY", "TX", "FL", "WA", "IL"])
+    for part, start in enumerate(range(0, rows, chunk_rows)):
+        ids = np.arange(start, min(start + chunk_rows, rows))
+        pq.write_table(pa.table({
+            "application_id": pa.array(np.char.add("APP", ids.astype("U10"))),
+            "state": pa.array(states[rng.integers(0, len(states), len(ids))]),
+            "requested": pa.array(rng.integers(1_000, 50_000, len(ids))),
+        }), apps_dir / f"part-{part:05d}.parquet")
+        funded = ids[rng.random(len(ids)) < 0.6]
+        funded = np.where(rng.random(len(funded)) < 0.01, funded + rows, funded)  # orphan loans
+        pq.write_table(pa.table({
+            "loan_id": pa.array(np.char.add("LN", funded.astype("U10"))),
+            "application_id": pa.array(np.char.add("APP", funded.astype("U10"))),
+            "amount": pa.array(rng.integers(1_000, 50_000, len(funded))),
+        }), loans_dir / f"part-{part:05d}.parquet")
+    return apps_dir, loans_dir
+
+
+def _timed(func) -> tuple:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def benchmark(sizes, memory_budget: int = DEFAULT_MEMORY_BUDGET, spark_max_rows: int = 1_000_000,
+              pandas_max_rows: int = 10_000_000):
+    """
+    Row counts of the local engine vs pandas merge vs Spark for each join
+    type; Spark time includes session start-up on its first use.
+    """
+    spark = None
+    print(f"{'rows':>11} {'join':<6}{'plan':<7}{'hash':>9}{'sort-merge':>12}{'spill':>7}{'pandas':>9}{'spark':>9}"
+          f"{'out rows':>13}  parity")
+    print("-" * 96)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            apps, loans = make_loan_tables(Path(tmp), rows)
+            for how in JOIN_TYPES:
+                plan = plan_join(apps, loans, how, memory_budget)
+                hash_stats, merge_stats = JoinStats(), JoinStats()
+                engine = LocalJoinEngine(memory_budget)
+                hash_s, hashed = _timed(lambda: sum(t.num_rows for t in engine.join(apps, loans, how=how,
+                                                                                    stats=hash_stats)))
+                merge_s, merged = _timed(lambda: sum(t.num_rows for t in engine.join(
+                    apps, loans, how=how, algorithm="sort_merge", stats=merge_stats)))
+
+                pandas_s, expected = None, None
+                if rows <= pandas_max_rows:
+                    left, right = ds.dataset(apps).to_table().to_pandas(), ds.dataset(loans).to_table().to_pandas()
+                    pandas_how = "left" if how == "anti" else how
+
+                    def pandas_join():
+                        merged = left.merge(right, on="application_id", how=pandas_how, indicator=how == "anti")
+                        return len(merged[merged["_merge"] == "left_only"]) if how == "anti" else len(merged)
+                    pandas_s, expected = _timed(pandas_join)
+
+                spark_s = None
+                if rows <= spark_max_rows:
+                    started = time.perf_counter()
+                    if spark is None:
+                        from spark_session import get_spark
+
+                        spark = get_spark("local-join-benchmark")
+                    count = join_spark(spark, apps, loans, how=how).count()
+                    spark_s = time.perf_counter() - started
+                    expected = count if expected is None else expected
+
+                ok = expected is None or hashed == merged == expected
+                fmt = lambda s: f"{s:>8.2f}s" if s is not None else f"{'-':>9}"  # noqa: E731
+                print(f"{rows:>11,} {how:<6}{plan.engine:<7}{hash_s:>8.2f}s{merge_s:>11.2f}s"
+                      f"{'yes' if hash_stats.spilled else 'no':>7}{fmt(pandas_s)}{fmt(spark_s)}{hashed:>13,}  "
+                      f"{'✓ PASS' if ok else '✗ FAIL'}")
+            for directory in (apps, loans):
+                for f in directory.iterdir():
+                    f.unlink()
+                directory.rmdir()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local hash / sort-merge join engine + Spark planner")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 1_000_000, 50_000_000])
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_BUDGET // MB)
+    parser.add_argument("--spark-max-rows", type=int, default=1_000_000, help="largest size also run on Spark")
+    args = parser.parse_args()
+
+    practice = DATASETS_DIR / "csv" / "loan_applications"
+    apps, loans = practice / "loan_applications.csv", practice / "loans.csv"
+    print(f"plan for the practice CSVs: {plan_join(apps, loans)}\n")
+    for how in JOIN_TYPES:
+        print(f"{how:<6}{join_tables(apps, loans, how=how).num_rows:>6} rows")
+    print()
+    benchmark(args.sizes, args.memory_mb * MB, args.spark_max_rows)
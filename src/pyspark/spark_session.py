@@ -0,0 +1,532 @@
+"""
+Spark Session Utilities
+=======================
+One tuned SparkSession per process, sized to the container it runs in.
+
+The dev container (docker-compose.yml) is capped at 2 CPUs / 4 GB with
+SPARK_DRIVER_MEMORY=2g. Spark's defaults assume a cluster: 200 shuffle
+partitions, a 10 MB broadcast threshold, no Arrow, no AQE. On the practice
+loan joins that means thousands of tiny tasks and driver OOMs. `get_spark()`
+reads the real limits from cgroups and sizes the session to fit.
+
+Connect mode (SPARK_SESSION_MODE=connect): instead of a JVM per notebook
+kernel / pytest worker, every process attaches as a thin Spark Connect
+client to one long-lived server in the container:
+
+    - The first get_spark() starts the server (under a file lock, so N
+      concurrent test workers start exactly one) and waits for its health
+      check: the gRPC endpoint accepting connections.
+    - The server is run by a small supervisor process that sizes it with
+      spark_conf() and shuts it down after SPARK_CONNECT_IDLE_TIMEOUT
+      seconds (default 30 min) without any client connection.
+    - extra_conf is applied to the client's session; server-wide settings
+      (master, driver memory, ...) come from spark_conf() at server start.
+
+Usage:
+    from spark_session import get_spark
+    spark = get_spark("loan-etl")
+    spark = get_spark("loan-etl", mode="connect")   # or SPARK_SESSION_MODE=connect
+
+    python spark_session.py                           # show the sizing
+    python spark_session.py benchmark --clients 1 2 4 # embedded vs connect
+"""
+
+import fcntl
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pyspark.sql import SparkSession
+
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+# Heap the JVM keeps for itself before the unified memory pool (Spark constant)
+_RESERVED_HEAP = 300 * MB
+
+SESSION_MODES = ("embedded", "connect")
+
+# Spark Connect server (one per container)
+CONNECT_HOST = "localhost"
+CONNECT_PORT = int(os.environ.get("SPARK_CONNECT_PORT", "15002"))
+CONNECT_IDLE_TIMEOUT = int(os.environ.get("SPARK_CONNECT_IDLE_TIMEOUT", str(30 * 60)))
+CONNECT_STATE_DIR = Path(os.environ.get("SPARK_CONNECT_STATE_DIR",
+                                        Path(tempfile.gettempdir()) / "pyspark-learn-connect"))
+CONNECT_START_TIMEOUT = 180.0
+_CONNECT_SERVER_CLASS = "org.apache.spark.sql.connect.service.SparkConnectServer"
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_session_mode = None
+
+
+# =============================================================================
+# RESOURCE DETECTION
+# =============================================================================
+
+@dataclass(frozen=True)
+class ResourceProfile:
+    """CPU and memory actually available to this process."""
+    cpus: int
+    memory_bytes: int
+    driver_memory_bytes: int
+
+
+def parse_memory(value: str) -> int:
+    """
+    Parses a JVM-style memory string ("512m", "2g", "1024k", "4096") to bytes.
+    A bare number is treated as MiB, like spark.driver.memory.
+    """
+    text = value.strip().lower().removesuffix("b")
+    units = {"k": 1024, "m": MB, "g": GB, "t": 1024 * GB}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text) * MB)
+
+
+def _read(path: str):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit():
+    """
+    Returns the cgroup CPU quota in whole CPUs (rounded up), or None if the
+    process is not CPU-limited. Supports cgroup v2 and v1.
+    """
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")  # v2: "<quota> <period>" or "max <period>"
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return max(1, -(-int(quota) // int(period)))
+        return None
+    quota = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")  # v1
+    period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return max(1, -(-int(quota) // int(period)))
+    return None
+
+
+def cgroup_memory_limit():
+    """
+    Returns the cgroup memory limit in bytes, or None if unlimited.
+    Supports cgroup v2 and v1.
+    """
+    limit = _read("/sys/fs/cgroup/memory.max") or _read("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    if not limit or limit == "max":
+        return None
+    value = int(limit)
+    # v1 reports "unlimited" as a huge page-aligned number
+    return None if value >= 1 << 60 else value
+
+
+def detect_resources() -> ResourceProfile:
+    """
+    Combines cgroup limits, CPU affinity, physical RAM and SPARK_DRIVER_MEMORY.
+
+    The driver heap is SPARK_DRIVER_MEMORY if set, otherwise half the memory
+    limit - but never more than 75% of the limit, so the Python workers and
+    JVM off-heap overhead still fit inside the container.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    if quota:
+        cpus = min(cpus, quota)
+
+    physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    memory = min(filter(None, [cgroup_memory_limit(), physical]))
+
+    env_driver = os.environ.get("SPARK_DRIVER_MEMORY")
+    driver = parse_memory(env_driver) if env_driver else memory // 2
+    driver = max(512 * MB, min(driver, memory * 3 // 4))
+    return ResourceProfile(cpus=cpus, memory_bytes=memory, driver_memory_bytes=driver)
+
+
+# =============================================================================
+# CONFIG SIZING
+# =============================================================================
+
+def spark_conf(profile: ResourceProfile) -> dict:
+    """
+    Derives Spark settings from a ResourceProfile.
+
+    - Shuffle partitions: 2 per core (AQE coalesces further at runtime)
+    - Memory fraction: small heaps lose a large share to the 300 MB reserve,
+      so give execution a bigger slice of what is left
+    - Broadcast threshold: ~1/40 of the heap, clamped to 10-100 MB, since the
+      broadcast side is materialized on the driver
+    """
+    heap = profile.driver_memory_bytes
+    partitions = max(2, profile.cpus * 2)
+    small_heap = heap < 4 * GB
+    broadcast = min(max(heap // 40, 10 * MB), 100 * MB)
+
+    return {
+        "spark.master": f"local[{profile.cpus}]",
+        "spark.driver.memory": f"{heap // MB}m",
+        "spark.driver.maxResultSize": f"{max(heap // 4, 256 * MB) // MB}m",
+        "spark.default.parallelism": str(partitions),
+        "spark.sql.shuffle.partitions": str(partitions),
+        "spark.memory.fraction": "0.7" if small_heap else "0.6",
+        "spark.memory.storageFraction": "0.3" if small_heap else "0.5",
+        "spark.sql.autoBroadcastJoinThreshold": str(broadcast),
+        # Adaptive query execution
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.adaptive.coalescePartitions.enabled": "true",
+        "spark.sql.adaptive.advisoryPartitionSizeInBytes": str(32 * MB if small_heap else 64 * MB),
+        "spark.sql.adaptive.skewJoin.enabled": "true",
+        # Arrow-based pandas conversion (toPandas / createDataFrame / pandas_udf)
+        "spark.sql.execution.arrow.pyspark.enabled": "true",
+        "spark.sql.execution.arrow.pyspark.fallback.enabled": "true",
+        "spark.sql.execution.arrow.maxRecordsPerBatch": "10000",
+        # Small local files: don't pack 128 MB per split
+        "spark.sql.files.maxPartitionBytes": str(min(128 * MB, max(heap // 32, 16 * MB))),
+        "spark.ui.showConsoleProgress": "false",
+    }
+
+
+# =============================================================================
+# SESSION FACTORY
+# =============================================================================
+
+def session_mode(mode: str = None) -> str:
+    """The requested mode, else SPARK_SESSION_MODE, else "embedded"."""
+    mode = mode or os.environ.get("SPARK_SESSION_MODE") or "embedded"
+    if mode not in SESSION_MODES:
+        raise ValueError(f"session mode must be one of {SESSION_MODES}, got {mode!r}")
+    return mode
+
+
+def get_spark(app_name: str = "pyspark-learn", extra_conf: dict = None, mode: str = None) -> SparkSession:
+    """
+    Returns the process-wide SparkSession, creating it on first call.
+
+    Args:
+        app_name: Application name shown in the Spark UI
+        extra_conf: Settings applied on top of the computed ones (first call only)
+        mode: "embedded" (own JVM) or "connect" (client of the shared server);
+              defaults to SPARK_SESSION_MODE
+
+    Returns:
+        A cached SparkSession sized to the container's CPU/memory limits
+    """
+    global _session, _session_pid, _session_mode
+    mode = session_mode(mode)
+    with _lock:
+        if _session is not None and _session_pid == os.getpid() and _session_mode == mode \
+                and not _is_stopped(_session):
+            return _session
+
+        if mode == "connect":
+            ensure_connect_server()
+            builder = SparkSession.builder.remote(f"sc://{CONNECT_HOST}:{CONNECT_PORT}").appName(app_name)
+            conf = dict(extra_conf or {})
+        else:
+            builder = SparkSession.builder.appName(app_name)
+            conf = spark_conf(detect_resources())
+            conf.update(extra_conf or {})
+        for key, value in conf.items():
+            builder = builder.config(key, value)
+        _session = builder.getOrCreate()
+        _session_pid = os.getpid()
+        _session_mode = mode
+        return _session
+
+
+def stop_spark():
+    """
+    Stops the cached session (if any) so the next get_spark() builds a fresh
+    one. In connect mode this only closes the client; the server stays up.
+    """
+    global _session, _session_pid, _session_mode
+    with _lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.stop()
+        _session = None
+        _session_pid = None
+        _session_mode = None
+
+
+def is_connect(session: SparkSession) -> bool:
+    """True for a Spark Connect client session (no SparkContext, RDDs or JVM)."""
+    return type(session).__module__.startswith("pyspark.sql.connect")
+
+
+def _is_stopped(session: SparkSession) -> bool:
+    if getattr(session, "is_stopped", False):  # Spark Connect client
+        return True
+    sc = getattr(session, "_sc", None)
+    return sc is not None and sc._jsc is None
+
+
+# =============================================================================
+# SPARK CONNECT SERVER
+# =============================================================================
+
+def _pidfile(port: int) -> Path:
+    return CONNECT_STATE_DIR / f"server-{port}.json"
+
+
+def connect_server_healthy(port: int = CONNECT_PORT, timeout: float = 2.0) -> bool:
+    """Health check: the server's gRPC endpoint accepts a connection within `timeout`."""
+    import grpc
+
+    channel = grpc.insecure_channel(f"{CONNECT_HOST}:{port}")
+    try:
+        grpc.channel_ready_future(channel).result(timeout=timeout)
+        return True
+    except grpc.FutureTimeoutError:
+        return False
+    finally:
+        channel.close()
+
+
+def ensure_connect_server(port: int = CONNECT_PORT, idle_timeout: int = CONNECT_IDLE_TIMEOUT,
+                          timeout: float = CONNECT_START_TIMEOUT) -> dict:
+    """
+    Starts the shared server unless a healthy one is already listening, and
+    waits until it passes the health check.
+
+    Args:
+        port: gRPC port of the server
+        idle_timeout: Seconds without a client connection before it shuts down
+        timeout: Seconds to wait for a fresh server to become healthy
+
+    Returns:
+        The server's pidfile contents ({"supervisor", "server", "port", ...}),
+        empty if the server was started by something else
+    """
+    CONNECT_STATE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(CONNECT_STATE_DIR / f"server-{port}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not connect_server_healthy(port):
+            _start_supervisor(port, idle_timeout, timeout)
+    return _read_pidfile(port)
+
+
+def _start_supervisor(port: int, idle_timeout: int, timeout: float):
+    log_path = CONNECT_STATE_DIR / f"server-{port}.log"
+    with open(log_path, "ab") as log:
+        supervisor = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "serve", "--port", str(port),
+             "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    deadline = time.monotonic() + timeout
+    while not connect_server_healthy(port, timeout=1.0):
+        if supervisor.poll() is not None:
+            raise RuntimeError(f"Spark Connect server exited with {supervisor.returncode}, see {log_path}")
+        if time.monotonic() > deadline:
+            supervisor.terminate()
+            raise TimeoutError(f"Spark Connect server not healthy after {timeout:.0f}s, see {log_path}")
+        time.sleep(0.5)
+
+
+def _read_pidfile(port: int) -> dict:
+    try:
+        return json.loads(_pidfile(port).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _client_connections(port: int) -> int:
+    """Established TCP connections to the server port (one per attached client)."""
+    import psutil
+
+    return sum(1 for c in psutil.net_connections("tcp")
+               if c.status == psutil.CONN_ESTABLISHED and c.laddr and c.laddr.port == port)
+
+
+def _spark_submit() -> str:
+    from pyspark.find_spark_home import _find_spark_home
+
+    return str(Path(_find_spark_home()) / "bin" / "spark-submit")
+
+
+def serve_connect(port: int = CONNECT_PORT, idle_timeout: int = CONNECT_IDLE_TIMEOUT, poll_seconds: float = 5.0):
+    """
+    Supervisor loop (what `python spark_session.py serve` runs): starts the
+    Spark Connect server sized by spark_conf(), then stops it once no client
+    has been connected for `idle_timeout` seconds after start-up, or on SIGTERM.
+    """
+    conf = spark_conf(detect_resources())
+    conf["spark.connect.grpc.binding.port"] = str(port)
+    command = [_spark_submit(), "--class", _CONNECT_SERVER_CLASS, "--name", "pyspark-learn-connect"]
+    for key, value in conf.items():
+        command += ["--conf", f"{key}={value}"]
+    server = subprocess.Popen(command + ["spark-internal"])
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    _pidfile(port).write_text(json.dumps({"supervisor": os.getpid(), "server": server.pid, "port": port,
+                                          "idle_timeout": idle_timeout, "started": time.time()}))
+    try:
+        ready, last_client = False, time.monotonic()
+        while server.poll() is None and not stopping.wait(poll_seconds):
+            if not ready:  # the idle clock starts once the server is up
+                ready, last_client = connect_server_healthy(port), time.monotonic()
+            elif _client_connections(port):
+                last_client = time.monotonic()
+            elif time.monotonic() - last_client >= idle_timeout:
+                print(f"no clients for {idle_timeout}s, shutting down", flush=True)
+                break
+    finally:
+        if server.poll() is None:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        _pidfile(port).unlink(missing_ok=True)
+
+
+def stop_connect_server(port: int = CONNECT_PORT, timeout: float = 60.0) -> bool:
+    """Asks the supervisor to stop the server; returns True once it is down."""
+    info = _read_pidfile(port)
+    if info:
+        try:
+            os.kill(info["supervisor"], signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + timeout
+    while connect_server_healthy(port, timeout=1.0):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.5)
+    return True
+
+
+# =============================================================================
+# BENCHMARK: N EMBEDDED SESSIONS VS N CONNECT CLIENTS
+# =============================================================================
+
+@dataclass
+class StartupResult:
+    mode: str
+    clients: int
+    seconds: list = field(default_factory=list)   # launch -> first query result, per client
+    memory_bytes: int = 0                         # PSS of all clients + the shared server
+
+
+def _tree_memory(pids) -> int:
+    """Proportional set size (RSS where PSS is unavailable) of processes and their children."""
+    import psutil
+
+    total = 0
+    for pid in pids:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.NoSuchProcess:
+            continue
+        for proc in procs:
+            try:
+                info = proc.memory_full_info()
+                total += getattr(info, "pss", info.rss)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+    return total
+
+
+def _client(mode: str, launched: float):
+    """Benchmark client: first query, report, then hold the session until stdin closes."""
+    spark = get_spark(f"startup-{mode}", mode=mode)
+    spark.range(1000).count()
+    print(json.dumps({"seconds": time.time() - launched}), flush=True)
+    sys.stdin.read()
+    stop_spark()
+
+
+def measure_startup(clients: int, mode: str) -> StartupResult:
+    """
+    Launches `clients` processes at once, each opening a session and running
+    one query, and measures memory while all of them hold their session.
+    """
+    launched = time.time()
+    procs = [subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "client", "--mode", mode,
+                               "--launched", str(launched)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+             for _ in range(clients)]
+    result = StartupResult(mode, clients)
+    try:
+        for proc in procs:
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"{mode} client exited with {proc.wait()}")
+            result.seconds.append(json.loads(line)["seconds"])
+        pids = [proc.pid for proc in procs]
+        if mode == "connect":
+            pids.append(_read_pidfile(CONNECT_PORT).get("supervisor"))
+        result.memory_bytes = _tree_memory(filter(None, pids))
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+        for proc in procs:
+            proc.wait()
+    return result
+
+
+def benchmark(client_counts):
+    """Embedded sessions vs Connect clients (cold: server not running; warm: already up)."""
+    print(f"{'mode':<16}{'clients':>8}{'median start':>14}{'max start':>11}{'total memory':>14}")
+    print("-" * 63)
+    for clients in client_counts:
+        runs = [("embedded", "embedded", None)]
+        runs += [("connect (cold)", "connect", stop_connect_server), ("connect (warm)", "connect", None)]
+        for label, mode, before in runs:
+            if before:
+                before()
+            result = measure_startup(clients, mode)
+            print(f"{label:<16}{clients:>8}{statistics.median(result.seconds):>13.1f}s"
+                  f"{max(result.seconds):>10.1f}s{result.memory_bytes / MB:>11,.0f} MB")
+        print()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Spark session sizing and the shared Spark Connect server")
+    commands = parser.add_subparsers(dest="command")
+    serve = commands.add_parser("serve", help="run the Spark Connect server (foreground, with idle shutdown)")
+    serve.add_argument("--port", type=int, default=CONNECT_PORT)
+    serve.add_argument("--idle-timeout", type=int, default=CONNECT_IDLE_TIMEOUT)
+    commands.add_parser("stop", help="stop the Spark Connect server")
+    commands.add_parser("status", help="health check of the Spark Connect server")
+    bench = commands.add_parser("benchmark", help="startup time / memory, embedded vs connect")
+    bench.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4])
+    client = commands.add_parser("client")  # used by the benchmark
+    client.add_argument("--mode", choices=SESSION_MODES, required=True)
+    client.add_argument("--launched", type=float, required=True)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve_connect(args.port, args.idle_timeout)
+    elif args.command == "stop":
+        print("stopped" if stop_connect_server() else "still running")
+    elif args.command == "status":
+        healthy = connect_server_healthy()
+        print(f"sc://{CONNECT_HOST}:{CONNECT_PORT} {'✓ healthy' if healthy else '✗ not running'}",
+              _read_pidfile(CONNECT_PORT) or "")
+    elif args.command == "benchmark":
+        benchmark(args.clients)
+    elif args.command == "client":
+        _client(args.mode, args.launched)
+    else:
+        profile = detect_resources()
+        print(f"CPUs: {profile.cpus}, memory: {profile.memory_bytes / GB:.1f} GB, "
+              f"driver heap: {profile.driver_memory_bytes / GB:.1f} GB")
+        for key, value in spark_conf(profile).items():
+            print(f"  {key} = {value}")
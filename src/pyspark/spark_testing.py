@@ -0,0 +1,335 @@
+"""
+PySpark Test Harness
+====================
+pytest fixtures for Spark tests that run in parallel under pytest-xdist
+(`pytest -n 4`) without every test - or every worker - starting a full-size
+session of its own.
+
+How it works:
+    - `spark` (session-scoped): one SparkSession per xdist worker, sized to
+      the worker's share of the container (cpus // workers cores, memory //
+      workers for the driver) through spark_session.spark_conf(). The UI is
+      off and spark.local.dir is per worker, so workers never collide on
+      ports or scratch space. With SPARK_SESSION_MODE=connect every worker
+      is a thin client of the shared Spark Connect server instead.
+    - `datasets` (session-scoped): the practice loan / event files as
+      Parquet, written once through dataset_cache under a file lock. All
+      workers - and later runs, until a source file changes - read the same
+      files.
+    - `assert_frame_equal(actual, expected)`: compares Spark / pandas / Arrow
+      frames as Arrow tables. Spark frames come over with toArrow() (Arrow
+      batches, no Row objects); rows are sorted first unless check_order=True.
+
+Usage:
+    # conftest.py (or run pytest with -p spark_testing)
+    from spark_testing import datasets, spark  # noqa: F401
+
+    def test_loans(spark, datasets):
+        loans = datasets.spark(spark, "loans")
+        assert_frame_equal(loans.where("amount > 0"), datasets.pandas("loans").query("amount > 0"))
+
+    python spark_testing.py --workers 1 2 4     # suite wall time per worker count
+"""
+
+import fcntl
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "practice_datasets"))
+
+from dataset_cache import DEFAULT_CACHE_DIR, DatasetCache, list_sources  # noqa: E402
+from spark_session import (  # noqa: E402
+    MB,
+    ResourceProfile,
+    detect_resources,
+    get_spark,
+    session_mode,
+    spark_conf,
+    stop_spark,
+)
+
+
+TESTS_DIR = Path(__file__).resolve().parent / "tests"
+
+# Runtime SQL settings, applied in both session modes
+TEST_SQL_CONF = {
+    "spark.sql.session.timeZone": "UTC",
+}
+
+# Embedded sessions only: N JVMs in one container must not fight over ports
+TEST_JVM_CONF = {
+    "spark.ui.enabled": "false",
+    "spark.driver.host": "127.0.0.1",
+    "spark.driver.bindAddress": "127.0.0.1",
+}
+
+
+# =============================================================================
+# WORKER SIZING
+# =============================================================================
+
+def worker_id() -> str:
+    """xdist worker name ("gw0", "gw1", ...), or "main" without xdist."""
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+def worker_count() -> int:
+    return int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+
+
+def worker_profile(workers: int = None, total: ResourceProfile = None) -> ResourceProfile:
+    """
+    This worker's share of the container: cpus // workers cores (at least 1)
+    and memory // workers, of which the driver heap takes 3/4 - never more
+    than the single-session heap and never less than 512 MB.
+    """
+    workers = workers or worker_count()
+    total = total or detect_resources()
+    memory = total.memory_bytes // workers
+    driver = max(512 * MB, min(total.driver_memory_bytes, memory * 3 // 4))
+    return ResourceProfile(cpus=max(1, total.cpus // workers), memory_bytes=memory, driver_memory_bytes=driver)
+
+
+def worker_conf(local_dir: Path = None, workers: int = None) -> dict:
+    """Full embedded-session config for this worker."""
+    conf = spark_conf(worker_profile(workers))
+    conf.update(TEST_JVM_CONF)
+    conf.update(TEST_SQL_CONF)
+    if local_dir is not None:
+        conf["spark.local.dir"] = str(local_dir)
+    return conf
+
+
+# =============================================================================
+# SHARED DATASETS
+# =============================================================================
+
+class SharedDatasets:
+    """
+    The practice datasets by name ("loans", "synthetic_loans", "events", ...),
+    cached once as Arrow IPC + Parquet for every worker.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache = DatasetCache(cache_dir)
+        self.sources = {Path(source).stem: source for source in list_sources()}
+
+    def _source(self, name: str):
+        if name not in self.sources:
+            raise KeyError(f"unknown dataset {name!r}, expected one of {sorted(self.sources)}")
+        return self.sources[name]
+
+    def prepare(self, names=None):
+        """
+        Builds the Parquet copies of `names` (default: all). The lock makes
+        concurrent workers wait for the first one instead of all converting
+        the same files; dataset_cache's atomic renames keep readers safe.
+        """
+        self.cache.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache.cache_dir / ".prepare.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            for name in names or self.sources:
+                self.cache.ensure_parquet(self._source(name))
+
+    def parquet(self, name: str) -> Path:
+        path = self.cache.cache_path(self.cache._resolve(self._source(name)), ".parquet")
+        if not path.exists():
+            self.prepare([name])
+        return path
+
+    def table(self, name: str, columns=None) -> pa.Table:
+        return self.cache.load_table(self._source(name), columns)
+
+    def pandas(self, name: str, columns=None) -> pd.DataFrame:
+        return self.cache.load_pandas(self._source(name), columns)
+
+    def spark(self, spark, name: str, columns=None):
+        df = spark.read.parquet(str(self.parquet(name)))
+        return df.select(*columns) if columns else df
+
+
+# =============================================================================
+# ARROW-BASED ASSERTIONS
+# =============================================================================
+
+def to_arrow(frame) -> pa.Table:
+    """Spark DataFrame (classic or Connect), pandas DataFrame or Arrow table -> Arrow table."""
+    if isinstance(frame, pa.Table):
+        return frame
+    if isinstance(frame, pd.DataFrame):
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    if hasattr(frame, "toArrow"):
+        return frame.toArrow()
+    raise TypeError(f"cannot compare a {type(frame).__name__}")
+
+
+def _plain_type(dtype: pa.DataType) -> pa.DataType:
+    """Drops encoding-only differences: dictionary and large_* variants."""
+    if pa.types.is_dictionary(dtype):
+        return _plain_type(dtype.value_type)
+    if pa.types.is_large_string(dtype) or pa.types.is_string_view(dtype):
+        return pa.string()
+    if pa.types.is_large_binary(dtype):
+        return pa.binary()
+    if pa.types.is_large_list(dtype) or pa.types.is_list(dtype):
+        return pa.list_(_plain_type(dtype.value_type))
+    if pa.types.is_struct(dtype):
+        return pa.struct([pa.field(f.name, _plain_type(f.type)) for f in dtype])
+    return dtype
+
+
+def _normalize(table: pa.Table) -> pa.Table:
+    schema = pa.schema([pa.field(f.name, _plain_type(f.type)) for f in table.schema])
+    return table.cast(schema).combine_chunks()
+
+
+def _sortable(dtype: pa.DataType) -> bool:
+    return not (pa.types.is_nested(dtype) or pa.types.is_null(dtype))
+
+
+def _sorted(table: pa.Table) -> pa.Table:
+    keys = [(f.name, "ascending") for f in table.schema if _sortable(f.type)]
+    return table.take(pc.sort_indices(table, sort_keys=keys)) if keys else table
+
+
+def _column_matches(left: pa.ChunkedArray, right: pa.ChunkedArray, rtol: float, atol: float) -> np.ndarray:
+    """Per-row equality; nulls equal nulls, NaN equals NaN, floats within tolerance."""
+    if pa.types.is_floating(left.type):
+        a = left.to_numpy(zero_copy_only=False).astype(float)
+        b = right.to_numpy(zero_copy_only=False).astype(float)
+        return np.isclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+    both_null = pc.and_(pc.is_null(left), pc.is_null(right))
+    if _sortable(left.type):
+        equal = pc.fill_null(pc.equal(left, right), False)
+    else:
+        equal = pa.array([a == b for a, b in zip(left.to_pylist(), right.to_pylist())])
+    return pc.or_(equal, both_null).to_numpy(zero_copy_only=False)
+
+
+def assert_frame_equal(actual, expected, check_order: bool = False, check_types: bool = True,
+                       rtol: float = 1e-9, atol: float = 0.0, max_diff_rows: int = 5):
+    """
+    Asserts two frames hold the same rows, comparing Arrow columns instead of
+    collected Row objects.
+
+    Args:
+        actual, expected: Spark DataFrames, pandas DataFrames or Arrow tables
+        check_order: Compare row order too (otherwise both sides are sorted
+            on their non-nested columns first)
+        check_types: Require the same column types (dictionary / large_*
+            encodings are ignored); otherwise `expected` is cast to `actual`
+        rtol, atol: Tolerance for floating-point columns
+        max_diff_rows: Differing rows shown in the failure message
+    """
+    left, right = _normalize(to_arrow(actual)), _normalize(to_arrow(expected))
+    assert left.column_names == right.column_names, \
+        f"columns differ:\n  actual:   {left.column_names}\n  expected: {right.column_names}"
+    if check_types:
+        mismatched = [(f.name, str(f.type), str(g.type)) for f, g in zip(left.schema, right.schema) if f.type != g.type]
+        assert not mismatched, f"column types differ (name, actual, expected): {mismatched}"
+    else:
+        try:
+            right = right.cast(left.schema)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise AssertionError(f"expected cannot be cast to the actual schema: {e}") from None
+    assert left.num_rows == right.num_rows, f"row counts differ: actual {left.num_rows}, expected {right.num_rows}"
+
+    if not check_order:
+        left, right = _sorted(left), _sorted(right)
+    if left.equals(right):
+        return
+    matches = np.ones(left.num_rows, dtype=bool)
+    differing_columns = []
+    for name in left.column_names:
+        column = _column_matches(left[name], right[name], rtol, atol)
+        if not column.all():
+            differing_columns.append(name)
+            matches &= column
+    if not differing_columns:
+        return
+    rows = np.flatnonzero(~matches)
+    shown = "\n".join(
+        f"  row {i}:\n    actual:   {left.slice(i, 1).to_pylist()[0]}\n    expected: {right.slice(i, 1).to_pylist()[0]}"
+        for i in rows[:max_diff_rows]
+    )
+    raise AssertionError(f"{len(rows)} of {left.num_rows} rows differ in columns {differing_columns}"
+                         f"{' (after sorting)' if not check_order else ''}:\n{shown}")
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture(scope="session")
+def spark(tmp_path_factory):
+    """One SparkSession per xdist worker, sized to the worker's share of the container."""
+    name = f"pytest-{worker_id()}"
+    if session_mode() == "connect":
+        session = get_spark(name, TEST_SQL_CONF, mode="connect")
+    else:
+        session = get_spark(name, worker_conf(tmp_path_factory.mktemp("spark-local")), mode="embedded")
+    yield session
+    stop_spark()
+
+
+@pytest.fixture(scope="session")
+def datasets() -> SharedDatasets:
+    """The practice datasets, prepared as Parquet once for all workers."""
+    shared = SharedDatasets()
+    shared.prepare()
+    return shared
+
+
+# =============================================================================
+# MAIN - SUITE WALL TIME VS WORKER COUNT
+# =============================================================================
+
+def time_suite(workers: int, tests_dir: Path = TESTS_DIR) -> tuple:
+    """
+    Runs the Spark test suite with `workers` xdist workers (0 = no xdist).
+
+    Returns:
+        (wall seconds, pytest exit code, pytest's summary line)
+    """
+    command = [sys.executable, "-m", "pytest", str(tests_dir), "-q", "-p", "no:cacheprovider"]
+    if workers:
+        command += ["-n", str(workers)]
+    start = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True)
+    return time.perf_counter() - start, result.returncode, result.stdout.strip().splitlines()[-1:]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Spark test suite wall time per xdist worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    SharedDatasets().prepare()  # every run below starts with a warm dataset cache
+    total = detect_resources()
+    print(f"container: {total.cpus} CPUs, {total.memory_bytes / (1024 * MB):.1f} GB, "
+          f"mode: {session_mode()}\n")
+    print(f"{'workers':>8}{'cores/worker':>14}{'driver heap':>13}{'wall time':>11}{'speedup':>9}  result")
+    print("-" * 80)
+    baseline = None
+    for workers in args.workers:
+        if session_mode() == "connect":
+            cores, heap = "shared", "shared"
+        else:
+            profile = worker_profile(max(1, workers), total)
+            cores, heap = profile.cpus, f"{profile.driver_memory_bytes // MB} MB"
+        seconds, code, summary = time_suite(workers)
+        baseline = baseline or seconds
+        print(f"{workers or 'off':>8}{cores:>14}{heap:>13}{seconds:>10.1f}s{baseline / seconds:>8.2f}x  "
+              f"{'✓ ' if code == 0 else '✗ '}{' '.join(summary)}")
@@ -0,0 +1,453 @@
+"""
+String Utilities for Spark Columns
+==================================
+Runs the DE string helpers from `python_core/data_structures/strings`
+(`clean_whitespace`, `normalize_phone`, `truncate`, `clean_record_solution`)
+on Spark columns without a Python call per row.
+
+Three ways to evaluate the same utility:
+
+    native   Spark SQL expressions (regexp_replace, substring, ...). Runs in
+             the JVM, no Python worker at all. Used whenever an expression
+             reproduces the Python function exactly.
+    arrow    Vectorized Arrow UDF: Spark ships Arrow record batches to the
+             Python worker and the `string_batch` kernels process a whole
+             batch per call (pandas_udf on Spark versions without arrow_udf).
+    row      Plain Python UDF calling the scalar function once per row; the
+             baseline that pickles every value both ways.
+
+Parity:
+    Python's whitespace (`str.isspace`) and digits (`str.isdigit`) are
+    Unicode-aware, while Spark's `trim` only strips spaces and Java's `\\s` /
+    `\\d` are ASCII. The native expressions therefore trim with the exact
+    whitespace set and use the same generated character classes as
+    `string_batch` (Java regex accepts its `\\x{...}` syntax), switching to
+    the much cheaper ASCII sets for values that are pure ASCII.
+    `clean_record_solution` raises IndexError on a record with fewer than 4
+    "|" fields; every mode here returns null for such a record instead of
+    failing the job.
+
+Batch size:
+    Rows per Arrow batch come from spark.sql.execution.arrow.maxRecordsPerBatch,
+    a session setting read when the query runs. `arrow_batch_size(spark, n)`
+    sets it around a block of actions.
+
+Usage:
+    from string_udfs import clean_whitespace, clean_record
+    df.select(clean_whitespace("name"), clean_record("raw", mode="arrow").alias("rec"))
+
+    python string_udfs.py --rows 1000000
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyspark.sql import Column, DataFrame, SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import StringType, StructField, StructType
+
+STRINGS_DIR = Path(__file__).resolve().parents[1] / "python_core" / "data_structures" / "strings"
+sys.path.insert(0, str(STRINGS_DIR))
+
+import string_methods  # noqa: E402
+from challenges import clean_record_solution  # noqa: E402
+from string_batch import (  # noqa: E402
+    _DIGITS,
+    _WHITESPACE,
+    clean_whitespace_batch,
+    normalize_phone_batch,
+    truncate_batch,
+)
+
+from spark_session import get_spark, is_connect  # noqa: E402
+
+
+MODES = ("auto", "native", "arrow", "row")
+BATCH_SIZE_CONF = "spark.sql.execution.arrow.maxRecordsPerBatch"
+DEFAULT_INPUT = Path(__file__).resolve().parents[1] / "practice_datasets" / "csv" / "loan_applications"
+
+RECORD_FIELDS = ("order_id", "email", "phone", "amount")
+RECORD_TYPE = StructType([StructField(name, StringType()) for name in RECORD_FIELDS])
+
+# Executors unpickle UDFs by module name; these files are shipped to them
+_SHIPPED_FILES = [STRINGS_DIR / "string_methods.py", STRINGS_DIR / "string_batch.py",
+                  STRINGS_DIR / "challenges.py", Path(__file__).with_name("spark_session.py"), Path(__file__)]
+_shipped_to = set()
+
+
+def _ship_modules(spark: SparkSession):
+    """
+    Adds the helper modules to the executors' Python path (once per context,
+    or per session under Spark Connect, where artifacts are session-scoped).
+    """
+    if is_connect(spark):
+        if id(spark) not in _shipped_to:
+            spark.addArtifacts(*[str(path) for path in _SHIPPED_FILES], pyfile=True)
+            _shipped_to.add(id(spark))
+        return
+    sc = spark.sparkContext
+    if id(sc) in _shipped_to:
+        return
+    for path in _SHIPPED_FILES:
+        sc.addPyFile(str(path))
+    _shipped_to.add(id(sc))
+
+
+@contextmanager
+def arrow_batch_size(spark: SparkSession, rows: int):
+    """Sets the rows per Arrow batch for actions run inside the block."""
+    previous = spark.conf.get(BATCH_SIZE_CONF, None)
+    spark.conf.set(BATCH_SIZE_CONF, str(rows))
+    try:
+        yield
+    finally:
+        if previous is None:
+            spark.conf.unset(BATCH_SIZE_CONF)
+        else:
+            spark.conf.set(BATCH_SIZE_CONF, previous)
+
+
+# =============================================================================
+# NATIVE EXPRESSIONS
+# =============================================================================
+
+def _col(column) -> Column:
+    return F.col(column) if isinstance(column, str) else column
+
+
+# Java regex walks a character class range by range, and trim(chars) scans
+# the whole trim set per character, so the full Unicode sets (1,300+
+# characters of ranges for digits, 29 whitespace characters) cost 2-4x the
+# ASCII ones. Values that are pure ASCII (character length == UTF-8 byte
+# length) use the ASCII sets, which match str.isspace / str.isdigit exactly
+# on ASCII.
+_CLASSES = {
+    True: {"space": "\\t-\\r\\x1c- ", "digit": "0-9",
+           "trim": "".join(char for char in map(chr, range(128)) if char.isspace())},
+    False: {"space": _WHITESPACE, "digit": _DIGITS,
+            "trim": "".join(char for char in map(chr, range(sys.maxunicode + 1)) if char.isspace())},
+}
+
+
+def _is_ascii(column: Column) -> Column:
+    return F.length(column) == F.octet_length(column)
+
+
+def _by_charset(column: Column, build) -> Column:
+    """build(column, classes) with the ASCII classes when the value allows it."""
+    return F.when(_is_ascii(column), build(column, _CLASSES[True])).otherwise(build(column, _CLASSES[False]))
+
+
+def _strip(column: Column, classes: dict) -> Column:
+    """str.strip(): trims Python whitespace (Spark's default trim only removes spaces)."""
+    return F.trim(column, F.lit(classes["trim"]))
+
+
+def _clean_whitespace(column: Column, classes: dict) -> Column:
+    return F.regexp_replace(_strip(column, classes), f"[{classes['space']}]+", " ")
+
+
+def _normalize_phone(column: Column, classes: dict) -> Column:
+    return F.regexp_replace(column, f"[^{classes['digit']}]+", "")
+
+
+def clean_whitespace_native(column) -> Column:
+    """`" ".join(text.split())` as strip + collapse of whitespace runs."""
+    return _by_charset(_col(column), _clean_whitespace)
+
+
+def normalize_phone_native(column) -> Column:
+    return _by_charset(_col(column), _normalize_phone)
+
+
+def truncate_native(column, max_length: int, suffix: str = "...") -> Column:
+    """
+    Python slice semantics for the cut: a negative stop (max_length shorter
+    than the suffix) counts from the end of the string.
+    """
+    column = _col(column)
+    stop = max_length - len(suffix)
+    if stop >= 0:
+        cut = F.substring(column, 1, stop)
+    else:
+        cut = F.substring(column, F.lit(1), F.greatest(F.length(column) + stop, F.lit(0)))
+    return F.when(F.length(column) <= max_length, column).otherwise(F.concat(cut, F.lit(suffix)))
+
+
+def _clean_record(record: Column, classes: dict) -> Column:
+    parts = F.split(record, r"\|")
+    field = [F.get(parts, i) for i in range(len(RECORD_FIELDS))]  # null when out of range
+    order_id = _strip(field[0], classes)
+    cleaned = F.struct(
+        F.when(order_id.startswith("ORD_"), F.substring(order_id, 5, 1 << 30)).otherwise(order_id).alias("order_id"),
+        F.lower(_strip(field[1], classes)).alias("email"),
+        _normalize_phone(field[2], classes).alias("phone"),
+        F.translate(_strip(field[3], classes), "$,", "").alias("amount"),
+    )
+    return F.when(F.size(parts) >= len(RECORD_FIELDS), cleaned)
+
+
+def clean_record_native(column) -> Column:
+    """
+    clean_record_solution as a struct of four expressions. `split` takes a
+    regex, so the pipe is escaped; `translate` deletes "$" and ",". The
+    ASCII check runs once per record, not per field.
+    """
+    return _by_charset(_col(column), _clean_record)
+
+
+# =============================================================================
+# ARROW BATCH FUNCTIONS
+# =============================================================================
+
+def _lower_like_python(arr: pa.Array) -> pa.Array:
+    """
+    utf8_lower, with str.lower() for non-ASCII values: utf8_lower maps each
+    code point on its own ("İ" -> "i"), str.lower() applies the full Unicode
+    mapping ("İ" -> "i̇").
+    """
+    lowered = pc.utf8_lower(arr)
+    non_ascii = pc.invert(pc.fill_null(pc.string_is_ascii(arr), True))
+    if not pc.any(non_ascii).as_py():
+        return lowered
+    exact = [value.lower() for value in arr.filter(non_ascii).to_pylist()]
+    return pc.replace_with_mask(lowered, non_ascii, pa.array(exact, lowered.type))
+
+
+def clean_record_batch(values) -> pa.StructArray:
+    """
+    clean_record_solution over a whole Arrow column with pyarrow.compute.
+    Records with fewer than 4 fields (and null records) become null.
+    """
+    arr = pa.array(values, type=pa.string()) if not isinstance(values, (pa.Array, pa.ChunkedArray)) else values
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    parts = pc.split_pattern(arr, pattern="|")
+    valid = pc.greater_equal(pc.list_value_length(parts), len(RECORD_FIELDS))
+    padded = pc.list_slice(parts, start=0, stop=len(RECORD_FIELDS))
+    # Pad short lists so list_element never reads out of range; they are nulled below
+    padded = pc.if_else(valid, padded, pa.scalar([""] * len(RECORD_FIELDS), padded.type))
+    field = [pc.list_element(padded, i) for i in range(len(RECORD_FIELDS))]
+
+    order_id = pc.utf8_trim_whitespace(field[0])
+    order_id = pc.if_else(pc.starts_with(order_id, "ORD_"), pc.utf8_slice_codeunits(order_id, start=4), order_id)
+    email = _lower_like_python(pc.utf8_trim_whitespace(field[1]))
+    phone = normalize_phone_batch(field[2])
+    amount = pc.replace_substring(pc.replace_substring(pc.utf8_trim_whitespace(field[3]), "$", ""), ",", "")
+
+    mask = pc.invert(pc.fill_null(valid, False))
+    return pa.StructArray.from_arrays([order_id, email, phone, amount], names=list(RECORD_FIELDS), mask=mask)
+
+
+def _as_string(result: pa.Array) -> pa.Array:
+    """Spark declares `string`; Arrow kernels may hand back large_string."""
+    return result.cast(pa.string()) if result.type != pa.string() else result
+
+
+def _clean_whitespace_arrow(arr: pa.Array) -> pa.Array:
+    return _as_string(clean_whitespace_batch(arr))
+
+
+def _normalize_phone_arrow(arr: pa.Array) -> pa.Array:
+    return _as_string(normalize_phone_batch(arr))
+
+
+def _truncate_arrow(arr: pa.Array, max_length: int, suffix: str) -> pa.Array:
+    return _as_string(truncate_batch(arr, max_length, suffix))
+
+
+def _vectorized_udf(batch_fn, return_type, args=()):
+    """
+    arrow_udf (Spark 4.1+) hands the function pyarrow Arrays directly;
+    older versions get a pandas_udf that converts each batch to Arrow.
+    """
+    if hasattr(F, "arrow_udf"):
+        def run_arrow(arr: pa.Array) -> pa.Array:
+            return batch_fn(arr, *args)
+
+        return F.arrow_udf(run_arrow, return_type)
+
+    def run(series: pd.Series) -> pd.Series:
+        result = batch_fn(pa.Array.from_pandas(series, type=pa.string()), *args)
+        if isinstance(result, pa.StructArray):
+            return pd.DataFrame({name: result.field(name).to_pandas() for name in RECORD_FIELDS})
+        return result.to_pandas()
+
+    if isinstance(return_type, StructType):
+        run.__annotations__["return"] = pd.DataFrame
+    return F.pandas_udf(run, return_type)
+
+
+# =============================================================================
+# DISPATCH
+# =============================================================================
+
+def _row_clean_record(record):
+    try:
+        return clean_record_solution(record)
+    except IndexError:
+        return None
+
+
+def _null_safe(func):
+    def run(value, *args):
+        return None if value is None else func(value, *args)
+    return run
+
+
+def _apply(column, mode: str, native, batch_fn, scalar_fn, return_type, args=()) -> Column:
+    """
+    Builds the Column for one utility in the requested mode. `auto` is the
+    native expression: every utility here has an exact one.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    if mode in ("auto", "native"):
+        return native(column, *args)
+
+    spark = SparkSession.getActiveSession()
+    if spark is not None:
+        _ship_modules(spark)
+    if mode == "arrow":
+        udf = _vectorized_udf(batch_fn, return_type, args)
+    else:
+        udf = F.udf(lambda value: scalar_fn(value, *args), return_type, useArrow=False)
+    return udf(_col(column))
+
+
+def clean_whitespace(column, mode: str = "auto") -> Column:
+    """Spark version of string_methods.clean_whitespace."""
+    return _apply(column, mode, clean_whitespace_native, _clean_whitespace_arrow,
+                  _null_safe(string_methods.clean_whitespace), StringType())
+
+
+def normalize_phone(column, mode: str = "auto") -> Column:
+    """Spark version of string_methods.normalize_phone."""
+    return _apply(column, mode, normalize_phone_native, _normalize_phone_arrow,
+                  _null_safe(string_methods.normalize_phone), StringType())
+
+
+def truncate(column, max_length: int, suffix: str = "...", mode: str = "auto") -> Column:
+    """Spark version of string_methods.truncate."""
+    return _apply(column, mode, truncate_native, _truncate_arrow,
+                  _null_safe(string_methods.truncate), StringType(), (max_length, suffix))
+
+
+def clean_record(column, mode: str = "auto") -> Column:
+    """
+    Spark version of challenges.clean_record_solution.
+
+    Returns:
+        struct<order_id, email, phone, amount> (null for malformed records)
+    """
+    return _apply(column, mode, clean_record_native, clean_record_batch,
+                  _null_safe(_row_clean_record), RECORD_TYPE)
+
+
+# =============================================================================
+# BENCHMARK - native vs Arrow UDF vs row UDF on the loan data
+# =============================================================================
+
+def sample_frame(spark: SparkSession, rows: int, input_dir: Path = DEFAULT_INPUT) -> DataFrame:
+    """
+    Messy string columns derived from synthetic_loan_applications.csv,
+    repeated up to `rows` rows: padded names, formatted phones and
+    "ORD_...|email|phone|$amount" records for clean_record.
+    """
+    apps = spark.read.option("header", "true").csv(str(input_dir / "synthetic_loan_applications.csv"))
+    repeats = spark.range(max(1, -(-rows // max(apps.count(), 1)))).withColumnRenamed("id", "copy")
+    df = apps.crossJoin(repeats).limit(rows)
+    number = F.abs(F.hash("application_id", "copy"))
+    phone = F.format_string("(%03d) 555-%04d", number % 800 + 200, number % 10000)
+    email = F.concat(F.regexp_replace("applicant_name", " ", "."), F.lit("@Example.COM"))
+    return df.select(
+        F.concat(F.lit("  "), F.col("applicant_name"), F.lit(" \t "), F.col("channel"), F.lit(" ")).alias("name"),
+        phone.alias("phone"),
+        F.concat_ws("|", F.concat(F.lit(" ORD_"), F.col("application_id"), F.lit("_"), F.col("copy")),
+                    F.concat(F.lit(" "), email, F.lit(" ")), phone,
+                    F.format_string(" $%,d ", number % 50000 + 1000)).alias("record"),
+    )
+
+
+CASES = [
+    ("clean_whitespace", "name", lambda c, mode: clean_whitespace(c, mode=mode),
+     lambda v: string_methods.clean_whitespace(v)),
+    ("normalize_phone", "phone", lambda c, mode: normalize_phone(c, mode=mode),
+     lambda v: string_methods.normalize_phone(v)),
+    ("truncate", "name", lambda c, mode: truncate(c, 12, mode=mode),
+     lambda v: string_methods.truncate(v, 12)),
+    ("clean_record", "record", lambda c, mode: clean_record(c, mode=mode),
+     lambda v: _row_clean_record(v)),
+]
+
+
+def check_parity(spark: SparkSession, df: DataFrame) -> dict:
+    """Compares every mode with the scalar Python function on `df` plus edge cases."""
+    edge = ["", "   ", "　x  y\x1c", "(123) 456-7890 ext ²", "abc", "a|b",
+            " ORD_7 | Jane@Example.COM |555 12|$1,234.50 ", "x|y|z|w|extra", "ORD_8|İzmir@Example.COM|1|2", None]
+    extra = spark.createDataFrame([(v, v, v) for v in edge], "name string, phone string, record string")
+    rows = df.unionByName(extra).collect()
+    results = {}
+    for name, column, build, scalar in CASES:
+        expected = [None if row[column] is None else scalar(row[column]) for row in rows]
+        for mode in ("native", "arrow", "row"):
+            got = [row[0] for row in df.unionByName(extra).select(build(column, mode)).collect()]
+            got = [value.asDict() if hasattr(value, "asDict") else value for value in got]
+            results[(name, mode)] = got == expected
+    return results
+
+
+def _time_action(df: DataFrame) -> float:
+    start = time.perf_counter()
+    df.write.format("noop").mode("overwrite").save()
+    return time.perf_counter() - start
+
+
+def benchmark(spark: SparkSession, rows: int = 1_000_000, batch_size: int = 10_000, repeat: int = 2) -> list:
+    """
+    Runs each utility in each mode over the same cached input (noop sink,
+    so only the expression is timed; best of `repeat` runs, the first one
+    warms the JIT and the Python workers) and prints rows/s per mode.
+    """
+    df = sample_frame(spark, rows).persist()
+    df.count()
+    results = []
+    print(f"{'utility':<18}{'native rows/s':>16}{'arrow rows/s':>16}{'row rows/s':>16}{'arrow/row':>11}")
+    print("-" * 77)
+    with arrow_batch_size(spark, batch_size):
+        for name, column, build, _ in CASES:
+            rates = {}
+            for mode in ("native", "arrow", "row"):
+                query = df.select(build(column, mode).alias("out"))
+                rates[mode] = rows / min(_time_action(query) for _ in range(repeat))
+            results.append({"utility": name, "rows": rows, **{f"{m}_rows_per_sec": r for m, r in rates.items()}})
+            print(f"{name:<18}{rates['native']:>16,.0f}{rates['arrow']:>16,.0f}{rates['row']:>16,.0f}"
+                  f"{rates['arrow'] / rates['row']:>10.1f}x")
+    df.unpersist()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="String utilities as native / Arrow UDF / row UDF columns")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000, help="rows per Arrow batch")
+    args = parser.parse_args()
+
+    spark = get_spark("string-udfs")
+    _ship_modules(spark)
+
+    print("PARITY CHECK (vs the Python functions)")
+    print("-" * 77)
+    for (name, mode), ok in check_parity(spark, sample_frame(spark, 2_000)).items():
+        print(f"{name:<18}{mode:<8}{'✓ PASS' if ok else '✗ FAIL'}")
+
+    print(f"\nBENCHMARK ({args.rows:,} rows, {args.batch_size:,} rows per Arrow batch)")
+    print("-" * 77)
+    benchmark(spark, args.rows, args.batch_size)
@@ -0,0 +1,12 @@
+"""
+Fixtures for the Spark tests, from spark_testing.py:
+
+    pytest src/pyspark/tests -n 4       # one sized SparkSession per xdist worker
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from spark_testing import datasets, spark  # noqa: E402,F401
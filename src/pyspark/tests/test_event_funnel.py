@@ -0,0 +1,58 @@
+"""event_funnel's Spark backend against its pandas backend on events.json."""
+
+import pandas as pd
+import pytest
+
+from event_funnel import (
+    FunnelState,
+    customer_funnel,
+    customer_funnel_spark,
+    customer_sessions,
+    customer_sessions_spark,
+    funnel_report,
+    prepare_events,
+    update_customer_state_spark,
+)
+from spark_testing import assert_frame_equal
+
+
+@pytest.fixture(scope="module")
+def events(datasets) -> pd.DataFrame:
+    return prepare_events(datasets.pandas("events"))
+
+
+@pytest.fixture(scope="module")
+def events_df(spark, events):
+    return spark.createDataFrame(events)
+
+
+@pytest.mark.parametrize("freq", ["D", "7D", "h"])
+def test_incremental_funnel_state_matches_batch(events, freq):
+    state = FunnelState()
+    touched = set()
+    for _, part in events.groupby(events["timestamp"].dt.floor(freq)):
+        touched.update(state.append(part))
+    assert touched == set(events["customer_id"])
+    pd.testing.assert_frame_equal(state.funnel, customer_funnel(events).sort_index(), check_index_type=False)
+    pd.testing.assert_frame_equal(state.sessions, customer_sessions(events), check_index_type=False)
+    assert state.report() == funnel_report(events)
+
+
+def test_customer_funnel_matches_pandas(events, events_df):
+    assert_frame_equal(customer_funnel_spark(events_df), customer_funnel(events).reset_index(), check_types=False)
+
+
+@pytest.mark.parametrize("gap", ["5min", "30min", "2h"])
+def test_customer_sessions_match_pandas(events, events_df, gap):
+    session_gap = pd.Timedelta(gap)
+    assert_frame_equal(customer_sessions_spark(events_df, session_gap),
+                       customer_sessions(events, session_gap).reset_index(), check_types=False)
+
+
+@pytest.mark.parametrize("split", [0.25, 0.5, 0.9])
+def test_incremental_state_matches_full_recompute(spark, events, events_df, split):
+    cutoff = events["timestamp"].quantile(split)
+    history = spark.createDataFrame(events[events["timestamp"] <= cutoff])
+    new_events = spark.createDataFrame(events[events["timestamp"] > cutoff])
+    state = update_customer_state_spark(customer_funnel_spark(history), history, new_events)
+    assert_frame_equal(state, customer_funnel_spark(events_df))
@@ -0,0 +1,61 @@
+"""loan_funnel_etl transforms against pandas on the practice and synthetic loan CSVs."""
+
+import pandas as pd
+import pytest
+
+from loan_funnel_etl import DEFAULT_INPUT_DIR, build_funnel, read_sources, summarize_credit_checks
+from spark_testing import assert_frame_equal
+
+
+SOURCES = pytest.mark.parametrize("prefix", ["", "synthetic_"], ids=["practice", "synthetic"])
+
+
+def _latest_checks(checks: pd.DataFrame) -> pd.DataFrame:
+    """Pandas version of summarize_credit_checks(): count + latest (check_time, credit_check_id) row."""
+    latest = checks.sort_values(["check_time", "credit_check_id"]).groupby("application_id", dropna=False).tail(1)
+    counts = checks.groupby("application_id", dropna=False).size().rename("credit_check_count")
+    latest = latest.join(counts, on="application_id").rename(columns={
+        "credit_check_id": "latest_credit_check_id", "check_time": "latest_check_time",
+        "result": "latest_check_result", "score": "latest_score",
+    })
+    return latest[["application_id", "credit_check_count", "latest_credit_check_id", "latest_check_time",
+                   "latest_check_result", "latest_score"]]
+
+
+@SOURCES
+def test_credit_check_summary_matches_pandas(spark, datasets, prefix):
+    sources = read_sources(spark, DEFAULT_INPUT_DIR, synthetic=bool(prefix))
+    actual = summarize_credit_checks(sources["credit_checks"])
+    expected = _latest_checks(datasets.pandas(f"{prefix}credit_checks"))
+    assert_frame_equal(actual, expected, check_types=False)
+
+
+@SOURCES
+def test_funnel_has_one_row_per_application(spark, prefix):
+    sources = read_sources(spark, DEFAULT_INPUT_DIR, synthetic=bool(prefix))
+    funnel = build_funnel(**sources).toArrow()
+    distinct = sources["applications"].select("application_id").distinct().count()
+    assert funnel.num_rows == distinct == len(set(funnel["application_id"].to_pylist()))
+
+
+@SOURCES
+def test_funnel_stages_match_pandas(spark, datasets, prefix):
+    sources = read_sources(spark, DEFAULT_INPUT_DIR, synthetic=bool(prefix))
+    actual = build_funnel(**sources).select("application_id", "funnel_stage")
+
+    apps = datasets.pandas(f"{prefix}loan_applications")["application_id"].drop_duplicates()
+    checks = _latest_checks(datasets.pandas(f"{prefix}credit_checks")).set_index("application_id")
+    funded = set(datasets.pandas(f"{prefix}loans")["application_id"].dropna())
+    stage = pd.Series("submitted", index=apps.values)
+    stage[apps.map(checks["credit_check_count"]).fillna(0).gt(0).values] = "checked"
+    stage[apps.map(checks["latest_check_result"]).eq("approved").values] = "approved"
+    stage[apps.isin(funded).values] = "funded"
+    expected = pd.DataFrame({"application_id": apps.values, "funnel_stage": stage.values})
+    assert_frame_equal(actual, expected)
+
+
+def test_funnel_joins_are_broadcast(spark, capsys):
+    sources = read_sources(spark, DEFAULT_INPUT_DIR)
+    build_funnel(**sources).explain()
+    plan = capsys.readouterr().out
+    assert plan.count("BroadcastHashJoin") == 2 and "SortMergeJoin" not in plan, plan
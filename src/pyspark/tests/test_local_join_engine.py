@@ -0,0 +1,54 @@
+"""The local join engine against Spark on the practice loan tables (Parquet copies)."""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+from pyspark.sql import functions as F
+
+from local_join_engine import ALGORITHMS, JOIN_TYPES, LocalJoinEngine, join_spark, join_tables
+from spark_testing import assert_frame_equal
+
+
+@pytest.mark.parametrize("memory_budget", [512 * 1024 * 1024, 20_000], ids=["in-memory", "spilled"])
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+@pytest.mark.parametrize("how", JOIN_TYPES)
+@pytest.mark.parametrize("right", ["loans", "credit_checks"])
+def test_local_join_matches_spark(spark, datasets, right, how, algorithm, memory_budget):
+    left_path, right_path = datasets.parquet("loan_applications"), datasets.parquet(right)
+    expected = join_spark(spark, left_path, right_path, how=how)
+    actual = join_tables(left_path, right_path, how=how, algorithm=algorithm, memory_budget=memory_budget)
+    assert_frame_equal(actual.select(expected.columns), expected, check_types=False)
+
+
+@pytest.mark.parametrize("memory_budget", [512 * 1024 * 1024, 100], ids=["in-memory", "spilled"])
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+@pytest.mark.parametrize("how", JOIN_TYPES)
+@pytest.mark.parametrize("build_keys", [0, 3], ids=["empty-build", "sparse-build"])
+def test_local_join_with_few_build_keys(spark, datasets, build_keys, how, algorithm, memory_budget):
+    # A tiny budget spills into more partitions than there are build keys,
+    # so most partitions are joined against an empty build side
+    left_path, right_path = datasets.parquet("loan_applications"), datasets.parquet("loans")
+    loans = pq.read_table(right_path)
+    keys = loans["application_id"].unique()[:build_keys]
+    right = loans.filter(pc.is_in(loans["application_id"], value_set=keys))
+    expected = spark.read.parquet(str(left_path)).join(
+        spark.read.parquet(str(right_path)).where(F.col("application_id").isin(keys.to_pylist())),
+        "application_id", {"anti": "left_anti"}.get(how, how),
+    )
+    actual = join_tables(left_path, right, how=how, algorithm=algorithm, memory_budget=memory_budget)
+    assert_frame_equal(actual.select(expected.columns), expected, check_types=False)
+
+
+@pytest.mark.parametrize("how", JOIN_TYPES)
+def test_spilled_join_with_nullable_int_keys(how):
+    # Only some probe batches hold nulls; every batch must hash a key to the same partition
+    rng = np.random.default_rng(0)
+    left_keys = rng.integers(0, 100, 400).astype(object)
+    left_keys[rng.choice(400, 40, replace=False)] = None
+    left = pa.table({"id": pa.array(left_keys, pa.int64()), "left_value": np.arange(400)})
+    right = pa.table({"id": pa.array(rng.integers(0, 100, 200)), "right_value": np.arange(200)})
+    expected = left.join(right, "id", join_type={"inner": "inner", "left": "left outer", "anti": "left anti"}[how])
+    actual = pa.concat_tables(LocalJoinEngine(memory_budget=2_000, batch_rows=50).join(left, right, "id", how))
+    assert_frame_equal(actual, expected.select(actual.column_names), check_types=False)
@@ -0,0 +1,78 @@
+"""Tests for the harness itself: worker sizing, shared datasets, frame assertions."""
+
+import math
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from spark_session import GB, MB, ResourceProfile
+from spark_testing import assert_frame_equal, worker_profile
+
+
+@pytest.mark.parametrize("workers, cpus, driver", [
+    (1, 8, 4 * GB),
+    (4, 2, 1536 * MB),
+    (16, 1, 512 * MB),
+])
+def test_worker_profile_splits_the_container(workers, cpus, driver):
+    total = ResourceProfile(cpus=8, memory_bytes=8 * GB, driver_memory_bytes=4 * GB)
+    profile = worker_profile(workers, total)
+    assert (profile.cpus, profile.driver_memory_bytes) == (cpus, driver)
+    assert profile.memory_bytes == 8 * GB // workers
+
+
+def test_datasets_are_shared_parquet(spark, datasets):
+    path = datasets.parquet("loans")
+    assert path.suffix == ".parquet" and path.parent == datasets.cache.cache_dir
+    assert datasets.spark(spark, "loans").count() == datasets.table("loans").num_rows
+
+
+def test_spark_frame_equals_shuffled_pandas(spark, datasets):
+    loans = datasets.pandas("loans", ["loan_id", "application_id", "amount", "term_months"])
+    df = spark.createDataFrame(loans)
+    assert_frame_equal(df, loans.sample(frac=1, random_state=0))
+    with pytest.raises(AssertionError, match="rows differ"):
+        assert_frame_equal(df, loans.sample(frac=1, random_state=0), check_order=True)
+
+
+def test_reports_the_differing_rows(spark):
+    df = spark.createDataFrame(pd.DataFrame({"id": ["a", "b", "c"], "amount": [1, 2, 3]}))
+    expected = pd.DataFrame({"id": ["a", "b", "c"], "amount": [1, 20, 3]})
+    with pytest.raises(AssertionError, match=r"1 of 3 rows differ in columns \['amount'\]"):
+        assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize("expected, message", [
+    (pd.DataFrame({"id": ["a", "b"]}), "columns differ"),
+    (pd.DataFrame({"id": ["a"], "amount": [1]}), "row counts differ"),
+    (pd.DataFrame({"id": ["a", "b"], "amount": [1.0, 2.0]}), "column types differ"),
+])
+def test_shape_and_type_mismatches(spark, expected, message):
+    df = spark.createDataFrame(pd.DataFrame({"id": ["a", "b"], "amount": [1, 2]}))
+    with pytest.raises(AssertionError, match=message):
+        assert_frame_equal(df, expected)
+
+
+def test_casts_when_types_are_not_checked(spark):
+    df = spark.createDataFrame(pd.DataFrame({"id": ["a", "b"], "amount": [1, 2]}))
+    assert_frame_equal(df, pd.DataFrame({"id": ["a", "b"], "amount": [1.0, 2.0]}), check_types=False)
+
+
+def test_nulls_nans_and_float_tolerance():
+    actual = pa.table({"key": ["a", None, "c"], "value": [0.1 + 0.2, math.nan, None]})
+    assert_frame_equal(actual, pa.table({"key": ["a", None, "c"], "value": [0.3, math.nan, None]}))
+    with pytest.raises(AssertionError, match=r"\['value'\]"):
+        assert_frame_equal(actual, pa.table({"key": ["a", None, "c"], "value": [0.31, math.nan, None]}))
+    assert_frame_equal(actual, pa.table({"key": ["a", None, "c"], "value": [0.31, math.nan, None]}), atol=0.02)
+
+
+def test_nested_columns(spark):
+    df = spark.sql("SELECT 1 AS id, named_struct('score', 700, 'result', 'approved') AS latest, array(1, 2) AS xs")
+    expected = pa.table({
+        "id": pa.array([1], pa.int32()),
+        "latest": pa.array([{"score": 700, "result": "approved"}],
+                           pa.struct([("score", pa.int32()), ("result", pa.string())])),
+        "xs": pa.array([[1, 2]], pa.list_(pa.int32())),
+    })
+    assert_frame_equal(df, expected)
@@ -0,0 +1,281 @@
+"""
+Complexity Benchmarks
+=====================
+Measures the performance claims made in the data-structure READMEs and the
+"Time Complexity" notes in string_methods.py, instead of taking them on trust.
+
+Claims checked:
+    sets/README.md          "Performance: Set vs List" - O(1) vs O(n) lookup
+    collections/README.md   deque "O(1) at both ends" (vs list.insert(0)/pop(0))
+    data_structures/README  dict "O(1) lookup by key"
+    string_methods.py       O(n) str methods + the DE utility functions
+
+How it works:
+    1. Each case is run over a sweep of input sizes (per-call time, best of
+       several repeats).
+    2. The log-log slope of time vs size is fitted and compared with the slope
+       the claim predicts (O(1) -> 0, O(n) -> 1, O(n^2) -> 2, ...).
+    3. Results are written as JSON; with --baseline, each case's times are
+       compared to a stored run and the exit code is non-zero on regressions.
+       Nanosecond-scale cases (set/dict lookups) jitter by tens of percent on
+       a shared 2-CPU container, hence the 50% default tolerance.
+
+Usage:
+    python complexity_bench.py --output results.json
+    python complexity_bench.py --baseline baseline.json --tolerance 0.5
+    python complexity_bench.py --quick --update-baseline baseline.json
+    pytest test_complexity_claims.py
+"""
+
+import json
+import platform
+import sys
+import time
+import timeit
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "data_structures" / "strings"))
+
+from string_methods import (  # noqa: E402
+    clean_whitespace,
+    extract_between,
+    is_empty_or_whitespace,
+    normalize_phone,
+    safe_split,
+)
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_SIZES = [1_000, 10_000, 100_000]
+
+# Growth function for each complexity class a README can claim
+MODELS = {
+    "O(1)": lambda n: np.ones_like(n),
+    "O(log n)": np.log,
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * np.log(n),
+    "O(n^2)": lambda n: n ** 2,
+}
+SLOPE_TOLERANCE = 0.35
+
+
+# =============================================================================
+# CASES
+# =============================================================================
+
+@dataclass
+class Case:
+    """
+    A benchmark case.
+
+    setup(n) builds the input once per size and returns a zero-argument
+    callable that performs the operation being measured.
+    """
+    name: str
+    claim: str
+    source: str
+    setup: callable = field(repr=False)
+
+
+def _set_lookup(n):
+    data = set(range(n))
+    return lambda: -1 in data
+
+
+def _list_lookup(n):
+    data = list(range(n))
+    return lambda: -1 in data
+
+
+def _dict_lookup(n):
+    data = {i: i for i in range(n)}
+    key = n // 2
+    return lambda: data.get(key)
+
+
+def _deque_appendleft_popleft(n):
+    data = deque(range(n))
+
+    def op():
+        data.appendleft(0)
+        data.popleft()
+    return op
+
+
+def _list_insert_pop_front(n):
+    data = list(range(n))
+
+    def op():
+        data.insert(0, 0)
+        data.pop(0)
+    return op
+
+
+def _text(n):
+    """n characters of messy whitespace-separated words."""
+    words = ("  alpha", "beta\t", " gamma  ", "delta\n")
+    return ("".join(words) * (n // 24 + 1))[:n]
+
+
+CASES = [
+    Case("set_membership", "O(1)", "sets/README.md", _set_lookup),
+    Case("list_membership", "O(n)", "sets/README.md", _list_lookup),
+    Case("dict_get", "O(1)", "data_structures/README.md", _dict_lookup),
+    Case("deque_appendleft_popleft", "O(1)", "collections/README.md", _deque_appendleft_popleft),
+    Case("list_insert_pop_front", "O(n)", "collections/README.md", _list_insert_pop_front),
+    Case("str_find_missing", "O(n)", "string_methods.py demo_find",
+         lambda n: (lambda t: lambda: t.find("zzz"))(_text(n))),
+    Case("str_split", "O(n)", "string_methods.py demo_split",
+         lambda n: (lambda t: lambda: t.split())(_text(n))),
+    Case("str_translate", "O(n)", "string_methods.py demo_translate",
+         lambda n: (lambda t, tbl: lambda: t.translate(tbl))(_text(n), str.maketrans("", "", "aeiou"))),
+    Case("clean_whitespace", "O(n)", "string_methods.py",
+         lambda n: (lambda t: lambda: clean_whitespace(t))(_text(n))),
+    Case("normalize_phone", "O(n)", "string_methods.py",
+         lambda n: (lambda t: lambda: normalize_phone(t))(("(555) 123-4567 " * (n // 15 + 1))[:n])),
+    Case("safe_split", "O(n)", "string_methods.py",
+         lambda n: (lambda t: lambda: safe_split(t, ",", 8))(("a,b," * (n // 4 + 1))[:n])),
+    Case("extract_between", "O(n)", "string_methods.py",
+         lambda n: (lambda t: lambda: extract_between(t, "<id>", "</id>"))("x" * n + "<id>1</id>")),
+    Case("is_empty_or_whitespace", "O(n)", "string_methods.py",
+         lambda n: (lambda t: lambda: is_empty_or_whitespace(t))(" " * n)),
+]
+
+
+# =============================================================================
+# MEASUREMENT + CURVE FITTING
+# =============================================================================
+
+def time_per_call(op, repeat: int = 5, min_time: float = 0.05) -> float:
+    """Best-of-`repeat` seconds per call, auto-ranging the loop count."""
+    timer = timeit.Timer(op)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 4
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def fit_slope(sizes, seconds) -> float:
+    """Slope of log(time) vs log(size)."""
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+
+def expected_slope(model: str, sizes) -> float:
+    """The log-log slope `model` produces over exactly these sizes."""
+    n = np.asarray(sizes, dtype=float)
+    return fit_slope(n, MODELS[model](n))
+
+
+def best_model(sizes, seconds) -> str:
+    """The model whose time/f(n) ratio is most constant across sizes."""
+    n = np.asarray(sizes, dtype=float)
+    t = np.asarray(seconds, dtype=float)
+    spread = {name: float(np.std(np.log(t / f(n)))) for name, f in MODELS.items()}
+    return min(spread, key=spread.get)
+
+
+def run_case(case: Case, sizes, repeat: int = 5) -> dict:
+    seconds = [time_per_call(case.setup(n), repeat=repeat) for n in sizes]
+    slope = fit_slope(sizes, seconds)
+    claimed = expected_slope(case.claim, sizes)
+    return {
+        "case": case.name,
+        "claim": case.claim,
+        "source": case.source,
+        "sizes": list(sizes),
+        "seconds": seconds,
+        "slope": slope,
+        "expected_slope": claimed,
+        "fitted_model": best_model(sizes, seconds),
+        "claim_holds": abs(slope - claimed) <= SLOPE_TOLERANCE,
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, cases=CASES, repeat: int = 5, names=None) -> dict:
+    """Runs every (selected) case and returns a JSON-serializable result."""
+    selected = [c for c in cases if not names or c.name in names]
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": list(sizes),
+        },
+        "results": [run_case(c, sizes, repeat) for c in selected],
+    }
+
+
+# =============================================================================
+# BASELINE COMPARISON
+# =============================================================================
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = 0.5) -> list:
+    """
+    Compares per-size times against a stored run.
+
+    A case regresses when the median current/baseline ratio over the sizes
+    both runs share exceeds 1 + tolerance. Returns one dict per compared case.
+    """
+    base = {r["case"]: dict(zip(r["sizes"], r["seconds"])) for r in baseline["results"]}
+    report = []
+    for result in current["results"]:
+        previous = base.get(result["case"])
+        if not previous:
+            continue
+        ratios = [t / previous[n] for n, t in zip(result["sizes"], result["seconds"]) if n in previous]
+        if not ratios:
+            continue
+        ratio = float(np.median(ratios))
+        report.append({"case": result["case"], "ratio": ratio, "regressed": ratio > 1 + tolerance})
+    return report
+
+
+def format_results(suite: dict) -> str:
+    lines = [f"{'case':<28}{'claim':>11}{'fitted':>13}{'slope':>8}{'expect':>8}  status",
+             "-" * 76]
+    for r in suite["results"]:
+        status = "✓ PASS" if r["claim_holds"] else "✗ FAIL"
+        lines.append(f"{r['case']:<28}{r['claim']:>11}{r['fitted_model']:>13}"
+                     f"{r['slope']:>8.2f}{r['expected_slope']:>8.2f}  {status}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check complexity claims with a size sweep")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--quick", action="store_true", help=f"use sizes {QUICK_SIZES}")
+    parser.add_argument("--cases", nargs="+", default=None, help="only run these case names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write JSON results here")
+    parser.add_argument("--baseline", type=Path, help="compare against this JSON results file")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown vs baseline")
+    parser.add_argument("--update-baseline", type=Path, help="write results as the new baseline")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    suite = run_suite(sizes, repeat=args.repeat, names=args.cases)
+    print(format_results(suite))
+
+    for path in filter(None, [args.output, args.update_baseline]):
+        path.write_text(json.dumps(suite, indent=2))
+
+    failed = not all(r["claim_holds"] for r in suite["results"])
+    if args.baseline:
+        report = compare_to_baseline(suite, json.loads(args.baseline.read_text()), args.tolerance)
+        print(f"\nBaseline comparison ({args.baseline}, tolerance {args.tolerance:.0%})")
+        print("-" * 76)
+        for row in report:
+            flag = "✗ REGRESSED" if row["regressed"] else "✓ ok"
+            print(f"{row['case']:<28}{row['ratio']:>8.2f}x  {flag}")
+        failed = failed or any(row["regressed"] for row in report)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+pytest entry point for complexity_bench.py.
+
+    pytest test_complexity_claims.py                          # check every claim
+    BENCH_BASELINE=baseline.json pytest test_complexity_claims.py   # + regression gate
+
+Uses the quick size sweep so the suite stays in the seconds range.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from complexity_bench import CASES, QUICK_SIZES, compare_to_baseline, run_case
+
+
+BASELINE = os.environ.get("BENCH_BASELINE")
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", "0.5"))
+
+
+@pytest.fixture(scope="session")
+def results():
+    """Every case measured once, whichever tests (or xdist worker) ask for them."""
+    return {case.name: run_case(case, QUICK_SIZES, repeat=3) for case in CASES}
+
+
+@pytest.mark.parametrize("case", CASES, ids=[c.name for c in CASES])
+def test_claim_holds(case, results):
+    result = results[case.name]
+    assert result["claim_holds"], (
+        f"{case.name}: claimed {case.claim} (slope {result['expected_slope']:.2f}) "
+        f"but measured slope {result['slope']:.2f} (best fit {result['fitted_model']})"
+    )
+
+
+@pytest.mark.skipif(not BASELINE, reason="set BENCH_BASELINE to a stored results file")
+def test_no_regression_vs_baseline(results):
+    baseline = json.loads(Path(BASELINE).read_text())
+    current = {"results": list(results.values())}
+    assert current["results"], "no benchmark results to compare"
+    regressed = [row for row in compare_to_baseline(current, baseline, TOLERANCE) if row["regressed"]]
+    assert not regressed, f"slower than baseline by more than {TOLERANCE:.0%}: {regressed}"
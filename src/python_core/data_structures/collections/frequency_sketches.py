@@ -0,0 +1,438 @@
+"""
+Frequency Sketches - Mergeable Heavy Hitters
+============================================
+Fixed-memory alternatives to `collections.Counter` for high-cardinality keys
+(customer IDs, URLs, ...), following the "DE Example: Log Analysis" pattern in
+collections_module.ipynb:
+
+    level_counts = Counter(log["level"] for log in logs)   # grows with #keys
+    level_counts.most_common(2)
+
+Components:
+    CountMinSketch   point estimates of any key's count (sketch[key])
+    SpaceSaving      top-k heavy hitters (sketch.most_common(n))
+
+Both take the Counter-style API (`update`, `+`) and are mergeable: build one
+sketch per process / Spark partition, ship `to_bytes()` to the driver and add
+them together. Keys are hashed by value (str/bytes as-is, anything else by
+`repr`), with a stable hash, so sketches built in different processes agree.
+
+Error bounds (N = total count added):
+    CountMinSketch(width, depth)
+        true <= estimate, and estimate <= true + (e / width) * N
+        with probability >= 1 - e^-depth. Memory: 8 * width * depth bytes.
+        `CountMinSketch.from_error(epsilon, delta)` picks the size for you.
+    SpaceSaving(k)
+        count - error <= true <= count for every tracked key, error <= N / k,
+        and every key with true count > N / k is tracked. Memory: O(k).
+"""
+
+import hashlib
+import heapq
+import math
+import struct
+import time
+from collections import Counter
+from collections.abc import Mapping
+from functools import reduce
+from itertools import count, islice
+
+import numpy as np
+
+
+# =============================================================================
+# HASHING
+# =============================================================================
+
+def _key_bytes(key) -> bytes:
+    """Type-tagged key bytes, so 1, "1" and b"1" stay distinct keys (as in Counter)."""
+    if isinstance(key, bytes):
+        return b"b:" + key
+    if isinstance(key, str):
+        return b"s:" + key.encode("utf-8")
+    return b"r:" + repr(key).encode("utf-8")
+
+
+def _stable_hashes(keys, seed: int) -> np.ndarray:
+    """64-bit hashes that are identical across processes (unlike hash())."""
+    salt = seed.to_bytes(8, "little")
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(_key_bytes(k), digest_size=8, salt=salt).digest(), "little")
+         for k in keys),
+        dtype=np.uint64,
+        count=len(keys),
+    )
+
+
+def _weighted_chunks(items, chunk_size: int = 65_536):
+    """
+    Counter.update semantics (a mapping of counts, or an iterable of keys),
+    pre-aggregated in bounded chunks so memory stays fixed on long streams.
+    """
+    if isinstance(items, Mapping):
+        yield items
+        return
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield Counter(chunk)
+
+
+# =============================================================================
+# COUNT-MIN SKETCH
+# =============================================================================
+
+class CountMinSketch:
+    """
+    Count-Min Sketch: `depth` rows of `width` counters.
+
+    Example:
+        sketch = CountMinSketch.from_error(epsilon=0.001, delta=0.01)
+        sketch.update(log["service"] for log in logs)
+        sketch["db"]                    # never below the true count
+    """
+
+    _MAGIC = b"CMS2"  # CMS1 hashed untagged keys
+
+    def __init__(self, width: int = 2048, depth: int = 5, seed: int = 0):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be positive")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    @classmethod
+    def from_error(cls, epsilon: float, delta: float, seed: int = 0) -> "CountMinSketch":
+        """Smallest sketch whose overcount is <= epsilon * N with probability 1 - delta."""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)), seed)
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        return math.exp(-self.depth)
+
+    def error_bound(self) -> float:
+        """Max overcount (absolute) with probability 1 - delta, for the data added so far."""
+        return self.epsilon * self.total
+
+    def _columns(self, keys) -> np.ndarray:
+        """(depth, len(keys)) column indices via double hashing h1 + i * h2."""
+        hashes = _stable_hashes(keys, self.seed)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.intp)
+
+    def update(self, items):
+        """Adds an iterable of keys, or a mapping of key -> count."""
+        for counts in _weighted_chunks(items):
+            if not counts:
+                continue
+            keys = list(counts)
+            weights = np.fromiter((counts[k] for k in keys), dtype=np.float64, count=len(keys))
+            columns = self._columns(keys)
+            for row in range(self.depth):
+                self.table[row] += np.bincount(columns[row], weights, minlength=self.width).astype(np.int64)
+            self.total += int(weights.sum())
+
+    def add(self, key, count: int = 1):
+        columns = self._columns([key])[:, 0]
+        self.table[np.arange(self.depth), columns] += count
+        self.total += count
+
+    def estimate_many(self, keys) -> np.ndarray:
+        keys = list(keys)
+        columns = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+    def __getitem__(self, key) -> int:
+        return int(self.estimate_many([key])[0])
+
+    def _check_compatible(self, other: "CountMinSketch"):
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("can only merge sketches with the same width, depth and seed")
+
+    def __add__(self, other: "CountMinSketch") -> "CountMinSketch":
+        self._check_compatible(other)
+        merged = CountMinSketch(self.width, self.depth, self.seed)
+        merged.table = self.table + other.table
+        merged.total = self.total + other.total
+        return merged
+
+    def __iadd__(self, other: "CountMinSketch") -> "CountMinSketch":
+        self._check_compatible(other)
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def to_bytes(self) -> bytes:
+        header = struct.pack("<4sIIqq", self._MAGIC, self.width, self.depth, self.seed, self.total)
+        return header + self.table.astype("<i8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        magic, width, depth, seed, total = struct.unpack_from("<4sIIqq", data)
+        if magic != cls._MAGIC:
+            raise ValueError("not a serialized CountMinSketch")
+        sketch = cls(width, depth, seed)
+        offset = struct.calcsize("<4sIIqq")
+        sketch.table = np.frombuffer(data, dtype="<i8", offset=offset).reshape(depth, width).astype(np.int64)
+        sketch.total = total
+        return sketch
+
+    def __repr__(self) -> str:
+        return f"CountMinSketch(width={self.width}, depth={self.depth}, total={self.total})"
+
+
+# =============================================================================
+# SPACE-SAVING TOP-K
+# =============================================================================
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters: at most `k` (key, count, error) counters.
+
+    A new key evicts the smallest counter and inherits its count as `error`,
+    so counts are overestimates by at most that error (<= N / k).
+
+    Example:
+        top = SpaceSaving(k=100)
+        top.update(log["service"] for log in logs)
+        top.most_common(3)
+    """
+
+    _MAGIC = b"SSK1"
+
+    def __init__(self, k: int = 1000):
+        if k < 1:
+            raise ValueError("k must be positive")
+        self.k = k
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # (count, seq, key) with lazy deletion: stale when count changed
+        self._seq = count()  # tie-breaker, so keys themselves are never compared
+
+    # Heap of current minima; entries go stale instead of being removed
+    def _push(self, key, count: int):
+        heapq.heappush(self._heap, (count, next(self._seq), key))
+        if len(self._heap) > 4 * self.k:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(c, next(self._seq), key) for key, c in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                return key, count
+
+    def add(self, key, count: int = 1):
+        self.total += count
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.k:
+            self.counts[key] = count
+            self.errors[key] = 0
+        else:
+            evicted, floor = self._pop_min()
+            del self.counts[evicted], self.errors[evicted]
+            self.counts[key] = floor + count
+            self.errors[key] = floor
+        self._push(key, self.counts[key])
+
+    def update(self, items):
+        """Adds an iterable of keys, or a mapping of key -> count."""
+        for counts in _weighted_chunks(items):
+            for key, count in counts.items():
+                self.add(key, count)
+
+    def __getitem__(self, key) -> int:
+        """Upper bound on key's count (0 if untracked and fewer than k keys seen)."""
+        if key in self.counts:
+            return self.counts[key]
+        return self.min_count()
+
+    def min_count(self) -> int:
+        return min(self.counts.values()) if len(self.counts) >= self.k else 0
+
+    def guaranteed(self, key) -> int:
+        """Lower bound on key's count."""
+        return self.counts.get(key, 0) - self.errors.get(key, 0)
+
+    def most_common(self, n: int = None) -> list:
+        items = sorted(self.counts.items(), key=lambda kv: (-kv[1], self.errors[kv[0]]))
+        return items if n is None else items[:n]
+
+    def error_bound(self) -> float:
+        return self.total / self.k
+
+    def __add__(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        Merge: keys missing from one side get that side's min count as both
+        count and error, then the k largest counters are kept.
+        """
+        k = max(self.k, other.k)
+        floor_a, floor_b = self.min_count(), other.min_count()
+        combined = {}
+        for key in self.counts.keys() | other.counts.keys():
+            count_a = self.counts.get(key, floor_a)
+            count_b = other.counts.get(key, floor_b)
+            error_a = self.errors.get(key, floor_a)
+            error_b = other.errors.get(key, floor_b)
+            combined[key] = (count_a + count_b, error_a + error_b)
+
+        merged = SpaceSaving(k)
+        merged.total = self.total + other.total
+        for key, (count, error) in heapq.nlargest(k, combined.items(), key=lambda kv: kv[1][0]):
+            merged.counts[key] = count
+            merged.errors[key] = error
+        merged._rebuild_heap()
+        return merged
+
+    def to_bytes(self) -> bytes:
+        """Keys must be str, bytes or int."""
+        parts = [struct.pack("<4sIqI", self._MAGIC, self.k, self.total, len(self.counts))]
+        for key, count in self.counts.items():
+            if isinstance(key, str):
+                tag, raw = b"s", key.encode("utf-8")
+            elif isinstance(key, bytes):
+                tag, raw = b"b", key
+            elif isinstance(key, int):
+                tag, raw = b"i", str(key).encode("ascii")
+            else:
+                raise TypeError(f"cannot serialize key of type {type(key).__name__}")
+            parts.append(struct.pack("<cIqq", tag, len(raw), count, self.errors[key]) + raw)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SpaceSaving":
+        magic, k, total, n = struct.unpack_from("<4sIqI", data)
+        if magic != cls._MAGIC:
+            raise ValueError("not a serialized SpaceSaving sketch")
+        sketch = cls(k)
+        sketch.total = total
+        offset = struct.calcsize("<4sIqI")
+        entry = struct.calcsize("<cIqq")
+        for _ in range(n):
+            tag, size, count, error = struct.unpack_from("<cIqq", data, offset)
+            offset += entry
+            raw = bytes(data[offset:offset + size])
+            offset += size
+            key = raw.decode("utf-8") if tag == b"s" else raw if tag == b"b" else int(raw)
+            sketch.counts[key] = count
+            sketch.errors[key] = error
+        sketch._rebuild_heap()
+        return sketch
+
+    def __repr__(self) -> str:
+        return f"SpaceSaving(k={self.k}, tracked={len(self.counts)}, total={self.total})"
+
+
+# =============================================================================
+# MERGING ACROSS PROCESSES AND SPARK PARTITIONS
+# =============================================================================
+
+def merge_bytes(a: bytes, b: bytes) -> bytes:
+    """Combines two serialized sketches of the same kind (for functools.reduce)."""
+    cls = CountMinSketch if a[:4] == CountMinSketch._MAGIC else SpaceSaving
+    return (cls.from_bytes(a) + cls.from_bytes(b)).to_bytes()
+
+
+def sketch_column(df, column: str, factory):
+    """
+    Sketches one column of a Spark DataFrame: one sketch per partition on the
+    executors (mapInArrow, so it also runs under Spark Connect), serialized,
+    then merged on the driver.
+
+    Example:
+        top = sketch_column(events_df, "customer_id", lambda: SpaceSaving(100))
+    """
+    def build(batches):
+        import pyarrow as pa
+
+        sketch = factory()
+        for batch in batches:
+            sketch.update(batch.column(0).to_pylist())
+        yield pa.RecordBatch.from_pydict({"sketch": [sketch.to_bytes()]})
+
+    # Executors unpickle the sketch classes by module name; ship this file to them
+    spark = df.sparkSession
+    if type(spark).__module__.startswith("pyspark.sql.connect"):  # no SparkContext under Spark Connect
+        spark.addArtifacts(__file__, pyfile=True)
+    else:
+        spark.sparkContext.addPyFile(__file__)
+    parts = [row.sketch for row in df.select(column).mapInArrow(build, "sketch binary").collect()]
+    return type(factory()).from_bytes(reduce(merge_bytes, parts, factory().to_bytes()))
+
+
+# =============================================================================
+# BENCHMARK - accuracy and throughput vs Counter
+# =============================================================================
+
+def _zipf_keys(n: int, distinct: int, seed: int = 0) -> list:
+    ranks = np.random.default_rng(seed).zipf(1.2, n) % distinct
+    return [f"cust_{r}" for r in ranks.tolist()]
+
+
+def benchmark(n: int = 1_000_000, distinct: int = 200_000, k: int = 100):
+    """Zipf-distributed customer IDs: Counter vs CountMinSketch vs SpaceSaving."""
+    keys = _zipf_keys(n, distinct)
+
+    start = time.perf_counter()
+    exact = Counter(keys)
+    counter_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cms = CountMinSketch.from_error(epsilon=0.0005, delta=0.01)
+    cms.update(keys)
+    cms_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top = SpaceSaving(k * 10)
+    top.update(keys)
+    ss_seconds = time.perf_counter() - start
+
+    true_top = exact.most_common(k)
+    true_keys = [key for key, _ in true_top]
+    recall = len(set(true_keys) & {key for key, _ in top.most_common(k)}) / k
+    overcount = cms.estimate_many(true_keys) - np.array([c for _, c in true_top])
+    ss_overcount = [top[key] - exact[key] for key in true_keys]
+
+    rows = [
+        ("Counter", counter_seconds, f"{len(exact):,} keys", "exact"),
+        ("CountMinSketch", cms_seconds, f"{cms.table.nbytes / 1e6:.1f} MB",
+         f"max overcount {overcount.max():,} (bound {cms.error_bound():,.0f})"),
+        ("SpaceSaving", ss_seconds, f"{len(top.counts):,} keys",
+         f"top-{k} recall {recall:.0%}, max overcount {max(ss_overcount):,} (bound {top.error_bound():,.0f})"),
+    ]
+    print(f"n={n:,} Zipf keys over {distinct:,} IDs")
+    print(f"{'structure':<16}{'seconds':>9}{'items/s':>13}  {'memory':<14}accuracy")
+    print("-" * 100)
+    for name, seconds, memory, accuracy in rows:
+        print(f"{name:<16}{seconds:>9.3f}{n / seconds:>13,.0f}  {memory:<14}{accuracy}")
+
+    half = len(keys) // 2
+    left, right = CountMinSketch(cms.width, cms.depth), CountMinSketch(cms.width, cms.depth)
+    left.update(keys[:half])
+    right.update(keys[half:])
+    merged = CountMinSketch.from_bytes((left + right).to_bytes())
+    print(f"\nMerged halves == single pass: {'✓ PASS' if np.array_equal(merged.table, cms.table) else '✗ FAIL'}")
+    print(f"Serialized sizes: CMS {len(cms.to_bytes()):,} bytes, SpaceSaving {len(top.to_bytes()):,} bytes")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Frequency sketch benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=200_000)
+    parser.add_argument("--top", type=int, default=100)
+    args = parser.parse_args()
+    benchmark(args.rows, args.distinct, args.top)
@@ -0,0 +1,448 @@
+"""
+Record Container - Struct of Arrays
+===================================
+Compact storage for loan rows that still reads like the namedtuple pattern in
+collections_module.ipynb (section 4.3, "Processing Database Records"):
+
+    transactions = [Transaction._make(row) for row in raw_data]
+    for txn in transactions:
+        if txn.status == 'completed': ...
+
+A list of namedtuples / dicts pays for a Python object per field (50+ bytes
+for a short str, 28 for an int, 48 for a datetime) plus the row object. Here
+every field is one typed column instead:
+
+    ints / floats         NumPy arrays (int32 / int64 / float64)
+    dates / timestamps    datetime64[D] / datetime64[us]
+    strings (IDs, names)  one UTF-8 byte buffer + int64 offsets (Arrow layout)
+    categoricals          int8/int16 codes + interned category strings
+                          (channel / state / result)
+
+Rows are views: `table[i].amount` reads one slot from one column, and
+`table[a:b]` slices every column without copying. Iterating decodes one
+64k-row chunk of each *accessed* column at a time, so a row-by-row scan costs
+about what building the namedtuples would, without keeping them; filters and
+sums over whole columns (`equals`, `column`) skip Python objects entirely.
+
+Usage:
+    checks = RecordTable.from_csv("csv/loan_applications/credit_checks.csv")
+    approved = sum(r.score for r in checks if r.result == "approved")
+    checks.column("score").mean()          # vectorized, no rows at all
+"""
+
+import math
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "practice_datasets"))
+from dataset_cache import read_source  # noqa: E402
+
+
+# =============================================================================
+# COLUMNS
+# =============================================================================
+
+class _Column:
+    """Base: `values` plus an optional validity mask (None = no nulls)."""
+
+    def __init__(self, values, valid=None):
+        self.values = values
+        self.valid = valid
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _is_null(self, i: int) -> bool:
+        return self.valid is not None and not self.valid[i]
+
+    def _slice_valid(self, key):
+        return None if self.valid is None else self.valid[key]
+
+    def __getitem__(self, i: int):
+        return self.get(i)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (0 if self.valid is None else self.valid.nbytes)
+
+
+class _NumericColumn(_Column):
+    """ints, floats, datetime64; rows get plain Python objects via .item()."""
+
+    def get(self, i: int):
+        return None if self._is_null(i) else self.values[i].item()
+
+    def take(self, key) -> "_NumericColumn":
+        return _NumericColumn(self.values[key], self._slice_valid(key))
+
+    def to_pylist(self) -> list:
+        items = self.values.tolist()
+        if self.valid is not None:
+            items = [v if ok else None for v, ok in zip(items, self.valid.tolist())]
+        return items
+
+    def to_arrow(self) -> pa.Array:
+        mask = None if self.valid is None else ~self.valid
+        return pa.array(self.values, mask=mask)
+
+
+class _StringColumn(_Column):
+    """Arrow layout: row i is data[offsets[i]:offsets[i + 1]] decoded as UTF-8."""
+
+    def __init__(self, offsets, data, valid=None):
+        super().__init__(offsets, valid)
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.values) - 1
+
+    def get(self, i: int):
+        if self._is_null(i):
+            return None
+        return self.data[self.values[i]:self.values[i + 1]].tobytes().decode("utf-8")
+
+    def take(self, key) -> "_StringColumn":
+        if isinstance(key, slice) and key.step in (None, 1):
+            start, stop, _ = key.indices(len(self))
+            stop = max(stop, start)
+            return _StringColumn(self.values[start:stop + 1], self.data, self._slice_valid(key))
+        # Gather: new offsets from the picked lengths, then one fancy-index into data
+        rows = np.arange(len(self))[key]
+        starts, ends = self.values[rows], self.values[rows + 1]
+        lengths = ends - starts
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        byte_index = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return _StringColumn(offsets, self.data[byte_index], self._slice_valid(key))
+
+    def to_arrow(self) -> pa.Array:
+        base = self.values[0]
+        offsets = (self.values - base).astype(np.int64)
+        data = self.data[base:self.values[-1]]
+        array = pa.LargeStringArray.from_buffers(len(self), pa.py_buffer(offsets), pa.py_buffer(data))
+        if self.valid is not None:
+            array = pc.if_else(pa.array(self.valid), array, pa.scalar(None, pa.large_string()))
+        return array.cast(pa.string())
+
+    def to_pylist(self) -> list:
+        return self.to_arrow().to_pylist()
+
+    @property
+    def nbytes(self) -> int:
+        used = self.values[-1] - self.values[0] if len(self.values) else 0
+        return self.values.nbytes + int(used) + (0 if self.valid is None else self.valid.nbytes)
+
+
+class _CategoricalColumn(_Column):
+    """Small-int codes into a tuple of interned strings; -1 is null."""
+
+    def __init__(self, codes, categories):
+        super().__init__(codes)
+        self.categories = tuple(sys.intern(c) for c in categories)
+        self._lookup = self.categories + (None,)  # code -1 -> None
+
+    def get(self, i: int):
+        return self._lookup[self.values[i]]
+
+    def take(self, key) -> "_CategoricalColumn":
+        return _CategoricalColumn(self.values[key], self.categories)
+
+    def code(self, category: str) -> int:
+        return self.categories.index(category) if category in self.categories else -2
+
+    def to_pylist(self) -> list:
+        lookup = self._lookup
+        return [lookup[c] for c in self.values.tolist()]
+
+    def to_arrow(self) -> pa.Array:
+        codes = pa.array(self.values, mask=self.values < 0).cast(pa.int32())
+        return pa.DictionaryArray.from_arrays(codes, pa.array(self.categories, pa.string()))
+
+
+def _column_from_arrow(array) -> _Column:
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks() if array.num_chunks != 1 else array.chunk(0)
+    valid = array.is_valid().to_numpy(zero_copy_only=False) if array.null_count else None
+    kind = array.type
+
+    if pa.types.is_dictionary(kind):
+        categories = array.dictionary.to_pylist()
+        dtype = np.int8 if len(categories) < 127 else np.int16 if len(categories) < 32_767 else np.int32
+        codes = pc.fill_null(array.indices, -1).to_numpy(zero_copy_only=False).astype(dtype)
+        return _CategoricalColumn(codes, categories)
+    if pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        array = array.cast(pa.large_string())
+        _, offsets_buffer, data_buffer = array.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+        data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.empty(0, np.uint8)
+        return _StringColumn(offsets.copy(), data.copy(), valid)
+    if pa.types.is_date32(kind):
+        values = pc.fill_null(array, 0).cast(pa.int32()).to_numpy().astype("datetime64[D]")
+        return _NumericColumn(values, valid)
+    if pa.types.is_timestamp(kind):
+        values = pc.fill_null(array.cast(pa.timestamp("us")), 0).to_numpy(zero_copy_only=False)
+        return _NumericColumn(values.astype("datetime64[us]"), valid)
+    if pa.types.is_integer(kind) or pa.types.is_floating(kind) or pa.types.is_boolean(kind):
+        return _NumericColumn(pc.fill_null(array, 0).to_numpy(zero_copy_only=False), valid)
+    raise TypeError(f"unsupported column type: {kind}")
+
+
+# =============================================================================
+# ROWS
+# =============================================================================
+
+class _DecodedChunk(dict):
+    """
+    Column position -> Python list for one chunk of rows, decoded on first
+    access, so a scan only pays for the fields it actually reads.
+    """
+
+    def __init__(self, columns: tuple):
+        super().__init__()
+        self.columns = columns
+
+    def __missing__(self, position: int) -> list:
+        values = self[position] = self.columns[position].to_pylist()
+        return values
+
+
+def _make_row_class(fields: tuple):
+    """
+    A namedtuple-like view class: attribute and index access, iteration,
+    _asdict / _fields, equality with tuples. Holds only (columns, index);
+    `columns[position][index]` is either a column (random access) or a
+    decoded chunk list (iteration).
+    """
+    def make_getter(position):
+        return property(lambda self: self._columns[position][self._index])
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    def __iter__(self):
+        columns, index = self._columns, self._index
+        return (columns[position][index] for position in range(len(fields)))
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return tuple(self)[position]
+        return self._columns[range(len(fields))[position]][self._index]
+
+    namespace = {
+        "__slots__": ("_columns", "_index"),
+        "_fields": fields,
+        "__init__": __init__,
+        "__iter__": __iter__,
+        "__getitem__": __getitem__,
+        "__len__": lambda self: len(fields),
+        "__eq__": lambda self, other: tuple(self) == tuple(other),
+        "__hash__": lambda self: hash(tuple(self)),
+        "__repr__": lambda self: "Row(" + ", ".join(f"{f}={v!r}" for f, v in zip(fields, self)) + ")",
+        "_asdict": lambda self: dict(zip(fields, self)),
+    }
+    namespace.update({name: make_getter(i) for i, name in enumerate(fields)})
+    return type("Row", (), namespace)
+
+
+# =============================================================================
+# TABLE
+# =============================================================================
+
+class RecordTable:
+    """
+    Columnar container of records with row-view access.
+
+    table[i]        -> Row view (namedtuple-like)
+    table[a:b]      -> RecordTable sharing the same buffers (no copy)
+    table[mask]     -> RecordTable with the selected rows (a copy, like NumPy)
+    for row in table: ...
+    """
+
+    def __init__(self, columns: dict):
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {lengths}")
+        self._names = tuple(columns)
+        self._columns = tuple(columns.values())
+        self._length = lengths.pop() if lengths else 0
+        self._row_class = _make_row_class(self._names)
+
+    # -- construction ---------------------------------------------------------
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> "RecordTable":
+        return cls({name: _column_from_arrow(table.column(name)) for name in table.column_names})
+
+    @classmethod
+    def from_csv(cls, path) -> "RecordTable":
+        """Parses with the typed loan schemas from dataset_cache (categoricals become codes)."""
+        return cls.from_arrow(read_source(Path(path)))
+
+    @classmethod
+    def from_records(cls, records: list, schema: pa.Schema = None) -> "RecordTable":
+        """From dicts (e.g. clean_record_solution output) or namedtuples."""
+        if records and not isinstance(records[0], dict):
+            records = [r._asdict() for r in records]
+        return cls.from_arrow(pa.Table.from_pylist(records, schema=schema))
+
+    # -- access ---------------------------------------------------------------
+
+    @property
+    def fields(self) -> tuple:
+        return self._names
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += self._length
+            if not 0 <= index < self._length:
+                raise IndexError("RecordTable index out of range")
+            return self._row_class(self._columns, index)
+        return RecordTable({name: column.take(key) for name, column in zip(self._names, self._columns)})
+
+    def __iter__(self, chunk_rows: int = 65_536):
+        row_class = self._row_class
+        for start in range(0, self._length, chunk_rows):
+            chunk = _DecodedChunk(self[start:start + chunk_rows]._columns)
+            for index in range(min(chunk_rows, self._length - start)):
+                yield row_class(chunk, index)
+
+    def itertuples(self, chunk_rows: int = 65_536):
+        """Plain tuples, decoded a chunk of columns at a time (fastest full scan)."""
+        for start in range(0, self._length, chunk_rows):
+            chunk = self[start:start + chunk_rows]
+            yield from zip(*(column.to_pylist() for column in chunk._columns))
+
+    def column(self, name: str) -> np.ndarray:
+        """The raw NumPy column (codes for categoricals, offsets for strings: use to_arrow for those)."""
+        return self._columns[self._names.index(name)].values
+
+    def equals(self, name: str, value) -> np.ndarray:
+        """Vectorized `row.name == value` mask; categoricals compare one small int code."""
+        column = self._columns[self._names.index(name)]
+        if isinstance(column, _CategoricalColumn):
+            return column.values == column.code(value)
+        if isinstance(column, _StringColumn):
+            return pc.equal(column.to_arrow(), value).to_numpy(zero_copy_only=False)
+        return column.values == value
+
+    def to_arrow(self) -> pa.Table:
+        return pa.table({name: column.to_arrow() for name, column in zip(self._names, self._columns)})
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns)
+
+    def __repr__(self) -> str:
+        return f"RecordTable({self._length:,} rows, fields={self._names}, {self.nbytes / 1e6:.1f} MB)"
+
+
+# =============================================================================
+# BENCHMARK - memory and throughput vs namedtuple / dict / __slots__
+# =============================================================================
+
+def _deep_size(obj, seen: set) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, tuple):
+        size += sum(_deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_size(getattr(obj, s), seen) for s in obj.__slots__)
+    return size
+
+
+def _bytes_per_row(rows: list, sample: int = 20_000) -> float:
+    """Deep size of a sample of rows (shared objects counted once) / sample size."""
+    picked = rows[:sample]
+    seen = set()
+    return (sum(_deep_size(r, seen) for r in picked) + sys.getsizeof(rows) * len(picked) / len(rows)) / len(picked)
+
+
+def benchmark(n: int = 10_000_000):
+    """Credit checks (IDs, timestamp, categorical result, int score) in four layouts."""
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "practice_datasets"))
+    from synthetic_generator import GeneratorConfig, generate_credit_checks
+
+    config = GeneratorConfig(applications=math.ceil(n / 1.2) + 1, rows_per_partition=2_000_000)
+    arrow = pa.concat_tables(generate_credit_checks(config, p) for p in range(config.partitions)).slice(0, n)
+    arrow = arrow.set_column(3, "result", pc.dictionary_encode(arrow.column("result")))
+    fields = tuple(arrow.column_names)
+
+    Check = namedtuple("Check", fields)
+
+    class SlotsCheck:
+        __slots__ = fields
+
+        def __init__(self, *values):
+            for name, value in zip(fields, values):
+                setattr(self, name, value)
+
+    results = []
+
+    def measure(name, build, bytes_per_row=None):
+        start = time.perf_counter()
+        rows = build()
+        built = time.perf_counter() - start
+        start = time.perf_counter()
+        if isinstance(rows[0], dict):
+            total = sum(r["score"] for r in rows if r["result"] == "approved")
+        else:
+            total = sum(r.score for r in rows if r.result == "approved")
+        scan = time.perf_counter() - start
+        per_row = bytes_per_row(rows) if bytes_per_row else _bytes_per_row(rows)
+        results.append((name, per_row * n / 1e6, built, scan, total))
+        return rows
+
+    def python_columns():
+        return [c.to_pylist() for c in RecordTable.from_arrow(arrow)._columns]
+
+    measure("namedtuple", lambda: [Check(*values) for values in zip(*python_columns())])
+    measure("dict", lambda: [dict(zip(fields, values)) for values in zip(*python_columns())])
+    measure("__slots__", lambda: [SlotsCheck(*values) for values in zip(*python_columns())])
+    table = measure("RecordTable", lambda: RecordTable.from_arrow(arrow), lambda rows: rows.nbytes / len(rows))
+
+    start = time.perf_counter()
+    mask = table.equals("result", "approved")
+    vectorized_total = int(table.column("score")[mask].sum())
+    vectorized = time.perf_counter() - start
+
+    print(f"{n:,} credit-check rows (approved score total as the scan)")
+    print(f"{'layout':<14}{'memory MB':>11}{'build s':>10}{'scan s':>10}")
+    print("-" * 45)
+    for name, megabytes, built, scan, total in results:
+        print(f"{name:<14}{megabytes:>11,.0f}{built:>10.2f}{scan:>10.2f}")
+    print(f"{'  vectorized':<14}{'':>11}{'':>10}{vectorized:>10.3f}")
+    ok = len({r[4] for r in results} | {vectorized_total}) == 1
+    print(f"\nAll layouts agree: {'✓ PASS' if ok else '✗ FAIL'}")
+    print(f"Slice is a view: {np.shares_memory(table[10:20].column('score'), table.column('score'))}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Struct-of-arrays record container")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--csv", help="load a practice CSV and show a few rows instead")
+    args = parser.parse_args()
+
+    if args.csv:
+        table = RecordTable.from_csv(args.csv)
+        print(table)
+        for row in table[:3]:
+            print(row)
+    else:
+        benchmark(args.rows)
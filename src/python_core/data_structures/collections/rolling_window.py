@@ -0,0 +1,467 @@
+"""
+Rolling Windows - Array-Backed
+==============================
+Replacement for the `deque(maxlen=...)` rolling-average pattern from
+collections_module.ipynb (section 3.2):
+
+    window = deque(maxlen=3)
+    for price in prices:
+        window.append(price)
+        avg = sum(window) / len(window)      # O(window) per push, boxed floats
+
+Components:
+    RollingWindow(size)         last N values, NumPy ring buffer
+    TimeWindow(duration)        values in (t - duration, t], e.g. last 1h of `timestamp`
+    rolling_batch(values, n)    all count-based windows of an array at once
+    rolling_time_batch(ts, values, duration)
+                                all time-based windows of an array at once
+
+Streaming aggregates are O(1) amortized per update:
+    sum / mean / variance   running sums of (x - shift), re-summed from the buffer
+                            every `size` pushes so float drift cannot build up
+    min / max               monotonic queues stored in NumPy arrays
+
+Batch semantics match `pandas.Series.rolling(window, min_periods=1)`: the first
+N-1 results cover partial windows, like the deque version does, and NaNs are
+skipped (a window of only NaNs gives NaN, count 0).
+"""
+
+import math
+import time
+from array import array
+from collections import deque
+
+import numpy as np
+
+
+# =============================================================================
+# BUILDING BLOCKS
+# =============================================================================
+
+class _MonotonicQueue:
+    """
+    Array-backed monotonic queue for sliding min (or max).
+
+    Holds (value, key) pairs whose values are monotonic from head to tail;
+    the head is always the current extreme. Each pair is pushed and popped at
+    most once, so updates are O(1) amortized.
+    """
+
+    def __init__(self, capacity: int, is_max: bool):
+        self.values = array("d", bytes(8 * capacity))
+        self.keys = array("q", bytes(8 * capacity))
+        self.is_max = is_max
+        self.head = 0
+        self.count = 0
+
+    def _grow(self):
+        capacity = len(self.values)
+        order = [(self.head + i) % capacity for i in range(self.count)]
+        self.values = array("d", [self.values[i] for i in order]) + array("d", bytes(8 * capacity))
+        self.keys = array("q", [self.keys[i] for i in order]) + array("q", bytes(8 * capacity))
+        self.head = 0
+
+    def push(self, value: float, key: int):
+        values = self.values
+        capacity = len(values)
+        head, count = self.head, self.count
+        if self.is_max:
+            while count and values[(head + count - 1) % capacity] <= value:
+                count -= 1
+        else:
+            while count and values[(head + count - 1) % capacity] >= value:
+                count -= 1
+        if count == capacity:
+            self.count = count
+            self._grow()
+            values, capacity, head = self.values, len(self.values), 0
+        slot = (head + count) % capacity
+        values[slot] = value
+        self.keys[slot] = key
+        self.count = count + 1
+
+    def evict_before(self, min_key: int):
+        keys = self.keys
+        capacity = len(keys)
+        while self.count and keys[self.head] < min_key:
+            self.head = (self.head + 1) % capacity
+            self.count -= 1
+
+    def peek(self) -> float:
+        return self.values[self.head] if self.count else math.nan
+
+
+class _RunningMoments:
+    """Sum and sum of squares of (x - shift); shift keeps variance numerically stable."""
+
+    def __init__(self):
+        self.shift = 0.0
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def add(self, x: float):
+        d = x - self.shift
+        self.sum += d
+        self.sumsq += d * d
+
+    def remove(self, x: float):
+        d = x - self.shift
+        self.sum -= d
+        self.sumsq -= d * d
+
+    def rebuild(self, values: np.ndarray):
+        self.shift = float(values[0]) if len(values) else 0.0
+        d = values - self.shift
+        self.sum = float(d.sum())
+        self.sumsq = float(np.dot(d, d))
+
+    def total(self, n: int) -> float:
+        return self.sum + self.shift * n
+
+    def variance(self, n: int, ddof: int) -> float:
+        if n - ddof <= 0:
+            return math.nan
+        return max((self.sumsq - self.sum * self.sum / n) / (n - ddof), 0.0)
+
+
+# =============================================================================
+# COUNT-BASED WINDOW
+# =============================================================================
+
+class RollingWindow:
+    """
+    The last `size` values, with O(1) amortized sum/mean/min/max/variance.
+
+    Example:
+        window = RollingWindow(3)
+        for price in [100, 102, 104, 103]:
+            window.push(price)
+            avg = window.mean()
+    """
+
+    def __init__(self, size: int, ddof: int = 1):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.ddof = ddof
+        self._buffer = array("d", bytes(8 * size))
+        self._view = np.frombuffer(self._buffer, dtype=np.float64)
+        self._pushed = 0
+        self._moments = _RunningMoments()
+        self._min = _MonotonicQueue(size, is_max=False)
+        self._max = _MonotonicQueue(size, is_max=True)
+
+    def __len__(self) -> int:
+        return min(self._pushed, self.size)
+
+    def push(self, value: float):
+        value = float(value)
+        size, pushed = self.size, self._pushed
+        slot = pushed % size
+        if pushed >= size:
+            self._moments.remove(self._buffer[slot])
+        self._buffer[slot] = value
+        self._pushed = pushed = pushed + 1
+        if pushed == 1 or slot == size - 1:
+            self._moments.rebuild(self.values())
+        else:
+            self._moments.add(value)
+
+        oldest = pushed - size
+        self._min.push(value, pushed - 1)
+        self._min.evict_before(oldest)
+        self._max.push(value, pushed - 1)
+        self._max.evict_before(oldest)
+
+    def extend(self, values):
+        for value in values:
+            self.push(value)
+
+    def values(self) -> np.ndarray:
+        """Window contents, oldest first (a copy)."""
+        n = len(self)
+        if n < self.size:
+            return self._view[:n].copy()
+        return np.roll(self._view, -(self._pushed % self.size))
+
+    def sum(self) -> float:
+        return self._moments.total(len(self))
+
+    def mean(self) -> float:
+        n = len(self)
+        return self.sum() / n if n else math.nan
+
+    def var(self) -> float:
+        return self._moments.variance(len(self), self.ddof)
+
+    def std(self) -> float:
+        return math.sqrt(self.var())
+
+    def min(self) -> float:
+        return self._min.peek()
+
+    def max(self) -> float:
+        return self._max.peek()
+
+
+# =============================================================================
+# TIME-BASED WINDOW
+# =============================================================================
+
+class TimeWindow:
+    """
+    Values whose timestamps fall in (latest - duration, latest].
+
+    Timestamps must be pushed in non-decreasing order; they can be
+    numpy.datetime64, datetime, ISO strings or integer nanoseconds.
+
+    Example:
+        window = TimeWindow(np.timedelta64(1, "h"))
+        window.push("2024-01-09T14:22:00", 1.0)
+    """
+
+    def __init__(self, duration, ddof: int = 1, initial_capacity: int = 1024):
+        self.duration = int(np.timedelta64(duration, "ns").astype(np.int64))
+        self.ddof = ddof
+        self._times = array("q", bytes(8 * initial_capacity))
+        self._values = array("d", bytes(8 * initial_capacity))
+        self._head = 0
+        self._count = 0
+        self._evicted_since_rebuild = 0
+        self._moments = _RunningMoments()
+        self._min = _MonotonicQueue(initial_capacity, is_max=False)
+        self._max = _MonotonicQueue(initial_capacity, is_max=True)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _to_ns(timestamp) -> int:
+        if isinstance(timestamp, (int, np.integer)):
+            return int(timestamp)
+        return int(np.datetime64(timestamp, "ns").astype(np.int64))
+
+    def _grow(self):
+        capacity = len(self._times)
+        order = (self._head + np.arange(self._count)) % capacity
+        times = np.frombuffer(self._times, dtype=np.int64)[order]
+        values = np.frombuffer(self._values, dtype=np.float64)[order]
+        self._times = array("q", times.tobytes()) + array("q", bytes(8 * capacity))
+        self._values = array("d", values.tobytes()) + array("d", bytes(8 * capacity))
+        self._head = 0
+
+    def push(self, timestamp, value: float):
+        now = self._to_ns(timestamp)
+        value = float(value)
+        times = self._times
+        if self._count and now < times[(self._head + self._count - 1) % len(times)]:
+            raise ValueError("timestamps must be pushed in non-decreasing order")
+        if self._count == len(times):
+            self._grow()
+            times = self._times
+
+        capacity = len(times)
+        slot = (self._head + self._count) % capacity
+        times[slot] = now
+        self._values[slot] = value
+        self._count += 1
+        self._moments.add(value)
+
+        cutoff = now - self.duration
+        while self._count and times[self._head] <= cutoff:
+            self._moments.remove(self._values[self._head])
+            self._head = (self._head + 1) % capacity
+            self._count -= 1
+            self._evicted_since_rebuild += 1
+        if self._count == 1 or self._evicted_since_rebuild >= max(self._count, 1024):
+            self._moments.rebuild(self.values())
+            self._evicted_since_rebuild = 0
+
+        self._min.push(value, now)
+        self._min.evict_before(cutoff + 1)
+        self._max.push(value, now)
+        self._max.evict_before(cutoff + 1)
+
+    def values(self) -> np.ndarray:
+        order = (self._head + np.arange(self._count)) % len(self._times)
+        return np.frombuffer(self._values, dtype=np.float64)[order]
+
+    def sum(self) -> float:
+        return self._moments.total(self._count)
+
+    def mean(self) -> float:
+        return self.sum() / self._count if self._count else math.nan
+
+    def var(self) -> float:
+        return self._moments.variance(self._count, self.ddof)
+
+    def std(self) -> float:
+        return math.sqrt(self.var())
+
+    def min(self) -> float:
+        return self._min.peek()
+
+    def max(self) -> float:
+        return self._max.peek()
+
+
+# =============================================================================
+# BATCH MODE
+# =============================================================================
+
+def _windowed_moments(values: np.ndarray, left: np.ndarray, ddof: int) -> dict:
+    """
+    sum/mean/var for windows values[left[i]:i+1] via shifted prefix sums.
+    NaNs are skipped like pandas does: they add 0 to the sums and nothing to
+    the count, so one NaN cannot poison every later prefix difference.
+    """
+    valid = ~np.isnan(values)
+    shift = values[valid].mean() if valid.any() else 0.0
+    d = np.where(valid, values - shift, 0.0)
+    c0 = np.concatenate([[0], np.cumsum(valid)])
+    c1 = np.concatenate([[0.0], np.cumsum(d)])
+    c2 = np.concatenate([[0.0], np.cumsum(d * d)])
+    right = np.arange(1, len(values) + 1)
+    count = c0[right] - c0[left]
+    s1 = c1[right] - c1[left]
+    s2 = c2[right] - c2[left]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = np.where(count - ddof > 0, np.maximum(s2 - s1 * s1 / count, 0.0) / (count - ddof), np.nan)
+        total = np.where(count > 0, s1 + shift * count, np.nan)
+        mean = total / count
+    return {"count": count, "sum": total, "mean": mean, "var": var}
+
+
+def _sliding_extreme(values: np.ndarray, size: int, ufunc) -> np.ndarray:
+    """
+    van Herk / Gil-Werman sliding min/max: O(n) regardless of window size.
+    Returns one result per *full* window (len(values) - size + 1 entries).
+    """
+    n = len(values)
+    fill = np.inf if ufunc in (np.minimum, np.fmin) else -np.inf
+    blocks = -(-n // size)
+    padded = np.full(blocks * size, fill)
+    padded[:n] = values
+    grid = padded.reshape(blocks, size)
+    prefix = ufunc.accumulate(grid, axis=1).ravel()
+    suffix = ufunc.accumulate(grid[:, ::-1], axis=1)[:, ::-1].ravel()
+    starts = np.arange(n - size + 1)
+    return ufunc(suffix[starts], prefix[starts + size - 1])
+
+
+def rolling_batch(values, size: int, ddof: int = 1) -> dict:
+    """
+    Every count-based window of `values` at once.
+
+    Returns:
+        Dict of arrays (count, sum, mean, var, std, min, max), one entry per
+        input position; the first size-1 entries are partial windows.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    left = np.maximum(np.arange(n) - size + 1, 0)
+    result = _windowed_moments(x, left, ddof)
+    result["std"] = np.sqrt(result["var"])
+
+    head = min(size - 1, n)
+    empty = result["count"] == 0  # all-NaN windows: fmin/fmax skip NaNs and would return +-inf
+    result["min"] = np.where(empty, np.nan, np.concatenate([
+        np.fmin.accumulate(x[:head]), _sliding_extreme(x, size, np.fmin) if n >= size else []]))
+    result["max"] = np.where(empty, np.nan, np.concatenate([
+        np.fmax.accumulate(x[:head]), _sliding_extreme(x, size, np.fmax) if n >= size else []]))
+    return result
+
+
+def _range_extreme(values: np.ndarray, left: np.ndarray, ufunc) -> np.ndarray:
+    """
+    Range min/max for [left[i], i] with a sparse table: O(n log n) build,
+    O(1) per query, all vectorized.
+    """
+    n = len(values)
+    table = [values]
+    span = 1
+    while span * 2 <= n:
+        prev = table[-1]
+        table.append(ufunc(prev[:-span], prev[span:]))
+        span *= 2
+    right = np.arange(n)
+    length = right - left + 1
+    level = np.floor(np.log2(length)).astype(np.int64)
+    out = np.empty(n)
+    for k in np.unique(level):
+        mask = level == k
+        row = table[k]
+        out[mask] = ufunc(row[left[mask]], row[right[mask] - (1 << k) + 1])
+    return out
+
+
+def rolling_time_batch(timestamps, values, duration, ddof: int = 1) -> dict:
+    """
+    Every time-based window (t - duration, t] of sorted `timestamps` at once.
+    Matches `pandas.Series.rolling("1h")` on a sorted DatetimeIndex.
+    """
+    ts = np.asarray(timestamps, dtype="datetime64[ns]").astype(np.int64)
+    if np.any(ts[1:] < ts[:-1]):
+        raise ValueError("timestamps must be sorted")
+    x = np.asarray(values, dtype=np.float64)
+    window = int(np.timedelta64(duration, "ns").astype(np.int64))
+    left = np.searchsorted(ts, ts - window, side="right")
+    result = _windowed_moments(x, left, ddof)
+    result["std"] = np.sqrt(result["var"])
+    empty = result["count"] == 0
+    result["min"] = np.where(empty, np.nan, _range_extreme(x, left, np.fmin))
+    result["max"] = np.where(empty, np.nan, _range_extreme(x, left, np.fmax))
+    return result
+
+
+# =============================================================================
+# BENCHMARK - deque recompute vs ring buffer vs batch
+# =============================================================================
+
+def benchmark(n: int = 1_000_000, size: int = 1_000) -> dict:
+    """Rolling mean over `n` prices with a `size` window, three ways."""
+    prices = np.random.default_rng(0).normal(100, 5, n)
+    as_list = prices.tolist()
+    timings = {}
+
+    start = time.perf_counter()
+    window = deque(maxlen=size)
+    for price in as_list:
+        window.append(price)
+        sum(window) / len(window)
+    timings["deque + sum()"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rolling = RollingWindow(size)
+    for price in as_list:
+        rolling.push(price)
+        rolling.mean()
+    timings["RollingWindow.push"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rolling_batch(prices, size)
+    timings["rolling_batch"] = time.perf_counter() - start
+
+    print(f"Rolling mean, n={n:,}, window={size:,}")
+    print(f"{'method':<22}{'seconds':>10}{'updates/s':>14}")
+    print("-" * 46)
+    for name, seconds in timings.items():
+        print(f"{name:<22}{seconds:>10.3f}{n / seconds:>14,.0f}")
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rolling window demo + benchmark")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--window", type=int, default=1_000)
+    args = parser.parse_args()
+
+    # Same example as the collections notebook
+    window = RollingWindow(3)
+    for price in [100, 102, 104, 103]:
+        window.push(price)
+        print(f"push({price}) -> mean={window.mean():.2f} min={window.min()} max={window.max()}")
+    print()
+    benchmark(args.rows, args.window)
@@ -0,0 +1,536 @@
+"""
+External-Memory Order-Preserving Dedup
+======================================
+"Remove duplicates while preserving order" from list_comprehension.ipynb
+
+    seen = set()
+    [x for x in lst if not (x in seen or seen.add(x))]
+
+for keys that do not fit in a Python set: `application_id` / `credit_check_id`
+across hundreds of files.
+
+How it works:
+    1. Rows are streamed in Arrow batches, file by file, and numbered with a
+       global sequence (`_seq`) - the arrival order.
+    2. Batches are buffered in memory while they fit in the budget. Once the
+       budget is exceeded, the buffer and everything after it is
+       hash-partitioned by key into P spill files (Arrow IPC); all rows of a
+       key land in the same partition.
+    3. Partitions are deduplicated in parallel. Per partition, Arrow's
+       group_by gives a group id per row, and one NumPy lexsort picks the
+       winner of each group:
+           keep="first"    the row with the smallest _seq
+           keep="latest"   the row with the largest `latest_by` value
+                           (nulls lose, ties go to the first row)
+       Each winner is tagged with `_order` = the _seq of its key's first
+       occurrence, so "latest" rows take the place of the first occurrence
+       (like updating a dict: the key keeps its insertion position). The
+       result is written sorted by `_order`. A partition that is still over
+       budget is re-split with another hash seed.
+    4. The sorted partition outputs are merged by `_order` in bounded chunks,
+       so the output streams in first-occurrence order without ever holding
+       all keys in memory.
+
+Spark equivalent: `dedup_spark()` does the same with groupBy + min/max of a
+struct (the "latest check via max(struct)" pattern of loan_funnel_etl.py),
+ordered by an explicit arrival column.
+
+Usage:
+    for batch in dedup_batches(credit_check_files, key="credit_check_id",
+                               keep="latest", latest_by="check_time",
+                               memory_budget=256 * MB):
+        ...
+    for row in dedup(["a.csv", "b.csv"], key="application_id"):   # dict rows
+        ...
+"""
+
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+
+
+MB = 1024 * 1024
+DEFAULT_MEMORY_BUDGET = 256 * MB
+DEFAULT_BATCH_ROWS = 64 * 1024
+MAX_SPLIT_DEPTH = 3
+
+# In-memory cost of a partition relative to its Arrow size: the rows, the
+# group_by hash table and the sort permutation.
+MEMORY_OVERHEAD = 4
+
+SEQ = "_seq"
+ORDER = "_order"
+
+
+# =============================================================================
+# INPUT
+# =============================================================================
+
+def _files(sources) -> list:
+    """Expands files / directories (sorted) in the order given."""
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    files = []
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob("*") if p.is_file() and not p.name.startswith((".", "_"))))
+        else:
+            files.append(path)
+    return files
+
+
+def _iter_batches(sources, batch_rows: int = DEFAULT_BATCH_ROWS):
+    """
+    Record batches in arrival order. `sources` is a path, a list of paths, or
+    an iterable of pyarrow RecordBatches / Tables.
+    """
+    if isinstance(sources, (pa.RecordBatch, pa.Table)):
+        sources = [sources]
+    sources = list(sources) if not isinstance(sources, (str, Path)) else [sources]
+    if sources and isinstance(sources[0], (pa.RecordBatch, pa.Table)):
+        for item in sources:
+            yield from item.to_batches(max_chunksize=batch_rows) if isinstance(item, pa.Table) else [item]
+        return
+    schema = None
+    for path in _files(sources):
+        file_format = {".csv": "csv", ".parquet": "parquet", ".arrow": "ipc"}.get(path.suffix)
+        if file_format is None:
+            raise ValueError(f"unsupported input type: {path.suffix}")
+        # Files after the first are read with its schema, so types never drift
+        dataset = ds.dataset(str(path), format=file_format, schema=schema)
+        schema = schema or dataset.schema
+        yield from dataset.to_batches(batch_size=batch_rows, use_threads=False)
+
+
+def _hash_keys(batch, keys: list, seed: int) -> np.ndarray:
+    """
+    64-bit hashes of the key columns, stable across processes. Keys are
+    hashed as strings: to_pandas() turns an int column into float64 only in
+    batches holding a null, and 9.0 / 9 would land in different partitions.
+    """
+    frame = pd.DataFrame({key: pc.cast(batch.column(key), pa.string()).to_numpy(zero_copy_only=False)
+                          for key in keys})
+    return pd.util.hash_pandas_object(frame, index=False, hash_key=f"dedup{seed:011d}"[:16]).to_numpy()
+
+
+# =============================================================================
+# SPILLING
+# =============================================================================
+
+class _SpillWriter:
+    """Hash-partitions whole rows into lazily opened Arrow IPC streams."""
+
+    def __init__(self, directory: Path, prefix: str, partitions: int, schema: pa.Schema):
+        self.directory = directory
+        self.prefix = prefix
+        self.partitions = partitions
+        self.schema = schema
+        self.writers = {}
+        self.rows = 0
+        self.bytes = 0
+
+    def path(self, partition: int) -> Path:
+        return self.directory / f"{self.prefix}-{partition:05d}.arrow"
+
+    def write(self, batch: pa.RecordBatch, keys: list, seed: int):
+        if not batch.num_rows:
+            return
+        part = (_hash_keys(batch, keys, seed) % np.uint64(self.partitions)).astype(np.int64)
+        order = np.argsort(part, kind="stable")  # stable: rows keep their arrival order
+        bounds = np.searchsorted(part[order], np.arange(self.partitions + 1))
+        ordered = batch.take(pa.array(order))
+        for partition in np.flatnonzero(np.diff(bounds)):
+            chunk = ordered.slice(bounds[partition], bounds[partition + 1] - bounds[partition])
+            writer = self.writers.get(partition)
+            if writer is None:
+                writer = self.writers[partition] = pa.ipc.new_stream(str(self.path(partition)), self.schema)
+            writer.write_batch(chunk)
+        self.rows += batch.num_rows
+        self.bytes += batch.nbytes
+
+    def close(self) -> list:
+        for writer in self.writers.values():
+            writer.close()
+        return [self.path(p) for p in sorted(self.writers)]
+
+
+def _read_table(path) -> pa.Table:
+    with pa.ipc.open_stream(str(path)) as reader:
+        return reader.read_all()
+
+
+# =============================================================================
+# DEDUPLICATING ONE PARTITION
+# =============================================================================
+
+def _winners(table: pa.Table, keys: list, keep: str, latest_by: str) -> pa.Table:
+    """One row per key with its `_order`, sorted by `_order`."""
+    n = table.num_rows
+    if not n:
+        return table.append_column(ORDER, pa.array([], pa.int64()))
+    grouped = table.select(keys).append_column("_row", pa.array(np.arange(n))).group_by(keys, use_threads=False)
+    lists = grouped.aggregate([("_row", "list")])["_row_list"]
+    group = np.empty(n, dtype=np.int64)
+    group[pc.list_flatten(lists).to_numpy()] = pc.list_parent_indices(lists).to_numpy()
+
+    seq = table[SEQ].to_numpy()
+    first_seq = np.full(len(lists), np.iinfo(np.int64).max)
+    np.minimum.at(first_seq, group, seq)
+
+    if keep == "first":
+        by = (seq, group)
+    else:
+        latest = table[latest_by]
+        if pa.types.is_timestamp(latest.type) or pa.types.is_date(latest.type):
+            latest = latest.cast(pa.int64())
+        valid = pc.is_valid(latest).to_numpy(zero_copy_only=False)
+        values = pc.fill_null(latest, 0).to_numpy(zero_copy_only=False)
+        by = (seq, -values, ~valid, group)  # last key sorts first: group, then non-null, newest, earliest
+    order = np.lexsort(by)
+    first_of_group = np.r_[True, group[order][1:] != group[order][:-1]]
+    chosen = order[first_of_group]
+
+    result = table.take(pa.array(chosen)).append_column(ORDER, pa.array(first_seq[group[chosen]]))
+    return result.sort_by(ORDER)
+
+
+def _dedup_partition(path, keys: list, keep: str, latest_by: str, budget: int, depth: int = 0) -> list:
+    """
+    Deduplicates one spill file into sorted output files next to it,
+    re-splitting with a new hash seed when it is over budget.
+
+    Returns:
+        Paths of the output files, each sorted by `_order`
+    """
+    path = Path(path)
+    needed = MEMORY_OVERHEAD * path.stat().st_size
+    if needed <= budget or depth >= MAX_SPLIT_DEPTH:
+        result = _winners(_read_table(path), keys, keep, latest_by)
+        output = path.with_name(path.stem + "-out.arrow")
+        with pa.ipc.new_stream(str(output), result.schema) as writer:
+            writer.write_table(result)
+        path.unlink()
+        return [output]
+
+    fanout = max(2, math.ceil(needed / budget))
+    with pa.ipc.open_stream(str(path)) as reader:
+        writer = _SpillWriter(path.parent, f"{path.stem}-s{depth + 1}", fanout, reader.schema)
+        for batch in reader:
+            writer.write(batch, keys, seed=depth + 1)
+    parts = writer.close()
+    path.unlink()
+    return [out for part in parts for out in _dedup_partition(part, keys, keep, latest_by, budget, depth + 1)]
+
+
+# =============================================================================
+# MERGING SORTED OUTPUTS
+# =============================================================================
+
+def _merge_sorted(paths: list, chunk_rows: int):
+    """
+    Streams the union of files sorted by `_order`, in `_order`.
+
+    Each round reads up to chunk_rows more from every file and emits the
+    buffered rows up to the smallest "last _order read" among files that
+    are not exhausted - no row still on disk can sort before it.
+    """
+    readers = [pa.ipc.open_stream(str(p)) for p in paths]
+    last = [None] * len(readers)
+    exhausted = [False] * len(readers)
+    carry = []
+    while True:
+        batches = list(carry)
+        for i, reader in enumerate(readers):
+            rows = 0
+            while not exhausted[i] and rows < chunk_rows:
+                try:
+                    batch = reader.read_next_batch()
+                except StopIteration:
+                    exhausted[i] = True
+                    break
+                if batch.num_rows:
+                    batches.append(batch)
+                    rows += batch.num_rows
+                    last[i] = batch[ORDER][-1].as_py()
+        if not batches:
+            break
+        pending = pa.Table.from_batches(batches).sort_by(ORDER)
+        limits = [last[i] for i in range(len(readers)) if not exhausted[i]]
+        cut = int(np.searchsorted(pending[ORDER].to_numpy(), min(limits), "right")) if limits else pending.num_rows
+        yield from pending.slice(0, cut).to_batches()
+        carry = pending.slice(cut).to_batches()
+    for reader in readers:
+        reader.close()
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+@dataclass
+class DedupStats:
+    input_rows: int = 0
+    output_rows: int = 0
+    spilled: bool = False
+    partitions: int = 0
+    spilled_bytes: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        mode = f"spilled {self.spilled_bytes / MB:.1f} MB to {self.partitions} partitions" if self.spilled else "in memory"
+        return (f"{self.input_rows:,} rows -> {self.output_rows:,} unique ({mode}), "
+                f"{self.seconds:.2f}s")
+
+
+def _with_seq(batch: pa.RecordBatch, start: int) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays(
+        batch.columns + [pa.array(np.arange(start, start + batch.num_rows, dtype=np.int64))],
+        names=batch.schema.names + [SEQ],
+    )
+
+
+def _total_size(sources) -> int:
+    try:
+        return sum(p.stat().st_size for p in _files(sources))
+    except (TypeError, OSError):
+        return 0
+
+
+def dedup_batches(sources, key, keep: str = "first", latest_by: str = None,
+                  memory_budget: int = DEFAULT_MEMORY_BUDGET, partitions: int = None,
+                  max_workers: int = None, spill_dir: str = None, batch_rows: int = DEFAULT_BATCH_ROWS,
+                  stats: DedupStats = None):
+    """
+    Yields the deduplicated rows as RecordBatches in first-occurrence order.
+
+    Args:
+        sources: File, directory or list of them (CSV / Parquet / Arrow IPC),
+            or an iterable of pyarrow RecordBatches / Tables
+        key: Key column name or list of names
+        keep: "first" (first occurrence wins) or "latest" (largest
+            `latest_by` wins; the key keeps its first-occurrence position)
+        latest_by: Timestamp/number column for keep="latest", e.g. check_time
+        memory_budget: Bytes the in-memory buffer and each spill wave may use
+        partitions: Override the number of spill partitions
+        max_workers: Parallel partition workers (default: CPU count)
+        spill_dir: Where spill files go (default: system temp dir)
+        batch_rows: Rows per read batch and per output batch
+        stats: Optional DedupStats filled in as the iterator is consumed
+    """
+    if keep not in ("first", "latest"):
+        raise ValueError(f"keep must be 'first' or 'latest', got {keep!r}")
+    if keep == "latest" and latest_by is None:
+        raise ValueError("keep='latest' needs a latest_by column")
+    keys = [key] if isinstance(key, str) else list(key)
+    stats = stats if stats is not None else DedupStats()
+    start = time.perf_counter()
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_budget = max(memory_budget // max_workers, 1)
+
+    buffered, buffered_bytes, seq = [], 0, 0
+    spill = None
+    with tempfile.TemporaryDirectory(prefix="dedup-", dir=spill_dir) as tmp:
+        tmp = Path(tmp)
+        for batch in _iter_batches(sources, batch_rows):
+            batch = _with_seq(batch, seq)
+            seq += batch.num_rows
+            if spill is None:
+                buffered.append(batch)
+                buffered_bytes += batch.nbytes
+                if MEMORY_OVERHEAD * buffered_bytes <= memory_budget:
+                    continue
+                # Over budget: everything from here on goes to disk
+                count = partitions or max(2, math.ceil(MEMORY_OVERHEAD * max(_total_size(sources), 2 * buffered_bytes)
+                                                      / worker_budget))
+                spill = _SpillWriter(tmp, "part", count, batch.schema)
+                for pending in buffered:
+                    spill.write(pending, keys, seed=0)
+                buffered = []
+            else:
+                spill.write(batch, keys, seed=0)
+        stats.input_rows = seq
+
+        if spill is None:  # everything fitted: one in-memory partition
+            if buffered:
+                result = _winners(pa.Table.from_batches(buffered), keys, keep, latest_by)
+                stats.output_rows = result.num_rows
+                yield from result.drop_columns([SEQ, ORDER]).to_batches(max_chunksize=batch_rows)
+            stats.seconds = time.perf_counter() - start
+            return
+
+        parts = spill.close()
+        stats.spilled, stats.partitions, stats.spilled_bytes = True, spill.partitions, spill.bytes
+        if max_workers == 1 or len(parts) <= 1:
+            outputs = [out for part in parts for out in _dedup_partition(part, keys, keep, latest_by, worker_budget)]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_dedup_partition, part, keys, keep, latest_by, worker_budget)
+                           for part in parts]
+                outputs = [out for future in futures for out in future.result()]
+
+        chunk_rows = max(batch_rows // max(len(outputs), 1), 1_024)
+        for batch in _merge_sorted(outputs, chunk_rows):
+            stats.output_rows += batch.num_rows
+            yield batch.drop_columns([SEQ, ORDER])
+    stats.seconds = time.perf_counter() - start
+
+
+def dedup(sources, key, **kwargs):
+    """Row-at-a-time iterator (dicts) over dedup_batches()."""
+    for batch in dedup_batches(sources, key, **kwargs):
+        yield from batch.to_pylist()
+
+
+# =============================================================================
+# SPARK EQUIVALENT
+# =============================================================================
+
+def with_arrival_order(df, column: str = SEQ):
+    """
+    Adds an arrival-order column to a DataFrame read from files: file path,
+    then position in the file.
+
+    Partition ids do not follow file order (Spark packs file splits into
+    partitions largest first), so monotonically_increasing_id alone is not
+    arrival order. The (file, split start) pairs are ranked on the driver -
+    one small distinct over file metadata - and each row gets
+    rank << 33 | its row number within the partition, which increases along
+    a split.
+    """
+    from pyspark.sql import functions as F
+
+    split = [F.col("_metadata.file_path").alias("_file"), F.col("_metadata.file_block_start").alias("_block")]
+    splits = sorted(tuple(row) for row in df.select(*split).distinct().collect())
+    ranks = df.sparkSession.createDataFrame(
+        [(file, block, rank) for rank, (file, block) in enumerate(splits)],
+        "_file string, _block long, _split long",
+    )
+    return (
+        df.select("*", *split, F.monotonically_increasing_id().alias("_row"))
+        .join(F.broadcast(ranks), ["_file", "_block"])
+        .withColumn(column, F.shiftleft("_split", 33).bitwiseOR(F.col("_row").bitwiseAND((1 << 33) - 1)))
+        .drop("_file", "_block", "_split", "_row")
+    )
+
+
+def dedup_spark(df, key, order_by: str = SEQ, keep: str = "first", latest_by: str = None):
+    """
+    Spark version of dedup_batches(): one row per key, ordered by the key's
+    first occurrence in `order_by`. No window sort - each key is reduced with
+    min/max of a struct, which Spark aggregates map-side.
+    """
+    from pyspark.sql import functions as F
+
+    if keep not in ("first", "latest"):
+        raise ValueError(f"keep must be 'first' or 'latest', got {keep!r}")
+    if keep == "latest" and latest_by is None:
+        raise ValueError("keep='latest' needs a latest_by column")
+
+    keys = [key] if isinstance(key, str) else list(key)
+    others = [c for c in df.columns if c not in keys and c != order_by]
+    if keep == "first":
+        winner = F.min(F.struct(order_by, *others))
+    else:
+        # max over (latest_by, -order): nulls sort lowest, ties go to the earliest row
+        winner = F.max(F.struct(F.col(latest_by).alias("_latest"), (-F.col(order_by)).alias("_neg_order"),
+                                *[F.col(c) for c in others]))
+    reduced = df.groupBy(*keys).agg(F.min(order_by).alias(ORDER), winner.alias("_row"))
+    return reduced.orderBy(ORDER).select(*keys, *[F.col(f"_row.{c}").alias(c) for c in others])
+
+
+# =============================================================================
+# MAIN - PARITY WITH THE IN-MEMORY SET VERSION + SPILL BENCHMARK
+# =============================================================================
+
+def remove_duplicates(rows, key, keep: str = "first", latest_by: str = None) -> list:
+    """The list_comprehension.ipynb set/dict version, for parity checks."""
+    best = {}
+    for row in rows:
+        k = tuple(row[c] for c in key) if not isinstance(key, str) else row[key]
+        if k not in best:
+            best[k] = row
+        elif keep == "latest" and row[latest_by] is not None and (
+                best[k][latest_by] is None or row[latest_by] > best[k][latest_by]):
+            best[k] = row
+    return list(best.values())
+
+
+def make_credit_check_files(directory: Path, files: int, rows_per_file: int, seed: int = 0) -> list:
+    """
+    Writes `files` CSV files of credit checks in which each credit_check_id
+    is re-sent a few times with a later check_time (upstream retries).
+    """
+    rng = np.random.default_rng(seed)
+    paths = []
+    distinct = files * rows_per_file // 3
+    for i in range(files):
+        ids = rng.integers(0, distinct, rows_per_file)
+        times = np.datetime64("2025-01-01", "s") + rng.integers(0, 90 * 86_400, rows_per_file).astype("timedelta64[s]")
+        table = pa.table({
+            "credit_check_id": pa.array([f"CC{n:09d}" for n in ids]),
+            "application_id": pa.array([f"APP{n // 2:09d}" for n in ids]),
+            "check_time": pa.array(times.astype("datetime64[us]")),
+            "score": pa.array(rng.integers(300, 850, rows_per_file), pa.int32()),
+        })
+        path = directory / f"credit_checks-{i:04d}.csv"
+        pv.write_csv(table, path)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="External-memory order-preserving dedup")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--rows-per-file", type=int, default=5_000)
+    parser.add_argument("--memory-mb", type=int, default=16)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--spark", action="store_true", help="also check dedup_spark()")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        paths = make_credit_check_files(Path(data_dir), args.files, args.rows_per_file)
+        rows = [row for batch in _iter_batches(paths) for row in batch.to_pylist()]
+
+        print(f"{args.files} files, {len(rows):,} rows\n")
+        print(f"{'keep':<8}{'budget':>10}  {'result':<70}{'parity'}")
+        print("-" * 96)
+        for keep, latest_by in (("first", None), ("latest", "check_time")):
+            start = time.perf_counter()
+            expected = remove_duplicates(rows, "credit_check_id", keep, latest_by)
+            print(f"{keep:<8}{'set/dict':>10}  {f'{len(expected):,} unique, {time.perf_counter() - start:.2f}s (rows already in memory)':<70}")
+            for budget in (DEFAULT_MEMORY_BUDGET * 4, args.memory_mb * MB):
+                stats = DedupStats()
+                batches = list(dedup_batches(paths, "credit_check_id", keep=keep, latest_by=latest_by,
+                                             memory_budget=budget, max_workers=args.workers, stats=stats))
+                ok = [row for batch in batches for row in batch.to_pylist()] == expected
+                print(f"{keep:<8}{budget // MB:>7} MB  {str(stats):<70}{'✓ PASS' if ok else '✗ FAIL'}")
+
+        if args.spark:
+            import sys
+
+            sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "pyspark"))
+            from spark_session import get_spark
+
+            spark = get_spark("external-dedup")
+            schema = "credit_check_id string, application_id string, check_time timestamp, score int"
+            frame = with_arrival_order(spark.read.csv([str(p) for p in paths], header=True, schema=schema))
+            for keep, latest_by in (("first", None), ("latest", "check_time")):
+                expected = remove_duplicates(rows, "credit_check_id", keep, latest_by)
+                result = dedup_spark(frame, "credit_check_id", keep=keep, latest_by=latest_by).toPandas()
+                got = [tuple(r) for r in result[["credit_check_id", "score"]].itertuples(index=False)]
+                ok = got == [(r["credit_check_id"], r["score"]) for r in expected]
+                print(f"spark {keep:<8}{'✓ PASS' if ok else '✗ FAIL'}")
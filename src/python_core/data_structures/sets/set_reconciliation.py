@@ -0,0 +1,404 @@
+"""
+Out-of-Core Set Reconciliation
+==============================
+Finds missing / extra / common keys between two large files without loading
+either side into a Python set, i.e. the sets README examples
+
+    missing = source - target          # Find missing records after ETL
+    all_discrepancies = source ^ target  # Data quality report
+
+for inputs with hundreds of millions of `application_id`s.
+
+How it works:
+    1. Stream the key column of each file (CSV, Parquet or a directory of
+       parts) in Arrow batches.
+    2. Hash-partition every key into P spill files per side (Arrow IPC), with
+       P chosen so one partition of both sides fits in the memory budget.
+    3. Reconcile partitions in parallel: a key can only match keys in the same
+       partition, so each worker compares one pair with Arrow's vectorized
+       `unique` / `is_in`. Partitions that still exceed the budget are
+       re-split with a different hash seed.
+    4. Optional Bloom prefilter: the right side is scanned first into a Bloom
+       filter; left keys it rejects are definitely missing and spill to a
+       separate single-side partition that only needs deduplication, so the
+       compared partitions stay small.
+
+Only counts and a sample of each key class are returned; memory is bounded by
+the budget, not by the input size.
+
+Usage:
+    report = reconcile("loan_applications.csv", "loans.csv", key="application_id",
+                       memory_budget=256 * MB)
+    print(report.missing, report.missing_sample)
+"""
+
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+
+MB = 1024 * 1024
+DEFAULT_MEMORY_BUDGET = 256 * MB
+DEFAULT_BATCH_ROWS = 256 * 1024
+MAX_SPLIT_DEPTH = 3
+
+# In-memory cost of a partition relative to its spill file: the key arrays
+# plus Arrow's hash tables for unique / is_in.
+MEMORY_OVERHEAD = 4
+
+
+# =============================================================================
+# READING AND HASHING KEYS
+# =============================================================================
+
+def _dataset(path):
+    path = Path(path)
+    files = sorted(p for p in path.iterdir() if p.is_file() and not p.name.startswith(".")) if path.is_dir() else [path]
+    if not files:
+        raise ValueError(f"no input files under {path}")
+    suffix = files[0].suffix
+    file_format = {".csv": "csv", ".parquet": "parquet", ".arrow": "ipc"}.get(suffix)
+    if file_format is None:
+        raise ValueError(f"unsupported input type: {suffix}")
+    return ds.dataset([str(p) for p in files], format=file_format)
+
+
+def iter_keys(path, key: str, batch_rows: int = DEFAULT_BATCH_ROWS):
+    """Yields the key column of a CSV/Parquet file or directory as string arrays (nulls dropped)."""
+    for batch in _dataset(path).to_batches(columns=[key], batch_size=batch_rows):
+        column = batch.column(0)
+        if column.null_count:
+            column = pc.drop_null(column)
+        yield column.cast(pa.string())
+
+
+def _hash(keys: pa.Array, seed: int) -> np.ndarray:
+    """64-bit hashes, stable across processes; `seed` gives independent hash families."""
+    hash_key = f"reconcile{seed:07d}"[:16]
+    return pd.util.hash_array(keys.to_numpy(zero_copy_only=False), hash_key=hash_key)
+
+
+class BloomFilter:
+    """
+    Packed-bit Bloom filter over string keys.
+
+    False positives only send a key down the compare path, so they cost
+    memory, never correctness.
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int = 4):
+        self.num_bits = max(num_bits, 8)
+        self.num_hashes = num_hashes
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.added = 0
+
+    @classmethod
+    def for_budget(cls, budget_bytes: int) -> "BloomFilter":
+        return cls(budget_bytes * 8)
+
+    def _positions(self, keys: pa.Array) -> np.ndarray:
+        hashes = _hash(keys, seed=9_999_999)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.num_hashes, dtype=np.uint64)[:, None]
+        return (h1 + rows * h2) % np.uint64(self.num_bits)
+
+    def add(self, keys: pa.Array):
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype(np.uint8))
+        self.added += len(keys)
+
+    def might_contain(self, keys: pa.Array) -> np.ndarray:
+        positions = self._positions(keys)
+        hits = self.bits[positions >> np.uint64(3)] & (1 << (positions & np.uint64(7))).astype(np.uint8)
+        return hits.all(axis=0)
+
+    def false_positive_rate(self) -> float:
+        """Estimated from `added` (an upper bound: duplicates are counted too)."""
+        return (1 - math.exp(-self.num_hashes * self.added / self.num_bits)) ** self.num_hashes
+
+
+# =============================================================================
+# SPILLING
+# =============================================================================
+
+class _PartitionWriter:
+    """Lazily opened Arrow IPC stream per partition."""
+
+    def __init__(self, directory: Path, prefix: str, partitions: int):
+        self.directory = directory
+        self.prefix = prefix
+        self.partitions = partitions
+        self.writers = {}
+        self.rows = 0
+
+    def path(self, partition: int) -> Path:
+        return self.directory / f"{self.prefix}-{partition:05d}.arrow"
+
+    def write(self, keys: pa.Array, seed: int):
+        if not len(keys):
+            return
+        part = (_hash(keys, seed) % np.uint64(self.partitions)).astype(np.int64)
+        order = np.argsort(part, kind="stable")
+        bounds = np.searchsorted(part[order], np.arange(self.partitions + 1))
+        ordered = keys.take(pa.array(order))
+        for partition in np.flatnonzero(np.diff(bounds)):
+            chunk = ordered.slice(bounds[partition], bounds[partition + 1] - bounds[partition])
+            writer = self.writers.get(partition)
+            if writer is None:
+                schema = pa.schema([("key", pa.string())])
+                writer = self.writers[partition] = pa.ipc.new_stream(str(self.path(partition)), schema)
+            writer.write_batch(pa.record_batch([chunk], names=["key"]))
+        self.rows += len(keys)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    def existing(self, partition: int):
+        path = self.path(partition)
+        return path if path.exists() else None
+
+
+def _read_partition(path) -> pa.Array:
+    if path is None:
+        return pa.array([], pa.string())
+    with pa.ipc.open_stream(str(path)) as reader:
+        table = reader.read_all()
+    return table.column("key").combine_chunks() if table.num_rows else pa.array([], pa.string())
+
+
+def _size(path) -> int:
+    return Path(path).stat().st_size if path is not None else 0
+
+
+# =============================================================================
+# RECONCILING ONE PARTITION
+# =============================================================================
+
+@dataclass
+class _PartitionResult:
+    left: int = 0
+    right: int = 0
+    missing: int = 0
+    extra: int = 0
+    common: int = 0
+    missing_sample: list = field(default_factory=list)
+    extra_sample: list = field(default_factory=list)
+    resplits: int = 0
+
+    def merge(self, other: "_PartitionResult", samples: int):
+        for name in ("left", "right", "missing", "extra", "common", "resplits"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.missing_sample = (self.missing_sample + other.missing_sample)[:samples]
+        self.extra_sample = (self.extra_sample + other.extra_sample)[:samples]
+
+
+def _compare(left_path, right_path, only_left_path, samples: int) -> _PartitionResult:
+    left = pc.unique(_read_partition(left_path))
+    right = pc.unique(_read_partition(right_path))
+    only_left = pc.unique(_read_partition(only_left_path))
+
+    left_in_right = pc.is_in(left, value_set=right)
+    right_in_left = pc.is_in(right, value_set=left)
+    missing = pc.filter(left, pc.invert(left_in_right))
+    extra = pc.filter(right, pc.invert(right_in_left))
+    common = pc.sum(left_in_right).as_py() or 0
+
+    return _PartitionResult(
+        left=len(left) + len(only_left),
+        right=len(right),
+        missing=len(missing) + len(only_left),
+        extra=len(extra),
+        common=common,
+        missing_sample=(missing.slice(0, samples).to_pylist() + only_left.slice(0, samples).to_pylist())[:samples],
+        extra_sample=extra.slice(0, samples).to_pylist(),
+    )
+
+
+def _reconcile_partition(left_path, right_path, only_left_path, budget: int, samples: int,
+                         depth: int = 0) -> _PartitionResult:
+    """Compares one partition pair, re-splitting it with a new hash seed if it is over budget."""
+    needed = MEMORY_OVERHEAD * (_size(left_path) + _size(right_path) + _size(only_left_path))
+    if needed <= budget or depth >= MAX_SPLIT_DEPTH:
+        return _compare(left_path, right_path, only_left_path, samples)
+
+    fanout = max(2, math.ceil(needed / budget))
+    directory = Path(next(p for p in (left_path, right_path, only_left_path) if p is not None)).parent
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        tmp = Path(tmp)
+        writers = {}
+        for name, path in (("left", left_path), ("right", right_path), ("only_left", only_left_path)):
+            writer = writers[name] = _PartitionWriter(tmp, name, fanout)
+            if path is not None:
+                writer.write(_read_partition(path), seed=depth + 1)
+            writer.close()
+
+        result = _PartitionResult(resplits=1)
+        for partition in range(fanout):
+            sub = _reconcile_partition(
+                writers["left"].existing(partition), writers["right"].existing(partition),
+                writers["only_left"].existing(partition), budget, samples, depth + 1,
+            )
+            result.merge(sub, samples)
+        return result
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+@dataclass
+class ReconcileReport:
+    """Distinct-key counts for left vs right, plus samples of the differences."""
+    left: int
+    right: int
+    missing: int        # in left, not in right  (left - right)
+    extra: int          # in right, not in left  (right - left)
+    common: int         # in both                (left & right)
+    missing_sample: list
+    extra_sample: list
+    partitions: int
+    resplits: int
+    bloom_false_positive_rate: float = None
+    bloom_rejected_rows: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        lines = [
+            f"left distinct keys:  {self.left:>12,}",
+            f"right distinct keys: {self.right:>12,}",
+            f"missing (L - R):     {self.missing:>12,}  e.g. {self.missing_sample[:5]}",
+            f"extra   (R - L):     {self.extra:>12,}  e.g. {self.extra_sample[:5]}",
+            f"common  (L & R):     {self.common:>12,}",
+            f"partitions: {self.partitions} (+{self.resplits} re-split), {self.seconds:.2f}s",
+        ]
+        if self.bloom_false_positive_rate is not None:
+            lines.append(f"bloom: {self.bloom_rejected_rows:,} left rows skipped the compare path "
+                         f"(est. false positive rate {self.bloom_false_positive_rate:.2%})")
+        return "\n".join(lines)
+
+
+def _choose_partitions(paths, worker_budget: int) -> int:
+    """Spill files are much smaller than the source rows, so source size is a safe upper bound."""
+    total = sum(sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file()) if Path(path).is_dir()
+                else Path(path).stat().st_size for path in paths)
+    return max(1, math.ceil(MEMORY_OVERHEAD * total / worker_budget))
+
+
+def reconcile(left, right, key: str = "application_id", right_key: str = None,
+              memory_budget: int = DEFAULT_MEMORY_BUDGET, partitions: int = None,
+              use_bloom: bool = True, max_workers: int = None, samples: int = 10,
+              spill_dir: str = None, batch_rows: int = DEFAULT_BATCH_ROWS) -> ReconcileReport:
+    """
+    Reconciles the distinct keys of two files.
+
+    Args:
+        left: Source of truth (file or directory), e.g. loan_applications
+        right: File or directory compared against it, e.g. loans
+        key: Key column in `left` (and in `right` unless right_key is given)
+        right_key: Key column in `right`, if named differently
+        memory_budget: Peak bytes for the reconcile phase, shared by all workers
+            (a quarter goes to the Bloom filter when enabled)
+        partitions: Override the number of spill partitions
+        use_bloom: Route left keys that are definitely not in right around
+            the compare path
+        max_workers: Parallel partition workers (default: CPU count)
+        samples: Keys to keep from each of missing / extra
+        spill_dir: Where spill files go (default: system temp dir)
+        batch_rows: Rows per Arrow read batch
+
+    Returns:
+        ReconcileReport
+    """
+    start = time.perf_counter()
+    max_workers = max_workers or os.cpu_count() or 1
+    bloom = BloomFilter.for_budget(memory_budget // 4) if use_bloom else None
+    compare_budget = memory_budget - (bloom.bits.nbytes if bloom else 0)
+    worker_budget = max(compare_budget // max_workers, 1)
+    partitions = partitions or _choose_partitions([left, right], worker_budget)
+
+    with tempfile.TemporaryDirectory(prefix="reconcile-", dir=spill_dir) as tmp:
+        tmp = Path(tmp)
+        right_writer = _PartitionWriter(tmp, "right", partitions)
+        for keys in iter_keys(right, right_key or key, batch_rows):
+            if bloom is not None:
+                bloom.add(keys)
+            right_writer.write(keys, seed=0)
+        right_writer.close()
+
+        left_writer = _PartitionWriter(tmp, "left", partitions)
+        only_left_writer = _PartitionWriter(tmp, "only_left", partitions)
+        for keys in iter_keys(left, key, batch_rows):
+            if bloom is None:
+                left_writer.write(keys, seed=0)
+                continue
+            maybe = bloom.might_contain(keys)
+            left_writer.write(keys.filter(pa.array(maybe)), seed=0)
+            only_left_writer.write(keys.filter(pa.array(~maybe)), seed=0)
+        left_writer.close()
+        only_left_writer.close()
+
+        jobs = [
+            (left_writer.existing(p), right_writer.existing(p), only_left_writer.existing(p))
+            for p in range(partitions)
+        ]
+        jobs = [job for job in jobs if any(job)]
+        total = _PartitionResult()
+        if max_workers == 1 or len(jobs) <= 1:
+            for job in jobs:
+                total.merge(_reconcile_partition(*job, worker_budget, samples), samples)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(_reconcile_partition, *job, worker_budget, samples) for job in jobs]
+                for future in futures:
+                    total.merge(future.result(), samples)
+
+    return ReconcileReport(
+        left=total.left, right=total.right, missing=total.missing, extra=total.extra,
+        common=total.common, missing_sample=total.missing_sample, extra_sample=total.extra_sample,
+        partitions=partitions, resplits=total.resplits,
+        bloom_false_positive_rate=bloom.false_positive_rate() if bloom else None,
+        bloom_rejected_rows=only_left_writer.rows,
+        seconds=time.perf_counter() - start,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    datasets = Path(__file__).resolve().parents[3] / "practice_datasets" / "csv" / "loan_applications"
+    parser = argparse.ArgumentParser(description="Out-of-core set reconciliation")
+    parser.add_argument("left", nargs="?", default=str(datasets / "loan_applications.csv"))
+    parser.add_argument("right", nargs="?", default=str(datasets / "loans.csv"))
+    parser.add_argument("--key", default="application_id")
+    parser.add_argument("--right-key")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_BUDGET // MB)
+    parser.add_argument("--partitions", type=int)
+    parser.add_argument("--no-bloom", action="store_true")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--check", action="store_true", help="verify against in-memory Python sets")
+    args = parser.parse_args()
+
+    report = reconcile(args.left, args.right, key=args.key, right_key=args.right_key,
+                       memory_budget=args.memory_mb * MB, partitions=args.partitions,
+                       use_bloom=not args.no_bloom, max_workers=args.workers, samples=args.samples)
+    print(report)
+
+    if args.check:
+        source = {k for batch in iter_keys(args.left, args.key) for k in batch.to_pylist()}
+        target = {k for batch in iter_keys(args.right, args.right_key or args.key) for k in batch.to_pylist()}
+        expected = (len(source - target), len(target - source), len(source & target))
+        ok = expected == (report.missing, report.extra, report.common)
+        print(f"\nPython sets (missing, extra, common) = {expected}: {'✓ PASS' if ok else '✗ FAIL'}")
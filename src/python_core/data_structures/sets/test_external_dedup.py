@@ -0,0 +1,36 @@
+"""
+Spilled dedup against the in-memory set/dict version.
+
+    pytest test_external_dedup.py
+"""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from external_dedup import dedup_batches, remove_duplicates
+
+
+def _batches(rows: int = 1_577, distinct: int = 50, batch_rows: int = 100, seed: int = 0) -> list:
+    """Int keys with nulls in some batches only (those become float64 in pandas)."""
+    rng = np.random.default_rng(seed)
+    k = rng.integers(0, distinct, rows).astype(object)
+    k[rng.choice(rows, rows // 20, replace=False)] = None
+    table = pa.table({
+        "k": pa.array(k, pa.int64()),
+        "k2": pa.array(rng.integers(0, 3, rows)),
+        "updated": pa.array(rng.integers(0, 1_000, rows)),
+        "value": pa.array(np.arange(rows)),
+    })
+    return table.to_batches(max_chunksize=batch_rows)
+
+
+@pytest.mark.parametrize("memory_budget", [256 * 1024 * 1024, 20_000, 2_000], ids=["in-memory", "spilled", "tiny"])
+@pytest.mark.parametrize("keep, latest_by", [("first", None), ("latest", "updated")])
+@pytest.mark.parametrize("key", ["k", ["k", "k2"]], ids=["single-key", "multi-key"])
+def test_dedup_matches_set_version_with_nullable_int_keys(key, keep, latest_by, memory_budget):
+    batches = _batches()
+    rows = [row for batch in batches for row in batch.to_pylist()]
+    expected = remove_duplicates(rows, key, keep, latest_by)
+    result = dedup_batches(batches, key, keep=keep, latest_by=latest_by, memory_budget=memory_budget, max_workers=1)
+    assert [row for batch in result for row in batch.to_pylist()] == expected
@@ -0,0 +1,360 @@
+"""
+Compiled String-Cleaning Plans
+==============================
+Declarative version of hand-written cleaning chains such as (from
+`clean_record_solution` in challenges.py):
+
+    amount = parts[3].strip().replace("$", "").replace(",", "")   # 3 passes, 3 new strings
+    phone = "".join(c for c in parts[2] if c.isdigit())            # 1 str per character
+
+    plan = compile_plan(["strip", ("delete", "$,")])
+    plan("  $1,250.00 ")  # '1250.00'
+
+Supported ops:
+    "strip" / ("strip", chars), "lstrip", "rstrip"
+    "lower", "upper", "casefold"
+    ("removeprefix", prefix), ("removesuffix", suffix)
+    ("delete", chars)           remove every listed character
+    ("replace", old, new)       single characters fuse; longer strings stay a str.replace
+    "keep_digits"               keep only str.isdigit() characters
+    "collapse_whitespace"       " ".join(text.split()), like clean_whitespace
+
+Optimizations (see `CleaningPlan.steps` for the result):
+    1. Redundant steps are dropped: repeated idempotent ops, strips that
+       collapse_whitespace makes pointless (it trims both ends itself), and
+       whitespace / case ops after keep_digits (digits have neither).
+    2. Adjacent character-level ops (delete, keep_digits, 1-char replace)
+       fuse into ONE character mapping, run as a single `str.translate`
+       table. The table is a dict that fills itself per code point on first
+       sight, so it covers all of Unicode but stays small; `demo_translate`
+       shows the idea. When the fused mapping only touches a few listed
+       characters it is emitted as str.replace calls instead, which CPython
+       runs faster than a per-character table lookup on short fields.
+       Case ops stay native str.lower() / upper() / casefold(): their ASCII
+       fast paths beat any table, and lower() is context-sensitive (Greek
+       final sigma).
+    3. The optimized steps are generated into a single Python function, and
+       compiled plans are cached by their op list.
+
+Results match applying the ops one by one with the str methods.
+"""
+
+import time
+from functools import lru_cache
+
+import pandas as pd
+import pyarrow as pa
+
+
+# =============================================================================
+# OPS
+# =============================================================================
+
+CHAR_OPS = {"delete", "keep_digits", "replace_char"}
+IDEMPOTENT = {"strip", "lstrip", "rstrip", "lower", "upper", "casefold", "keep_digits", "collapse_whitespace"}
+CASE_OPS = {"lower", "upper", "casefold"}
+NO_ARGS = {"lower", "upper", "casefold", "keep_digits", "collapse_whitespace"}
+OPTIONAL_ARG = {"strip", "lstrip", "rstrip"}
+ONE_ARG = {"removeprefix", "removesuffix", "delete"}
+
+
+def _normalize_op(op) -> tuple:
+    """"strip" -> ("strip", None); ("delete", "$,") stays; single-char replaces become replace_char."""
+    if isinstance(op, str):
+        op = (op,)
+    name, *args = op
+    if name in NO_ARGS and not args:
+        return (name,)
+    if name in OPTIONAL_ARG and len(args) <= 1:
+        return (name, args[0] if args else None)
+    if name in ONE_ARG and len(args) == 1:
+        return (name, args[0])
+    if name == "replace" and len(args) == 2:
+        old, new = args
+        if len(old) == 1:
+            return ("replace_char", old, new)
+        return ("replace", old, new)
+    raise ValueError(f"unknown op or wrong arguments: {op!r}")
+
+
+def _char_function(op: tuple):
+    """Per-character behaviour of a character-level op: ch -> replacement str."""
+    name = op[0]
+    if name == "delete":
+        chars = set(op[1])
+        return lambda ch: "" if ch in chars else ch
+    if name == "keep_digits":
+        return lambda ch: ch if ch.isdigit() else ""
+    _, old, new = op  # replace_char
+    return lambda ch: new if ch == old else ch
+
+
+class _FusedTable(dict):
+    """
+    str.translate table for a chain of character ops, computed lazily per
+    code point: after the first sighting every lookup is a plain dict hit.
+    """
+
+    def __init__(self, functions: list):
+        super().__init__()
+        self.functions = functions
+
+    def __missing__(self, code_point: int):
+        text = chr(code_point)
+        for function in self.functions:
+            text = "".join(function(ch) for ch in text)
+        # None (delete) and 1-char results keep str.translate on its ASCII fast path
+        value = self[code_point] = None if not text else code_point if text == chr(code_point) else text
+        return value
+
+
+# =============================================================================
+# OPTIMIZER
+# =============================================================================
+
+DEFAULT_STRIPS = {("strip", None), ("lstrip", None), ("rstrip", None)}
+
+
+def _whitespace_neutral(op: tuple) -> bool:
+    """True if `op` never turns whitespace into non-whitespace or shifts positions."""
+    name = op[0]
+    if name in CASE_OPS or name in ("keep_digits", "delete"):
+        return True
+    return name == "replace_char" and not op[1].isspace()
+
+
+def _drop_redundant(ops: list) -> list:
+    result = []
+    digits_only = False
+    for op in ops:
+        name = op[0]
+        if result and op == result[-1] and name in IDEMPOTENT:
+            continue
+        # Digits have no whitespace and no case
+        if digits_only and (name in CASE_OPS or name == "collapse_whitespace" or op in DEFAULT_STRIPS):
+            continue
+        # collapse_whitespace trims both ends itself
+        if op in DEFAULT_STRIPS and result and result[-1] == ("collapse_whitespace",):
+            continue
+        if name == "collapse_whitespace":
+            kept = []
+            while result and (result[-1] in DEFAULT_STRIPS or _whitespace_neutral(result[-1])):
+                previous = result.pop()
+                if previous not in DEFAULT_STRIPS:
+                    kept.append(previous)
+            result.extend(reversed(kept))
+        if name == "keep_digits":
+            digits_only = True
+        elif name in ("replace", "replace_char"):
+            digits_only = False
+        result.append(op)
+    return result
+
+
+def _fuse(ops: list) -> list:
+    """Groups runs of adjacent character ops into ("translate", [ops])."""
+    steps = []
+    for op in ops:
+        if op[0] in CHAR_OPS:
+            if steps and steps[-1][0] == "translate":
+                steps[-1][1].append(op)
+            else:
+                steps.append(("translate", [op]))
+        else:
+            steps.append(op)
+    return steps
+
+
+REPLACE_CHAIN_MAX = 4
+
+
+def _replace_chain(ops: list, table: _FusedTable):
+    """
+    The fused table as a few str.replace calls, or None to use translate.
+
+    CPython's translate does a dict lookup per character, while a 1-char
+    str.replace is a memchr-speed scan, so for a handful of listed characters
+    (e.g. delete "$,") a chain of replaces is the faster form of the same
+    mapping. keep_digits has an unbounded domain and always uses translate.
+    """
+    if any(op[0] == "keep_digits" for op in ops):
+        return None
+    domain = set()
+    for op in ops:
+        domain.update(op[1])
+    chain = []
+    for ch in sorted(domain):
+        mapped = table[ord(ch)]
+        result = "" if mapped is None else chr(mapped) if isinstance(mapped, int) else mapped
+        if result != ch:
+            chain.append((ch, result))
+    # Replacing in sequence is only the same as mapping at once if no output
+    # character is rewritten by a later replace
+    keys = {ch for ch, _ in chain}
+    if len(chain) > REPLACE_CHAIN_MAX or any(keys & set(result) for _, result in chain):
+        return None
+    table.clear()
+    return chain
+
+
+# =============================================================================
+# COMPILED PLAN
+# =============================================================================
+
+class CleaningPlan:
+    """
+    A compiled op list. Call it on one value, or use apply_column.
+
+    Attributes:
+        ops: The normalized ops as given
+        steps: The optimized steps that actually run
+        source: The generated function body (for inspection)
+    """
+
+    def __init__(self, ops: tuple):
+        self.ops = tuple(_normalize_op(op) for op in ops)
+        self.steps = _fuse(_drop_redundant(list(self.ops)))
+
+        # One chained expression, i.e. exactly the hand-written form
+        namespace = {}
+        expression = "v"
+        for index, step in enumerate(self.steps):
+            name = step[0]
+            if name == "translate":
+                table = _FusedTable([_char_function(op) for op in step[1]])
+                chain = _replace_chain(step[1], table)
+                if chain is None:
+                    namespace[f"_t{index}"] = table
+                    expression += f".translate(_t{index})"
+                else:
+                    expression += "".join(f".replace({old!r}, {new!r})" for old, new in chain)
+            elif name in CASE_OPS:
+                expression += f".{name}()"
+            elif name in OPTIONAL_ARG:
+                expression += f".{name}({'' if step[1] is None else repr(step[1])})"
+            elif name in ("removeprefix", "removesuffix"):
+                expression += f".{name}({step[1]!r})"
+            elif name == "replace":
+                expression += f".replace({step[1]!r}, {step[2]!r})"
+            elif name == "collapse_whitespace":
+                expression = f"' '.join({expression}.split())"
+        self.source = f"def clean(v):\n    return {expression}"
+        exec(compile(self.source, "<cleaning-plan>", "exec"), namespace)
+        self._function = namespace["clean"]
+
+    def __call__(self, value: str) -> str:
+        return self._function(value)
+
+    def apply_column(self, values):
+        """
+        Cleans a column. Returns the same container type: pandas.Series (index
+        kept), pyarrow.Array, or list. Nulls stay null.
+        """
+        function = self._function
+        if isinstance(values, pd.Series):
+            return values.map(function, na_action="ignore")
+        if isinstance(values, (pa.Array, pa.ChunkedArray)):
+            return pa.array([None if v is None else function(v) for v in values.to_pylist()], pa.string())
+        return [None if v is None else function(v) for v in values]
+
+    def __repr__(self) -> str:
+        return f"CleaningPlan({len(self.ops)} ops -> {len(self.steps)} steps)"
+
+
+def _apply_op(value: str, op: tuple) -> str:
+    """Reference semantics of one op with plain str methods."""
+    name = op[0]
+    if name in OPTIONAL_ARG or name in ("removeprefix", "removesuffix"):
+        return getattr(value, name)(op[1])
+    if name in CASE_OPS:
+        return getattr(value, name)()
+    if name == "delete":
+        return value.translate(str.maketrans("", "", op[1]))
+    if name == "keep_digits":
+        return "".join(c for c in value if c.isdigit())
+    if name in ("replace", "replace_char"):
+        return value.replace(op[1], op[2])
+    if name == "collapse_whitespace":
+        return " ".join(value.split())
+    raise ValueError(f"unknown op: {op!r}")
+
+
+def apply_unoptimized(value: str, ops) -> str:
+    """Applies ops one at a time (the baseline the compiled plan must match)."""
+    for op in ops:
+        value = _apply_op(value, _normalize_op(op))
+    return value
+
+
+@lru_cache(maxsize=256)
+def _compile(ops: tuple) -> CleaningPlan:
+    return CleaningPlan(ops)
+
+
+def compile_plan(ops) -> CleaningPlan:
+    """Cached: the same op list compiles once."""
+    return _compile(tuple(op if isinstance(op, str) else tuple(op) for op in ops))
+
+
+def clean(value: str, ops) -> str:
+    """One-off convenience: compile_plan(ops)(value)."""
+    return compile_plan(ops)(value)
+
+
+# =============================================================================
+# BENCHMARK - hand-written chains vs compiled plans
+# =============================================================================
+
+BENCH_CASES = [
+    ("amount", "  $1,250.00 ", lambda s: s.strip().replace("$", "").replace(",", ""),
+     ["strip", ("replace", "$", ""), ("replace", ",", "")]),
+    ("phone", "(555) 123-4567", lambda s: "".join(c for c in s if c.isdigit()),
+     ["keep_digits"]),
+    ("email", "  John.Doe@Email.COM ", lambda s: s.strip().lower(),
+     ["strip", "lower"]),
+    ("order_id", " ORD_00123 ", lambda s: s.strip().removeprefix("ORD_"),
+     ["strip", ("removeprefix", "ORD_")]),
+    ("free text", "  Hello,   World -- Foo_Bar  ",
+     lambda s: " ".join(s.strip().lower().replace("-", "").replace("_", " ").split()),
+     ["strip", "lower", ("delete", "-"), ("replace", "_", " "), "collapse_whitespace"]),
+]
+
+
+def _best_of(function, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark(n: int = 200_000):
+    print(f"{'field':<11}{'ops':>4}{'steps':>6}{'hand-written':>14}{'compiled':>11}{'speedup':>9}  parity")
+    print("-" * 64)
+    for field, sample, hand, ops in BENCH_CASES:
+        values = [sample + str(i % 10) for i in range(n)]
+        plan = compile_plan(ops)
+
+        expected = [hand(v) for v in values]
+        got = plan.apply_column(values)
+        hand_seconds = _best_of(lambda: [hand(v) for v in values])
+        plan_seconds = _best_of(lambda: plan.apply_column(values))
+
+        status = "✓ PASS" if got == expected else "✗ FAIL"
+        print(f"{field:<11}{len(plan.ops):>4}{len(plan.steps):>6}{hand_seconds * 1e9 / n:>12.0f}ns"
+              f"{plan_seconds * 1e9 / n:>9.0f}ns{hand_seconds / plan_seconds:>8.1f}x  {status}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compiled string-cleaning plans")
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    plan = compile_plan(["strip", "strip", "lower", ("delete", "-"), ("replace", "_", " "), "collapse_whitespace"])
+    print(plan)
+    print(plan.source)
+    print()
+    benchmark(args.rows)
@@ -0,0 +1,328 @@
+"""
+Delimited Parser - Bytes to Arrow Columns
+=========================================
+Column-producing replacement for splitting lines one at a time with
+`safe_split` from `string_methods.py`:
+
+    for line in text.splitlines():
+        fields = safe_split(line, ",", 5)     # one list + one str per field
+
+Here the whole buffer (`bytes`, `memoryview`, `mmap`) is parsed with NumPy:
+
+    1. Delimiter, newline and quote positions are found in bulk
+       (`np.flatnonzero(buf == byte)`), never byte by byte in Python.
+    2. Quote parity (number of quotes before a position, mod 2) marks
+       delimiters / newlines inside quoted fields as data. RFC 4180 escaped
+       quotes ("") toggle the parity twice, so they need no special case.
+    3. Separators give (start, end) byte offsets per field and a row id;
+       each field's position in its row decides its output column. Rows with
+       fewer than `expected_fields` fields are padded with "" and longer rows
+       are truncated, exactly like safe_split.
+    4. Each column is gathered into one Arrow string array (offsets + UTF-8
+       data buffer) with a single vectorized byte gather; no Python object is
+       created per field. Surrounding quotes are stripped by moving offsets,
+       and escaped "" become " by dropping bytes during the gather.
+
+CRLF line endings are handled, and a final line without a newline is still a
+row. Field counts per row are returned on request to find ragged rows.
+
+Usage:
+    table = parse_delimited(data, expected_fields=5, delimiter=",", header=True)
+    for table in iter_parse_file("loans.csv", expected_fields=5, header=True): ...
+"""
+
+import csv
+import io
+import mmap
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from string_methods import safe_split
+
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _byte(value, name: str):
+    if value is None:
+        return None
+    raw = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+    if len(raw) != 1:
+        raise ValueError(f"{name} must be a single byte, got {value!r}")
+    return raw[0]
+
+
+def _as_array(data) -> np.ndarray:
+    """Zero-copy uint8 view of bytes / bytearray / memoryview / mmap."""
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+# =============================================================================
+# FIELD OFFSETS
+# =============================================================================
+
+def _unquoted(positions: np.ndarray, quotes: np.ndarray) -> np.ndarray:
+    """Keeps positions preceded by an even number of quote bytes."""
+    if not len(quotes):
+        return positions
+    return positions[np.searchsorted(quotes, positions) % 2 == 0]
+
+
+def _field_offsets(buf: np.ndarray, delimiter: int, quote):
+    """
+    Returns (starts, ends, row_first_field, fields_per_row, quotes) for
+    every field in the buffer. `ends` excludes the delimiter / newline (and a CR
+    before the newline).
+    """
+    quotes = np.flatnonzero(buf == quote) if quote is not None else np.empty(0, np.intp)
+    ends = _unquoted(np.flatnonzero((buf == delimiter) | (buf == NEWLINE)), quotes)
+    if len(buf) and (not len(ends) or buf[ends[-1]] != NEWLINE or ends[-1] != len(buf) - 1):
+        ends = np.append(ends, len(buf))  # last line without a newline
+    is_newline = np.ones(len(ends), bool)
+    is_newline[:-1] = buf[ends[:-1]] == NEWLINE
+
+    starts = np.empty_like(ends)
+    if len(ends):
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+
+    # CRLF: drop the CR from the last field of each row
+    line_ends = ends[is_newline]
+    has_cr = (line_ends > 0) & (buf[np.maximum(line_ends - 1, 0)] == CARRIAGE_RETURN)
+    if has_cr.any():
+        last_field = np.flatnonzero(is_newline)[has_cr]
+        ends[last_field] = np.maximum(ends[last_field] - 1, starts[last_field])
+
+    row_first_field = np.flatnonzero(np.concatenate([[True], is_newline[:-1]])) if len(ends) else ends
+    fields_per_row = np.diff(np.append(row_first_field, len(ends)))
+    return starts, ends, row_first_field, fields_per_row, quotes
+
+
+# =============================================================================
+# COLUMN GATHER
+# =============================================================================
+
+def _gather_ranges(buf: np.ndarray, starts: np.ndarray, lengths: np.ndarray, total: int) -> np.ndarray:
+    """
+    Concatenates buf[start:start + length] for every range. Short, similar
+    fields (IDs, amounts, dates) are copied as a (rows, max_length) window
+    and masked, which beats building an 8-byte index per byte; ranges of
+    very uneven length fall back to that index.
+    """
+    if not len(lengths) or total == 0:
+        return np.empty(0, np.uint8)
+    width = int(lengths.max())
+    if width * len(lengths) <= 4 * total and len(buf) >= width:
+        padded = np.concatenate([buf, np.zeros(width, np.uint8)]) if starts.max() + width > len(buf) else buf
+        windows = np.lib.stride_tricks.sliding_window_view(padded, width)[starts]
+        return windows[np.arange(width) < lengths[:, None]]
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    return buf[np.repeat(starts - offsets[:-1], lengths) + np.arange(total)]
+
+
+def _gather_column(buf: np.ndarray, starts: np.ndarray, ends: np.ndarray, drop: np.ndarray) -> pa.Array:
+    """
+    One Arrow string array from byte ranges [starts, ends) of `buf`, with the
+    byte positions in `drop` (sorted) left out.
+    """
+    lengths = np.maximum(ends - starts, 0)
+    if len(drop):
+        lengths = lengths - (np.searchsorted(drop, ends) - np.searchsorted(drop, starts))
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    if len(drop):
+        raw_lengths = np.maximum(ends - starts, 0)
+        raw_offsets = np.concatenate([[0], np.cumsum(raw_lengths)])
+        index = np.repeat(starts - raw_offsets[:-1], raw_lengths) + np.arange(raw_offsets[-1])
+        data = buf[index[~np.isin(index, drop, assume_unique=True)]]
+    else:
+        data = _gather_ranges(buf, starts, lengths, offsets[-1])
+
+    if offsets[-1] < 2 ** 31:
+        return pa.Array.from_buffers(pa.string(), len(lengths),
+                                     [None, pa.py_buffer(offsets.astype(np.int32)), pa.py_buffer(data)])
+    return pa.Array.from_buffers(pa.large_string(), len(lengths), [None, pa.py_buffer(offsets), pa.py_buffer(data)])
+
+
+def parse_delimited(data, expected_fields: int, delimiter=",", quote='"', names=None,
+                    header: bool = False, return_counts: bool = False):
+    """
+    Parses delimited text straight into Arrow string columns.
+
+    Args:
+        data: bytes / bytearray / memoryview / mmap (UTF-8)
+        expected_fields: Output column count; short rows are padded with "",
+            long rows truncated (safe_split semantics)
+        delimiter: Single-byte field delimiter
+        quote: Single-byte quote character, or None to disable quoting
+        names: Column names (default f0, f1, ...)
+        header: Use the first row as column names and skip it
+        return_counts: Also return the raw field count of every row
+
+    Returns:
+        pyarrow.Table (and a NumPy array of fields per row if return_counts)
+    """
+    if expected_fields < 1:
+        raise ValueError("expected_fields must be at least 1")
+    buf = _as_array(data)
+    quote_byte = _byte(quote, "quote")
+    starts, ends, row_first_field, fields_per_row, quotes = _field_offsets(
+        buf, _byte(delimiter, "delimiter"), quote_byte
+    )
+
+    # Quoted fields: move offsets inside the quotes, drop the first of each ""
+    drop = np.empty(0, np.intp)
+    if len(quotes):
+        nonempty = ends - starts >= 2
+        quoted = nonempty & (buf[np.minimum(starts, len(buf) - 1)] == quote_byte) & \
+            (buf[np.maximum(ends - 1, 0)] == quote_byte)
+        starts = np.where(quoted, starts + 1, starts)
+        ends = np.where(quoted, ends - 1, ends)
+        inside = np.searchsorted(quotes, ends[quoted]) - np.searchsorted(quotes, starts[quoted])
+        inner = np.concatenate([quotes[a:b] for a, b in zip(np.searchsorted(quotes, starts[quoted]),
+                                                               np.searchsorted(quotes, ends[quoted]))
+                                if b > a]) if inside.any() else drop
+        drop = inner[0::2]
+
+    n_rows = len(fields_per_row)
+    first_row = 1 if header else 0
+    if header and n_rows:
+        header_fields = range(min(fields_per_row[0], expected_fields))
+        names = [bytes(buf[starts[i]:ends[i]]).decode("utf-8").replace('""', '"') for i in header_fields]
+        names += [f"f{i}" for i in range(len(names), expected_fields)]
+    names = list(names) if names is not None else [f"f{i}" for i in range(expected_fields)]
+
+    columns = []
+    first_fields = row_first_field[first_row:]
+    counts = fields_per_row[first_row:]
+    last = max(len(starts) - 1, 0)
+    for column in range(expected_fields):
+        # Field `column` of row r is field first_fields[r] + column; rows too
+        # short for this column get an empty range (padding)
+        present = counts > column
+        field = np.minimum(first_fields + column, last)
+        col_starts = np.where(present, starts[field], 0) if len(starts) else first_fields
+        col_ends = np.where(present, ends[field], 0) if len(starts) else first_fields
+        columns.append(_gather_column(buf, col_starts, col_ends, drop))
+
+    table = pa.table(dict(zip(names, columns)))
+    if return_counts:
+        return table, fields_per_row[first_row:]
+    return table
+
+
+# =============================================================================
+# FILES
+# =============================================================================
+
+def _last_row_end(buf: np.ndarray, quote) -> int:
+    """Offset just past the last newline that is outside quotes (-1 if none)."""
+    quotes = np.flatnonzero(buf == quote) if quote is not None else np.empty(0, np.intp)
+    newlines = _unquoted(np.flatnonzero(buf == NEWLINE), quotes)
+    return int(newlines[-1]) + 1 if len(newlines) else -1
+
+
+def iter_parse_file(path, expected_fields: int, delimiter=",", quote='"', header: bool = False,
+                    chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+    """
+    Memory-maps a file and yields one Table per chunk of whole rows. Chunks
+    are cut at a newline outside quotes, so every chunk starts fresh.
+    """
+    quote_byte = _byte(quote, "quote")
+    names = None
+    with open(path, "rb") as f:
+        if Path(path).stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                position, size = 0, len(view)
+                while position < size:
+                    length = chunk_bytes
+                    while True:
+                        stop = min(position + length, size)
+                        chunk = view[position:stop]
+                        cut = len(chunk) if stop == size else _last_row_end(_as_array(chunk), quote_byte)
+                        if cut > 0:
+                            break
+                        length *= 2  # one row longer than the chunk
+                    table = parse_delimited(chunk[:cut], expected_fields, delimiter, quote,
+                                            names=names, header=header and names is None)
+                    names = table.column_names
+                    del chunk
+                    position += cut
+                    yield table
+            finally:
+                view.release()
+
+
+# =============================================================================
+# BENCHMARK - MB/s vs safe_split and csv.reader
+# =============================================================================
+
+def _sample_bytes(n_rows: int, quoted: bool) -> bytes:
+    rng = np.random.default_rng(7)
+    lines = []
+    for i, amount, term in zip(range(n_rows), rng.integers(1000, 50000, n_rows), rng.integers(1, 5, n_rows)):
+        name = f'"Hill, Allison {i % 97}"' if quoted and i % 3 == 0 else f"Allison Hill {i % 97}"
+        row = [f"LN{300000 + i}", f"APP{100000 + i}", str(amount), name, f"{term * 12}"]
+        if i % 50 == 0:
+            row = row[:3]  # ragged
+        lines.append(",".join(row))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _rate(megabytes: float, function) -> float:
+    start = time.perf_counter()
+    function()
+    return megabytes / (time.perf_counter() - start)
+
+
+def benchmark(n_rows: int = 500_000, fields: int = 5):
+    for quoted in (False, True):
+        data = _sample_bytes(n_rows, quoted)
+        megabytes = len(data) / 1e6
+        text = data.decode()
+
+        def with_safe_split():
+            return [safe_split(line, ",", fields) for line in text.splitlines()]
+
+        def with_csv_reader():
+            return [(row + [""] * fields)[:fields] for row in csv.reader(io.StringIO(text))]
+
+        def with_parser():
+            return parse_delimited(data, fields)
+
+        print(f"{n_rows:,} rows, {megabytes:.1f} MB, {'with' if quoted else 'no'} quoted fields")
+        rates = [("safe_split", with_safe_split), ("csv.reader", with_csv_reader), ("parse_delimited", with_parser)]
+        if quoted:
+            rates = rates[1:]  # safe_split does not understand quotes
+        for name, function in rates:
+            print(f"  {name:<16}{_rate(megabytes, function):>9.1f} MB/s")
+
+        reference = with_csv_reader() if quoted else with_safe_split()
+        parsed = list(zip(*(column.to_pylist() for column in with_parser().columns)))
+        ok = parsed == [tuple(row) for row in reference]
+        print(f"  parity vs {'csv.reader' if quoted else 'safe_split'}: {'✓ PASS' if ok else '✗ FAIL'}\n")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Delimited bytes -> Arrow columns")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--file", help="parse this CSV (with header) instead of benchmarking")
+    parser.add_argument("--fields", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.file:
+        for table in iter_parse_file(args.file, args.fields, header=True):
+            print(table.slice(0, 3).to_pandas())
+    else:
+        benchmark(args.rows, args.fields)
@@ -0,0 +1,244 @@
+"""
+Streaming Record Cleaner - Data Engineering Practice
+====================================================
+Scales `clean_record_solution` (challenges.py) from one in-memory string to
+multi-GB pipe-delimited order feeds.
+
+How it works:
+    1. The file is read in large byte chunks; each chunk is cut at its last
+       newline and the partial line is carried into the next chunk.
+    2. Chunks are cleaned in a process pool. At most `max_in_flight` chunks
+       are queued at once, so memory is bounded by roughly
+       `max_in_flight * chunk_bytes` no matter how big the input is.
+    3. Each cleaned chunk comes back as one Arrow RecordBatch (columnar),
+       yielded in file order.
+    4. Records that fail to decode or parse are sent to a reject sink with
+       their byte offset instead of stopping the run.
+
+Usage:
+    for batch in stream_clean_records("orders.psv", reject_sink="rejects.jsonl"):
+        writer.write_batch(batch)
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import pyarrow as pa
+
+from challenges import clean_record_solution, raw_records
+
+
+FIELDS = ["order_id", "email", "phone", "amount"]
+SCHEMA = pa.schema([(name, pa.string()) for name in FIELDS])
+
+DEFAULT_CHUNK_BYTES = 32 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RejectedRecord:
+    """A line that could not be cleaned, with where it came from and why."""
+    byte_offset: int
+    raw: str
+    error: str
+
+
+# =============================================================================
+# CHUNKING
+# =============================================================================
+
+def iter_line_chunks(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+    """
+    Yields (start_offset, chunk) pairs where every chunk ends on a line
+    boundary. Only one chunk plus one partial line is held at a time, and
+    each byte is scanned for a newline once.
+    """
+    offset = 0
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            cut = block.rfind(b"\n")
+            if cut == -1:
+                # A single line longer than chunk_bytes: finish it with readline()
+                # rather than growing and rescanning the carry on every read.
+                carry += block + f.readline()
+                if not carry.endswith(b"\n"):
+                    break
+                yield offset, carry
+                offset += len(carry)
+                carry = b""
+                continue
+            yield offset, carry + block[:cut + 1]
+            offset += len(carry) + cut + 1
+            carry = block[cut + 1:]
+    if carry:
+        yield offset, carry
+
+
+# =============================================================================
+# WORKER
+# =============================================================================
+
+def clean_chunk(start_offset: int, chunk: bytes) -> tuple:
+    """
+    Cleans every line in a chunk with clean_record_solution().
+
+    Returns:
+        (RecordBatch of cleaned rows, list of RejectedRecord)
+    """
+    columns = {name: [] for name in FIELDS}
+    rejects = []
+    pos = start_offset
+    for raw_line in chunk.split(b"\n"):
+        line_offset = pos
+        pos += len(raw_line) + 1
+        if not raw_line.strip():
+            continue
+        try:
+            line = raw_line.decode("utf-8")
+        except UnicodeDecodeError as e:
+            rejects.append(RejectedRecord(line_offset, raw_line.decode("utf-8", "replace"), str(e)))
+            continue
+        field_count = line.count("|") + 1
+        if field_count != len(FIELDS):
+            rejects.append(RejectedRecord(
+                line_offset, line, f"expected {len(FIELDS)} fields, got {field_count}"))
+            continue
+        try:
+            record = clean_record_solution(line)
+        except Exception as e:
+            rejects.append(RejectedRecord(line_offset, line, f"{type(e).__name__}: {e}"))
+            continue
+        for name in FIELDS:
+            columns[name].append(record[name])
+
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(columns[name], type=pa.string()) for name in FIELDS], schema=SCHEMA
+    )
+    return batch, rejects
+
+
+# =============================================================================
+# REJECT SINKS
+# =============================================================================
+
+class JsonLinesRejectSink:
+    """Appends rejected records to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, rejected: RejectedRecord):
+        self._file.write(json.dumps(rejected.__dict__) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def _resolve_sink(reject_sink):
+    """Accepts None, a path, or a callable; returns (callable, closer)."""
+    if reject_sink is None:
+        return (lambda rejected: None), None
+    if isinstance(reject_sink, (str, os.PathLike)):
+        sink = JsonLinesRejectSink(reject_sink)
+        return sink, sink.close
+    return reject_sink, None
+
+
+# =============================================================================
+# STREAMING DRIVER
+# =============================================================================
+
+def stream_clean_records(path: str, reject_sink=None, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                         max_workers: int = None, max_in_flight: int = None):
+    """
+    Streams a pipe-delimited file through clean_record_solution in parallel.
+
+    Args:
+        path: Input file, one raw record per line
+        reject_sink: None, a JSON-lines output path, or a callable that
+            receives each RejectedRecord
+        chunk_bytes: Target bytes per chunk handed to a worker
+        max_workers: Worker processes (default: os.cpu_count())
+        max_in_flight: Chunks submitted but not yet yielded (default: 2 * workers)
+
+    Yields:
+        pyarrow.RecordBatch with columns order_id, email, phone, amount
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * max_workers
+    on_reject, close_sink = _resolve_sink(reject_sink)
+
+    pending = []
+    pool = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        for start_offset, chunk in iter_line_chunks(path, chunk_bytes):
+            pending.append(pool.submit(clean_chunk, start_offset, chunk))
+            if len(pending) >= max_in_flight:
+                yield from _drain(pending.pop(0), on_reject)
+        while pending:
+            yield from _drain(pending.pop(0), on_reject)
+    finally:
+        # Closed early: drop queued chunks before waiting, not after (a `with`
+        # block would wait for every pending chunk first)
+        pool.shutdown(wait=True, cancel_futures=True)
+        if close_sink:
+            close_sink()
+
+
+def _drain(future, on_reject):
+    batch, rejects = future.result()
+    for rejected in rejects:
+        on_reject(rejected)
+    if batch.num_rows:
+        yield batch
+
+
+# =============================================================================
+# MAIN - GENERATE A SAMPLE FEED AND STREAM IT
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Stream-clean a pipe-delimited order feed")
+    parser.add_argument("path", nargs="?", help="input file (default: generate a sample feed)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in the generated sample")
+    parser.add_argument("--chunk-mb", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    path = args.path
+    if path is None:
+        path = os.path.join(tmp_dir, "orders.psv")
+        broken = ["ORD_99999 | missing@fields.com", "ORD_1|a@b.c|555|$1|extra"]
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(args.rows):
+                f.write(raw_records[i % len(raw_records)] + "\n")
+                if i % 100_000 == 0:
+                    f.write(broken[(i // 100_000) % len(broken)] + "\n")
+
+    reject_path = os.path.join(tmp_dir, "rejects.jsonl")
+    size_mb = os.path.getsize(path) / 1e6
+    start = time.perf_counter()
+    rows = batches = 0
+    for batch in stream_clean_records(path, reject_sink=reject_path,
+                                      chunk_bytes=args.chunk_mb * 1024 * 1024,
+                                      max_workers=args.workers):
+        rows += batch.num_rows
+        batches += 1
+    elapsed = time.perf_counter() - start
+
+    with open(reject_path, encoding="utf-8") as f:
+        rejected = sum(1 for _ in f)
+    print(f"Input:     {path} ({size_mb:,.1f} MB)")
+    print(f"Cleaned:   {rows:,} rows in {batches} batches")
+    print(f"Rejected:  {rejected:,} rows -> {reject_path}")
+    print(f"Elapsed:   {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s, {size_mb / elapsed:,.1f} MB/s)")
@@ -0,0 +1,328 @@
+"""
+Batch String Utilities for Data Engineering
+===========================================
+Column-at-a-time versions of the DE utility functions in `string_methods.py`.
+
+The scalar helpers (`clean_whitespace`, `normalize_phone`, ...) take one `str`
+per call, so on tens of millions of fields the interpreter overhead dominates.
+The `*_batch` functions below accept a whole column and run the work inside
+`pyarrow.compute` kernels instead of a Python loop.
+
+Supported inputs (the output has the same type as the input):
+    - pyarrow.Array / pyarrow.ChunkedArray
+    - pandas.Series (index and name are preserved)
+    - numpy.ndarray of `str_` or `object` dtype
+
+Parity:
+    Every batch function returns exactly what the scalar function returns for
+    each non-null value. Python's notion of "whitespace" (`str.isspace`) and
+    "digit" (`str.isdigit`) is Unicode-aware, so the regex character classes
+    are generated from those predicates rather than using RE2's ASCII `\\s`/`\\d`.
+    Nulls (None / NaN) propagate as nulls instead of raising.
+
+Run this file to see a parity check and a rows/sec benchmark:
+    python string_batch.py --rows 1000000
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from string_methods import (
+    clean_whitespace,
+    extract_between,
+    is_empty_or_whitespace,
+    normalize_phone,
+    safe_split,
+    truncate,
+)
+
+
+# =============================================================================
+# CHARACTER CLASSES (generated from str predicates for exact parity)
+# =============================================================================
+
+def _char_class(predicate) -> str:
+    """
+    Builds an RE2 character-class body (without brackets) for every code point
+    where `predicate(chr(cp))` is True. Consecutive code points are collapsed
+    into ranges to keep the pattern short.
+    """
+    ranges = []
+    run_start = None
+    for cp in range(sys.maxunicode + 2):
+        hit = cp <= sys.maxunicode and not 0xD800 <= cp <= 0xDFFF and predicate(chr(cp))
+        if hit and run_start is None:
+            run_start = cp
+        elif not hit and run_start is not None:
+            last = cp - 1
+            if run_start == last:
+                ranges.append(f"\\x{{{run_start:x}}}")
+            else:
+                ranges.append(f"\\x{{{run_start:x}}}-\\x{{{last:x}}}")
+            run_start = None
+    return "".join(ranges)
+
+
+def _escape(literal: str) -> str:
+    """Escapes a literal for RE2 (re.escape output is not always RE2-safe)."""
+    return "".join(c if c.isascii() and c.isalnum() else f"\\x{{{ord(c):x}}}" for c in literal)
+
+
+_WHITESPACE = _char_class(str.isspace)
+_DIGITS = _char_class(str.isdigit)
+
+_NON_DIGIT_RUN = f"[^{_DIGITS}]+"
+_ONLY_WHITESPACE = f"^[{_WHITESPACE}]*$"
+
+
+# =============================================================================
+# INPUT / OUTPUT CONVERSION
+# =============================================================================
+
+def _to_arrow(values) -> pa.Array:
+    """Converts a supported column type to an Arrow string array."""
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return values
+    if isinstance(values, pd.Series):
+        return pa.array(values, type=pa.string(), from_pandas=True)
+    if isinstance(values, np.ndarray):
+        if values.ndim != 1:
+            raise ValueError(f"expected a 1-D array, got shape {values.shape}")
+        return pa.array(values, type=pa.string(), from_pandas=True)
+    raise TypeError(
+        f"unsupported input type {type(values).__name__}; "
+        "expected pyarrow.Array, pandas.Series or numpy.ndarray"
+    )
+
+
+def _from_arrow(result, like):
+    """Converts an Arrow result back to the container type of `like`."""
+    if isinstance(like, (pa.Array, pa.ChunkedArray)):
+        return result
+    if isinstance(like, pd.Series):
+        if like.dtype == object or pa.types.is_boolean(result.type):
+            data = result.to_numpy(zero_copy_only=False)
+        else:
+            data = pd.arrays.ArrowExtensionArray(result)
+        return pd.Series(data, index=like.index, name=like.name)
+    # numpy
+    out = result.to_numpy(zero_copy_only=False)
+    if pa.types.is_boolean(result.type) or like.dtype == object:
+        return out
+    return out.astype(str)
+
+
+# =============================================================================
+# BATCH UTILITY FUNCTIONS
+# =============================================================================
+
+def clean_whitespace_batch(values):
+    """
+    Batch version of clean_whitespace().
+    Arrow's Unicode whitespace set matches str.isspace(), so trim + split +
+    join reproduces `" ".join(text.split())` without a regex.
+    """
+    arr = _to_arrow(values)
+    words = pc.utf8_split_whitespace(pc.utf8_trim_whitespace(arr))
+    return _from_arrow(pc.binary_join(words, " "), values)
+
+
+def normalize_phone_batch(values):
+    """
+    Batch version of normalize_phone().
+    Deletes every non-digit run in one regex pass per value.
+    """
+    arr = _to_arrow(values)
+    return _from_arrow(pc.replace_substring_regex(arr, pattern=_NON_DIGIT_RUN, replacement=""), values)
+
+
+def is_empty_or_whitespace_batch(values):
+    """
+    Batch version of is_empty_or_whitespace().
+    Returns a boolean column.
+    """
+    arr = _to_arrow(values)
+    return _from_arrow(pc.match_substring_regex(arr, pattern=_ONLY_WHITESPACE), values)
+
+
+def extract_between_batch(values, start: str, end: str):
+    """
+    Batch version of extract_between().
+
+    The lazy prefix `^.*?` lands on the first `start` occurrence and the lazy
+    group stops at the first `end` after it - the same two find() calls the
+    scalar version makes. Values without a match become "".
+    """
+    arr = _to_arrow(values)
+    pattern = f"(?s)^.*?{_escape(start)}(?P<value>.*?){_escape(end)}"
+    matched = pc.struct_field(pc.extract_regex(arr, pattern=pattern), [0])
+    extracted = pc.if_else(pc.is_null(arr), pa.scalar(None, pa.string()), pc.fill_null(matched, ""))
+    return _from_arrow(extracted, values)
+
+
+def truncate_batch(values, max_length: int, suffix: str = "..."):
+    """
+    Batch version of truncate().
+    Uses Python slice semantics, so a negative cut (max_length < len(suffix))
+    behaves exactly like `text[:max_length - len(suffix)]`.
+    """
+    arr = _to_arrow(values)
+    cut = pc.utf8_slice_codeunits(arr, start=0, stop=max_length - len(suffix))
+    shortened = pc.binary_join_element_wise(cut, suffix, "")
+    fits = pc.less_equal(pc.utf8_length(arr), max_length)
+    return _from_arrow(pc.if_else(fits, arr, shortened), values)
+
+
+def _fill_fixed_lists(lists: pa.FixedSizeListArray, size: int) -> pa.ListArray:
+    """Replaces null slots (past a list's end) with "", keeping null lists null."""
+    items = lists.values.slice(lists.offset * size, len(lists) * size)
+    filled = pa.FixedSizeListArray.from_arrays(pc.fill_null(items, ""), size, mask=lists.is_null())
+    return filled.cast(pa.list_(pa.string()))
+
+
+def safe_split_batch(values, delimiter: str, expected_fields: int):
+    """
+    Batch version of safe_split().
+
+    Splits first, then list_slice with return_fixed_size_list cuts every list
+    to `expected_fields`, padding short ones with nulls that are filled with
+    "" - the scalar `while ... append("")` loop. (Padding the text with
+    delimiters before splitting would let a multi-character delimiter pair
+    up with the end of the value.)
+
+    Returns:
+        pyarrow   -> ListArray of strings
+        pandas    -> Series with an Arrow list<string> dtype
+        numpy     -> 2-D array of shape (n, expected_fields)
+    """
+    if expected_fields < 1:
+        raise ValueError("expected_fields must be at least 1")
+    arr = _to_arrow(values)
+    fixed = pc.list_slice(pc.split_pattern(arr, pattern=delimiter), start=0, stop=expected_fields,
+                          return_fixed_size_list=True)
+    if isinstance(fixed, pa.ChunkedArray):
+        parts = pa.chunked_array([_fill_fixed_lists(chunk, expected_fields) for chunk in fixed.chunks],
+                                 type=pa.list_(pa.string()))
+    else:
+        parts = _fill_fixed_lists(fixed, expected_fields)
+
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return parts
+    if isinstance(values, pd.Series):
+        return pd.Series(pd.arrays.ArrowExtensionArray(parts), index=values.index, name=values.name)
+    if parts.null_count:
+        raise ValueError("numpy input contains nulls; cannot build a rectangular result")
+    flat = pc.list_flatten(parts).to_numpy(zero_copy_only=False)
+    flat = flat if values.dtype == object else flat.astype(str)
+    return flat.reshape(len(values), expected_fields)
+
+
+# =============================================================================
+# BENCHMARK - scalar loop vs batch kernel
+# =============================================================================
+
+def _sample_fields(n_rows: int, seed: int = 42) -> dict:
+    """Builds realistic messy customer fields (names, phones, tagged text)."""
+    rng = np.random.default_rng(seed)
+    first = np.array(["  john", "Jane ", "\tBob", "alice  ", " Émile "])
+    last = np.array(["doe  ", "  smith", "wilson\n", " o'neil", "müller"])
+    names = np.char.add(np.char.add(first[rng.integers(0, 5, n_rows)], "   "),
+                        last[rng.integers(0, 5, n_rows)])
+    area = rng.integers(200, 999, n_rows).astype(str)
+    line = rng.integers(1000, 9999, n_rows).astype(str)
+    phones = np.char.add(np.char.add(np.char.add("(", area), ") 555-"), line)
+    tags = np.char.add(np.char.add("<id>", line), "</id> trailing notes")
+    csv_rows = np.char.add(np.char.add(area, ","), line)
+    return {"names": names, "phones": phones, "tags": tags, "csv_rows": csv_rows}
+
+
+def _rate(n_rows: int, func) -> float:
+    start = time.perf_counter()
+    func()
+    return n_rows / (time.perf_counter() - start)
+
+
+def benchmark(n_rows: int = 1_000_000) -> list:
+    """
+    Times each scalar function in a Python loop against its batch version over
+    the same Arrow column. Returns a list of result dicts and prints a table.
+    """
+    data = _sample_fields(n_rows)
+    cols = {key: pa.array(val) for key, val in data.items()}
+    py = {key: val.tolist() for key, val in data.items()}
+
+    cases = [
+        ("clean_whitespace",
+         lambda: [clean_whitespace(s) for s in py["names"]],
+         lambda: clean_whitespace_batch(cols["names"])),
+        ("normalize_phone",
+         lambda: [normalize_phone(s) for s in py["phones"]],
+         lambda: normalize_phone_batch(cols["phones"])),
+        ("is_empty_or_whitespace",
+         lambda: [is_empty_or_whitespace(s) for s in py["names"]],
+         lambda: is_empty_or_whitespace_batch(cols["names"])),
+        ("extract_between",
+         lambda: [extract_between(s, "<id>", "</id>") for s in py["tags"]],
+         lambda: extract_between_batch(cols["tags"], "<id>", "</id>")),
+        ("truncate",
+         lambda: [truncate(s, 12) for s in py["names"]],
+         lambda: truncate_batch(cols["names"], 12)),
+        ("safe_split",
+         lambda: [safe_split(s, ",", 4) for s in py["csv_rows"]],
+         lambda: safe_split_batch(cols["csv_rows"], ",", 4)),
+    ]
+
+    results = []
+    print(f"{'function':<24}{'scalar rows/s':>16}{'batch rows/s':>16}{'speedup':>10}")
+    print("-" * 66)
+    for name, scalar_fn, batch_fn in cases:
+        scalar = _rate(n_rows, scalar_fn)
+        batch = _rate(n_rows, batch_fn)
+        results.append({"function": name, "rows": n_rows,
+                        "scalar_rows_per_sec": scalar, "batch_rows_per_sec": batch})
+        print(f"{name:<24}{scalar:>16,.0f}{batch:>16,.0f}{batch / scalar:>9.1f}x")
+    return results
+
+
+# =============================================================================
+# MAIN - PARITY CHECK + BENCHMARK
+# =============================================================================
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batch string utilities benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows per benchmark column")
+    args = parser.parse_args()
+
+    samples = ["  hello   world  ", "", "   ", "　x y\x1c", "(123) 456-7890 ext ²",
+               "<tag>value</tag>", "a,b", "Hello World", "no tags here"]
+    checks = [
+        ("clean_whitespace", clean_whitespace_batch(pa.array(samples)),
+         [clean_whitespace(s) for s in samples]),
+        ("normalize_phone", normalize_phone_batch(pa.array(samples)),
+         [normalize_phone(s) for s in samples]),
+        ("is_empty_or_whitespace", is_empty_or_whitespace_batch(pa.array(samples)),
+         [is_empty_or_whitespace(s) for s in samples]),
+        ("extract_between", extract_between_batch(pa.array(samples), "<tag>", "</tag>"),
+         [extract_between(s, "<tag>", "</tag>") for s in samples]),
+        ("truncate", truncate_batch(pa.array(samples), 8),
+         [truncate(s, 8) for s in samples]),
+        ("safe_split", safe_split_batch(pa.array(samples), ",", 4),
+         [safe_split(s, ",", 4) for s in samples]),
+    ]
+
+    print("PARITY CHECK")
+    print("-" * 66)
+    for name, batch_result, scalar_result in checks:
+        status = "✓ PASS" if batch_result.to_pylist() == scalar_result else "✗ FAIL"
+        print(f"{name:<24}{status}")
+
+    print(f"\nBENCHMARK ({args.rows:,} rows)")
+    print("-" * 66)
+    benchmark(args.rows)
@@ -0,0 +1,30 @@
+"""
+Batch kernels against the scalar string_methods versions.
+
+    pytest test_string_batch.py
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from string_batch import safe_split_batch
+from string_methods import safe_split
+
+VALUES = ["", "a", "a|", "a||", "a||b", "a||b||c||d", "|||", "||a|", "a|b|c", "x|-|y|-|", "日本||語"]
+
+
+@pytest.mark.parametrize("expected_fields", [1, 2, 3, 5])
+@pytest.mark.parametrize("delimiter", ["|", "||", "|-|", ","])
+def test_safe_split_batch_matches_scalar(delimiter, expected_fields):
+    expected = [safe_split(v, delimiter, expected_fields) for v in VALUES]
+    assert safe_split_batch(pa.array(VALUES), delimiter, expected_fields).to_pylist() == expected
+    chunked = pa.chunked_array([VALUES[:4], VALUES[4:]])
+    assert safe_split_batch(chunked, delimiter, expected_fields).to_pylist() == expected
+    assert safe_split_batch(pd.Series(VALUES), delimiter, expected_fields).tolist() == expected
+    assert safe_split_batch(np.array(VALUES, dtype=object), delimiter, expected_fields).tolist() == expected
+
+
+def test_safe_split_batch_keeps_nulls():
+    assert safe_split_batch(pa.array(["a|b", None]), "|", 3).to_pylist() == [["a", "b", ""], None]